@@ -0,0 +1,43 @@
+"""ivhistory unique contract/date and composite indexes
+
+Revision ID: 4b2e9d7a1c35
+Revises: c617bf6dafc3
+Create Date: 2025-07-18 10:12:41.207113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b2e9d7a1c35'
+down_revision: Union[str, Sequence[str], None] = 'c617bf6dafc3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ── drop duplicates left by earlier runs, keeping the first inserted row ─
+    op.execute("""
+        DELETE FROM ivhistory a
+        USING ivhistory b
+        WHERE a.id > b.id
+          AND a.watchlist_id = b.watchlist_id
+          AND a.contract_id  = b.contract_id
+          AND a.date         = b.date
+    """)
+
+    # ── one row per contract per day (upsert conflict target) ───────────────
+    op.create_unique_constraint(
+        'uq_ivhistory_watchlist_contract_date', 'ivhistory', ['watchlist_id', 'contract_id', 'date']
+    )
+
+    # ── lookback / max-date queries ─────────────────────────────────────────
+    op.create_index('ix_ivhistory_watchlist_date', 'ivhistory', ['watchlist_id', 'date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ivhistory_watchlist_date', table_name='ivhistory')
+    op.drop_constraint('uq_ivhistory_watchlist_contract_date', 'ivhistory', type_='unique')
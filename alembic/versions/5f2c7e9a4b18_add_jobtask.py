@@ -0,0 +1,44 @@
+"""add jobtask for the in-process scheduler
+
+Revision ID: 5f2c7e9a4b18
+Revises: d3a8f1c5e7b9
+Create Date: 2025-08-04 11:21:08.413570
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2c7e9a4b18'
+down_revision: Union[str, Sequence[str], None] = 'd3a8f1c5e7b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('jobtask',
+        sa.Column('id',           sa.Integer(),  nullable=False),
+        sa.Column('job',          sa.String(),   nullable=False),
+        sa.Column('session_date', sa.DateTime(), nullable=False),
+        sa.Column('symbol',       sa.String(),   nullable=False),
+        sa.Column('watchlist_id', sa.Integer(),  nullable=True),
+        sa.Column('status',       sa.String(),   nullable=False),
+        sa.Column('attempts',     sa.Integer(),  nullable=False),
+        sa.Column('last_error',   sa.String(),   nullable=True),
+        sa.Column('started_at',   sa.DateTime(), nullable=True),
+        sa.Column('finished_at',  sa.DateTime(), nullable=True),
+        sa.Column('created_at',   sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job', 'session_date', 'symbol', name='uq_jobtask_job_session_symbol'),
+    )
+    op.create_index(op.f('ix_jobtask_id'),         'jobtask', ['id'])
+    op.create_index('ix_jobtask_job_session_status', 'jobtask', ['job', 'session_date', 'status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobtask_job_session_status', table_name='jobtask')
+    op.drop_index(op.f('ix_jobtask_id'),         table_name='jobtask')
+    op.drop_table('jobtask')
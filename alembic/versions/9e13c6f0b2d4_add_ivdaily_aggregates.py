@@ -0,0 +1,55 @@
+"""add ivdaily aggregates
+
+Revision ID: 9e13c6f0b2d4
+Revises: 4b2e9d7a1c35
+Create Date: 2025-07-21 09:37:12.540218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e13c6f0b2d4'
+down_revision: Union[str, Sequence[str], None] = '4b2e9d7a1c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ivdaily',
+        sa.Column('id',           sa.Integer(),  nullable=False),
+        sa.Column('symbol',       sa.String(),   nullable=False),
+        sa.Column('date',         sa.DateTime(), nullable=False),
+        sa.Column('median_iv',    sa.Float(),    nullable=False),
+        sa.Column('mean_iv',      sa.Float(),    nullable=False),
+        sa.Column('contracts',    sa.Integer(),  nullable=False),
+        sa.Column('watchlist_id', sa.Integer(),  nullable=False),
+        sa.ForeignKeyConstraint(['watchlist_id'], ['watchlist.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('watchlist_id', 'date', name='uq_ivdaily_watchlist_date'),
+    )
+    op.create_index(op.f('ix_ivdaily_id'),     'ivdaily', ['id'])
+    op.create_index(op.f('ix_ivdaily_symbol'), 'ivdaily', ['symbol'])
+
+    # ── backfill from the raw per-contract rows ─────────────────────────────
+    op.execute("""
+        INSERT INTO ivdaily (watchlist_id, symbol, date, median_iv, mean_iv, contracts)
+        SELECT watchlist_id,
+               max(symbol),
+               date,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY iv),
+               avg(iv),
+               count(*)
+        FROM ivhistory
+        WHERE watchlist_id IS NOT NULL
+        GROUP BY watchlist_id, date
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ivdaily_symbol'), table_name='ivdaily')
+    op.drop_index(op.f('ix_ivdaily_id'),     table_name='ivdaily')
+    op.drop_table('ivdaily')
@@ -0,0 +1,50 @@
+"""add signalsnapshot for the screener
+
+Revision ID: d3a8f1c5e7b9
+Revises: 9e13c6f0b2d4
+Create Date: 2025-07-28 14:05:33.918402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8f1c5e7b9'
+down_revision: Union[str, Sequence[str], None] = '9e13c6f0b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('signalsnapshot',
+        sa.Column('watchlist_id',  sa.Integer(),  nullable=False),
+        sa.Column('symbol',        sa.String(),   nullable=False),
+        sa.Column('as_of',         sa.DateTime(), nullable=False),
+        sa.Column('close',         sa.Float(),    nullable=False),
+        sa.Column('trend_bias',    sa.String(),   nullable=True),
+        sa.Column('regime',        sa.Integer(),  nullable=True),
+        sa.Column('regime_level',  sa.String(),   nullable=True),
+        sa.Column('regime_vol',    sa.Float(),    nullable=True),
+        sa.Column('n_regimes',     sa.Integer(),  nullable=True),
+        sa.Column('iv',            sa.Float(),    nullable=True),
+        sa.Column('iv_rank',       sa.Float(),    nullable=True),
+        sa.Column('iv_percentile', sa.Float(),    nullable=True),
+        sa.Column('updated_at',    sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['watchlist_id'], ['watchlist.id']),
+        sa.PrimaryKeyConstraint('watchlist_id'),
+    )
+    op.create_index(op.f('ix_signalsnapshot_symbol'),       'signalsnapshot', ['symbol'])
+    op.create_index(op.f('ix_signalsnapshot_regime_level'), 'signalsnapshot', ['regime_level'])
+    op.create_index(op.f('ix_signalsnapshot_iv_rank'),      'signalsnapshot', ['iv_rank'])
+    op.create_index('ix_signalsnapshot_trend_regime',       'signalsnapshot', ['trend_bias', 'regime_level'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_signalsnapshot_trend_regime',       table_name='signalsnapshot')
+    op.drop_index(op.f('ix_signalsnapshot_iv_rank'),      table_name='signalsnapshot')
+    op.drop_index(op.f('ix_signalsnapshot_regime_level'), table_name='signalsnapshot')
+    op.drop_index(op.f('ix_signalsnapshot_symbol'),       table_name='signalsnapshot')
+    op.drop_table('signalsnapshot')
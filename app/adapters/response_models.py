@@ -1,12 +1,141 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+class FeatureSet(str, Enum):
+    basic = "basic"
+    multi_vol = "multi_vol"
+    volume = "volume"
+    iv = "iv"
 
 class RegimePoint(BaseModel):
     date: datetime
     close: float
     regime: int
+    # posterior probability of each regime at this bar; regimes are numbered by volatility
+    probabilities: Optional[List[float]] = None
     
 class TrendPoint(BaseModel):
     date: datetime
     close: float
     trend_bias: str
+
+class RegimeBatchRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=1000, description="Stock symbols to analyze")
+    start_date: str = Field(..., description="Start date in YYYY-MM-DD format")
+    end_date: str = Field(..., description="End date in YYYY-MM-DD format")
+    components: int = Field(3, ge=2, le=5, description="Number of HMM components (2-5)")
+    features: FeatureSet = Field(FeatureSet.basic, description="HMM feature set")
+
+class RegimeBatchItem(BaseModel):
+    symbol: str
+    regimes: Optional[List[RegimePoint]] = None
+    error: Optional[str] = None
+
+class TrendSnapshot(BaseModel):
+    symbol: str
+    date: datetime
+    close: float
+    trend_bias: str
+
+class IvRank(BaseModel):
+    symbol: str
+    date: datetime
+    iv: float
+    iv_rank: float
+    iv_percentile: float
+    lookback_days: int
+    observations: int
+
+class IvPoint(BaseModel):
+    date: datetime
+    iv: float
+
+class SignalEvent(BaseModel):
+    event: str
+    symbol: str
+    date: datetime
+    close: float
+    trend_bias: Optional[str] = None
+    regime: Optional[int] = None
+
+class RegimeStats(BaseModel):
+    regime: int
+    bars: int
+    share: float
+    mean_return: Optional[float] = None
+    volatility: Optional[float] = None
+    sharpe: Optional[float] = None
+    avg_duration: Optional[float] = None
+
+class RegimeBacktest(BaseModel):
+    symbol: str
+    components: int
+    windows: int
+    train_size: int
+    test_size: int
+    expanding: bool
+    regimes: List[RegimePoint]
+    stats: List[RegimeStats]
+
+class SelectionCriterion(str, Enum):
+    bic = "bic"
+    aic = "aic"
+    log_likelihood = "log_likelihood"
+
+class ComponentScore(BaseModel):
+    components: int
+    n_parameters: int
+    restarts: int
+    failed_restarts: int
+    log_likelihood: Optional[float] = None
+    aic: Optional[float] = None
+    bic: Optional[float] = None
+    converged: Optional[bool] = None
+
+class ComponentSweep(BaseModel):
+    symbol: str
+    criterion: str
+    best_components: int
+    observations: int
+    scores: List[ComponentScore]
+    regimes: List[RegimePoint]
+
+class TrendBias(str, Enum):
+    bullish = "bullish"
+    neutral = "neutral"
+    bearish = "bearish"
+
+class RegimeLevel(str, Enum):
+    low_vol = "low_vol"
+    mid_vol = "mid_vol"
+    high_vol = "high_vol"
+
+class ScreenerSort(str, Enum):
+    symbol = "symbol"
+    close = "close"
+    regime_vol = "regime_vol"
+    iv = "iv"
+    iv_rank = "iv_rank"
+    iv_percentile = "iv_percentile"
+    as_of = "as_of"
+
+class ScreenerRow(BaseModel):
+    symbol: str
+    name: Optional[str] = None
+    category: str
+    sector: Optional[str] = None
+    industry: Optional[str] = None
+    asset_class: Optional[str] = None
+    region: Optional[str] = None
+    as_of: datetime
+    close: float
+    trend_bias: Optional[str] = None
+    regime: Optional[int] = None
+    regime_level: Optional[str] = None
+    regime_vol: Optional[float] = None
+    iv: Optional[float] = None
+    iv_rank: Optional[float] = None
+    iv_percentile: Optional[float] = None
+    updated_at: datetime
@@ -0,0 +1,78 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+from fastapi import Request, Response
+
+from app.domain.market_calendar import market_today, next_market_close
+from app.infrastructure.bar_cache import to_utc
+from app.infrastructure.response_cache import CachedResponse, response_cache
+
+load_dotenv()
+
+# Daily bars for the session are final a little after the 16:00 close
+RESPONSE_CACHE_CLOSE_DELAY = timedelta(minutes=float(os.getenv("RESPONSE_CACHE_CLOSE_DELAY_MINUTES", "20")))
+# Windows that ended before today no longer change
+RESPONSE_CACHE_MAX_TTL = timedelta(seconds=float(os.getenv("RESPONSE_CACHE_MAX_TTL_SECONDS", str(7 * 24 * 3600))))
+
+
+def response_expiry(end_date: str, now: datetime, bar: Optional[timedelta] = None) -> datetime:
+    """
+    When a result for a window ending at `end_date` may change: at the next market
+    close (plus a settling delay) if the window reaches today, otherwise much later.
+    With intraday bars of length `bar`, a window reaching today changes at the next bar.
+    """
+    if to_utc(end_date).date() < market_today(now):
+        return now + RESPONSE_CACHE_MAX_TTL
+    if bar is not None:
+        elapsed = (now - datetime(1970, 1, 1, tzinfo=timezone.utc)) % bar
+        return now - elapsed + bar
+    return next_market_close(now - RESPONSE_CACHE_CLOSE_DELAY) + RESPONSE_CACHE_CLOSE_DELAY
+
+
+def _not_modified(request: Request, entry: CachedResponse) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or entry.etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return int(entry.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def cached_response(
+    request: Request,
+    key: str,
+    end_date: str,
+    build: Callable[[], Awaitable[bytes]],
+    media_type: str = "application/json",
+    bar: Optional[timedelta] = None,
+) -> Response:
+    """
+    Serve `build()`'s body from the response cache, with ETag / Last-Modified validators.
+    Conditional requests that still match get a 304 without recomputing anything.
+    """
+    entry = await response_cache.get(key)
+    if entry is None:
+        body = await build()
+        now = datetime.now(timezone.utc)
+        entry = CachedResponse(body, media_type, now.timestamp(), response_expiry(end_date, now, bar).timestamp())
+        await response_cache.set(key, entry)
+
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+        "Cache-Control": f"max-age={max(0, int(entry.expires_at - time.time()))}",
+        "Vary": "Accept",
+    }
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
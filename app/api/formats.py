@@ -0,0 +1,43 @@
+from enum import Enum
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+from fastapi import HTTPException, Request
+
+from app.adapters.columnar import ARROW_STREAM, COLUMNAR_JSON, to_arrow_ipc, to_columnar_json
+
+
+class ResponseFormat(str, Enum):
+    json = "json"
+    columnar = "columnar"
+    arrow = "arrow"
+
+
+MEDIA_TYPES = {
+    ResponseFormat.json: "application/json",
+    ResponseFormat.columnar: COLUMNAR_JSON,
+    ResponseFormat.arrow: ARROW_STREAM,
+}
+
+
+def negotiate_format(request: Request, requested: Optional[ResponseFormat]) -> ResponseFormat:
+    """
+    The `format` query parameter wins; otherwise the Accept header picks the columnar
+    encodings, and anything else gets the default row-oriented JSON.
+    """
+    if requested is not None:
+        fmt = requested
+    else:
+        accept = request.headers.get("accept", "")
+        fmt = next((f for f, media in MEDIA_TYPES.items() if f != ResponseFormat.json and media in accept), ResponseFormat.json)
+
+    if fmt == ResponseFormat.arrow:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=406, detail="Arrow output requires pyarrow on the server")
+    return fmt
+
+
+def columnar_serializer(fmt: ResponseFormat) -> Callable[[Dict[str, pd.Series]], bytes]:
+    return to_arrow_ipc if fmt == ResponseFormat.arrow else to_columnar_json
@@ -0,0 +1,53 @@
+import os
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.infrastructure.metrics import request_spans, server_timing
+
+load_dotenv()
+
+# Add a Server-Timing header with the request's spans to every response
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Prometheus scrape endpoint.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+class ServerTimingMiddleware:
+    """
+    Collects the spans recorded while serving a request and reports them in a
+    `Server-Timing` header. Spans finished after the headers are sent (streamed bodies)
+    only reach the metrics.
+    """
+
+    def __init__(self, app, enabled: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            return await self.app(scope, receive, send)
+
+        spans = []
+        token = request_spans.set(spans)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and spans:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(spans).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_spans.reset(token)
@@ -0,0 +1,19 @@
+from typing import Optional
+
+import pandas as pd
+from fastapi import HTTPException
+
+from app.domain.resample import intraday_span, parse_timeframe
+
+TIMEFRAME_DESCRIPTION = "Bar size, e.g. 1Min, 5Min, 15Min, 1Hour, 1D, 1Week, 1Month; resampled from 1Min / 1D bars"
+
+
+def checked_timeframe(timeframe: str) -> Optional[pd.Timedelta]:
+    """
+    Validate a `timeframe` query parameter; returns the bar length for intraday timeframes.
+    """
+    try:
+        parse_timeframe(timeframe)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return intraday_span(timeframe)
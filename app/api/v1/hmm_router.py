@@ -1,22 +1,127 @@
-from fastapi import APIRouter, Query, HTTPException
-from app.adapters.response_models import RegimePoint
-from app.services.hmm_service import get_regimes_for_symbol
-from typing import List
+from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from app.adapters.response_models import ComponentSweep, FeatureSet, RegimeBacktest, RegimeBatchRequest, RegimePoint, SelectionCriterion
+from app.api.caching import cached_response
+from app.api.formats import MEDIA_TYPES, ResponseFormat, columnar_serializer, negotiate_format
+from app.api.timeframes import TIMEFRAME_DESCRIPTION, checked_timeframe
+from app.infrastructure.bar_cache import to_utc
+from app.infrastructure.metrics import span
+from app.infrastructure.response_cache import cache_key
+from app.services.backtest_service import backtest_regimes
+from app.services.hmm_service import (
+    AUTO_COMPONENTS, HMM_SWEEP_RESTARTS, SWEEP_CANDIDATES, get_component_sweep, get_regimes_for_symbol,
+    get_regimes_frame, stream_regimes_batch
+)
+from typing import List, Optional, Union
 
 router = APIRouter()
 
+regime_points = TypeAdapter(List[RegimePoint])
+
+def checked_components(components: str) -> Union[int, str]:
+    """
+    Parse the `components` query parameter: 2-5, or "auto". Raises 422 otherwise.
+    """
+    if components.lower() == AUTO_COMPONENTS:
+        return AUTO_COMPONENTS
+    if not components.isdigit() or not 2 <= int(components) <= 5:
+        raise HTTPException(status_code=422, detail="components must be between 2 and 5, or 'auto'")
+    return int(components)
+
 @router.get("/regimes", response_model=List[RegimePoint])
 async def detect_regimes(
+    request: Request,
     symbol: str = Query(..., description="The stock symbol to analyze"),
     start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
     end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
-    components: int = Query(3, ge=2, le=5, description="Number of HMM components (2-5)")
+    components: str = Query("3", description="Number of HMM components (2-5), or 'auto' to pick it by BIC (see /regimes/sweep)"),
+    timeframe: str = Query("1D", description=TIMEFRAME_DESCRIPTION),
+    features: FeatureSet = Query(FeatureSet.basic, description="HMM inputs: basic (return, 20-bar vol), multi_vol (5/20/60-bar vol), volume (adds relative volume) or iv (adds daily median IV)"),
+    format: Optional[ResponseFormat] = Query(None, description="json (rows), columnar (JSON arrays) or arrow (Arrow IPC); defaults to the Accept header")
 ):
     """
     Detect market regimes for a given stock symbol within a specified date range.
+    Responses are cached until the next market close and carry ETag / Last-Modified.
+    """
+    fmt = negotiate_format(request, format)
+    bar = checked_timeframe(timeframe)
+    components = checked_components(components)
+    try:
+        key = cache_key(endpoint="regimes", symbol=symbol.upper(), start=to_utc(start_date), end=to_utc(end_date), components=components, timeframe=timeframe, features=features.value, format=fmt.value)
+
+        async def build() -> bytes:
+            if fmt == ResponseFormat.json:
+                points = await get_regimes_for_symbol(symbol, start_date, end_date, components, timeframe, features.value)
+                with span("serialise"):
+                    return regime_points.dump_json(points)
+            df = await get_regimes_frame(symbol, start_date, end_date, components, timeframe, features.value)
+            with span("serialise"):
+                probabilities = {c: df[c] for c in df.columns if c.startswith("p_")}
+                return columnar_serializer(fmt)({"date": df["t"], "close": df["close"], "regime": df["regime"], **probabilities})
+
+        return await cached_response(request, key, end_date, build, media_type=MEDIA_TYPES[fmt], bar=bar)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/regimes/sweep", response_model=ComponentSweep)
+async def sweep_regime_components(
+    symbol: str = Query(..., description="The stock symbol to analyze"),
+    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
+    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
+    candidates: List[int] = Query(SWEEP_CANDIDATES, description="Component counts to compare (2-5); repeat the parameter"),
+    restarts: int = Query(HMM_SWEEP_RESTARTS, ge=1, le=16, description="Seeded EM restarts per candidate; the best log-likelihood is kept"),
+    criterion: SelectionCriterion = Query(SelectionCriterion.bic, description="Score that picks the winner: bic, aic (lowest wins) or log_likelihood (highest wins)"),
+    timeframe: str = Query("1D", description=TIMEFRAME_DESCRIPTION),
+    features: FeatureSet = Query(FeatureSet.basic, description="HMM feature set"),
+):
+    """
+    Fit every candidate component count (with several random restarts each) in parallel,
+    score the fits and return the scores together with the winning labelling.
+    """
+    checked_timeframe(timeframe)
+    if any(not 2 <= n <= 5 for n in candidates):
+        raise HTTPException(status_code=422, detail="candidates must be between 2 and 5")
+    try:
+        return await get_component_sweep(symbol, start_date, end_date, sorted(set(candidates)), restarts,
+                                         criterion.value, timeframe, features.value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/regimes/batch", response_class=StreamingResponse)
+async def detect_regimes_batch(request: RegimeBatchRequest):
+    """
+    Detect market regimes for many symbols over a shared date range.
+    Results are streamed as newline-delimited JSON, one line per symbol, in completion order.
+    """
+    async def lines():
+        async for item in stream_regimes_batch(request.symbols, request.start_date, request.end_date, request.components, request.features.value):
+            yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/regimes/backtest", response_model=List[RegimeBacktest])
+async def backtest_regime_model(
+    symbol: str = Query(..., description="Stock symbol to analyze"),
+    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
+    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
+    components: List[int] = Query([3], description="Number of HMM components (2-5); repeat to compare several"),
+    train_size: int = Query(252, ge=60, description="Bars each window is fitted on"),
+    test_size: int = Query(21, ge=1, description="Out-of-sample bars labelled after each fit"),
+    expanding: bool = Query(False, description="Fit on all bars so far instead of a rolling window"),
+):
+    """
+    Walk-forward backtest of the regime model: refit on rolling (or expanding) windows and
+    label only the following out-of-sample bars, then summarise the next-bar returns per regime.
+    Regimes are ordered by volatility, 0 being the calmest.
     """
+    if any(not 2 <= n <= 5 for n in components):
+        raise HTTPException(status_code=422, detail="components must be between 2 and 5")
     try:
-        regimes = await get_regimes_for_symbol(symbol, start_date, end_date, components)
-        return regimes
+        return await backtest_regimes(symbol, start_date, end_date, list(dict.fromkeys(components)), train_size, test_size, expanding)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
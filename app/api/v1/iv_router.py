@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.adapters.response_models import IvPoint, IvRank
+from app.db.session import get_async_db
+from app.services.iv_service import get_iv_points_for_symbol, get_iv_rank_for_symbol
+from typing import List
+
+router = APIRouter()
+
+@router.get("/{symbol}", response_model=IvRank)
+async def iv_rank(
+    symbol: str = Path(..., description="The stock symbol to analyze"),
+    lookback_days: int = Query(252, ge=2, le=2520, description="Trading days of daily IV to rank against"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    IV rank and IV percentile of the latest daily IV over the lookback window.
+    """
+    result = await get_iv_rank_for_symbol(db, symbol, lookback_days)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No IV history for {symbol}")
+    return result
+
+@router.get("/{symbol}/series", response_model=List[IvPoint])
+async def iv_series(
+    symbol: str = Path(..., description="The stock symbol to analyze"),
+    lookback_days: int = Query(252, ge=1, le=2520, description="Trading days of daily IV to return"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Daily (median across contracts) IV series, oldest first.
+    """
+    result = await get_iv_points_for_symbol(db, symbol, lookback_days)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"{symbol} is not on the watchlist")
+    return result
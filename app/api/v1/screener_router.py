@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.adapters.response_models import RegimeLevel, ScreenerRow, ScreenerSort, TrendBias
+from app.db.session import get_async_db
+from app.services.screener_service import screen_watchlist
+from typing import List, Optional
+
+router = APIRouter()
+
+@router.get("/", response_model=List[ScreenerRow])
+async def screener(
+    category: Optional[List[str]] = Query(None, description="Watchlist categories to include"),
+    sector: Optional[List[str]] = Query(None, description="Sectors to include"),
+    industry: Optional[List[str]] = Query(None, description="Industries to include"),
+    asset_class: Optional[List[str]] = Query(None, description="Asset classes to include"),
+    region: Optional[List[str]] = Query(None, description="Regions to include"),
+    trend_bias: Optional[List[TrendBias]] = Query(None, description="Latest trend bias"),
+    regime_level: Optional[List[RegimeLevel]] = Query(None, description="Latest regime, ranked by volatility"),
+    min_iv_rank: Optional[float] = Query(None, ge=0, le=100, description="Minimum IV rank (0-100)"),
+    max_iv_rank: Optional[float] = Query(None, ge=0, le=100, description="Maximum IV rank (0-100)"),
+    sort: ScreenerSort = Query(ScreenerSort.symbol, description="Column to sort on"),
+    descending: bool = Query(False, description="Sort in descending order"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Screen the active watchlist on its attributes and on the precomputed signal snapshots
+    (refreshed by the snapshot job); nothing is recomputed per request.
+    """
+    return await screen_watchlist(
+        db,
+        attributes={"category": category, "sector": sector, "industry": industry,
+                    "asset_class": asset_class, "region": region},
+        trend_bias=[b.value for b in trend_bias] if trend_bias else None,
+        regime_level=[level.value for level in regime_level] if regime_level else None,
+        min_iv_rank=min_iv_rank,
+        max_iv_rank=max_iv_rank,
+        sort=sort.value,
+        descending=descending,
+        limit=limit,
+        offset=offset,
+    )
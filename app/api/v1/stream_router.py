@@ -0,0 +1,39 @@
+import asyncio
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from app.services.signal_hub import signal_hub
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+
+@router.get("/signals", response_class=StreamingResponse)
+async def stream_signals(
+    request: Request,
+    symbols: str = Query(..., description="Comma-separated stock symbols to watch"),
+):
+    """
+    Server-sent events for the given symbols: a `snapshot` event with the current trend
+    bias and regime of each symbol, then a `change` event whenever either flips.
+    """
+    watched = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    queue = signal_hub.subscribe(watched)
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event.event}\ndata: {event.model_dump_json()}\n\n"
+        finally:
+            signal_hub.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,50 @@
-from fastapi import APIRouter, Query
-from app.services.trend_service import get_trend_for_symbol
-from app.adapters.response_models import TrendPoint
-from typing import List
+from fastapi import APIRouter, Query, Request
+from pydantic import TypeAdapter
+from app.api.caching import cached_response
+from app.api.formats import MEDIA_TYPES, ResponseFormat, columnar_serializer, negotiate_format
+from app.api.timeframes import TIMEFRAME_DESCRIPTION, checked_timeframe
+from app.infrastructure.bar_cache import to_utc
+from app.infrastructure.metrics import span
+from app.infrastructure.response_cache import cache_key
+from app.services.trend_service import get_latest_trend_bias, get_trend_for_symbol, get_trend_frame
+from app.adapters.response_models import TrendPoint, TrendSnapshot
+from typing import List, Optional
 
 router = APIRouter()
 
+trend_points = TypeAdapter(List[TrendPoint])
+
 @router.get("/", response_model=List[TrendPoint])
 async def trend_bias(
+    request: Request,
     symbol: str = Query(...),
     start: str = Query(...),
+    end: str = Query(...),
+    timeframe: str = Query("1D", description=TIMEFRAME_DESCRIPTION),
+    format: Optional[ResponseFormat] = Query(None, description="json (rows), columnar (JSON arrays) or arrow (Arrow IPC); defaults to the Accept header")
+):
+    fmt = negotiate_format(request, format)
+    bar = checked_timeframe(timeframe)
+    key = cache_key(endpoint="trend-bias", symbol=symbol.upper(), start=to_utc(start), end=to_utc(end), timeframe=timeframe, format=fmt.value)
+
+    async def build() -> bytes:
+        if fmt == ResponseFormat.json:
+            points = await get_trend_for_symbol(symbol, start, end, timeframe)
+            with span("serialise"):
+                return trend_points.dump_json(points)
+        df = (await get_trend_frame(symbol, start, end, timeframe)).dropna(subset=["trend_bias"])
+        with span("serialise"):
+            return columnar_serializer(fmt)({"date": df["t"], "close": df["close"], "trend_bias": df["trend_bias"]})
+
+    return await cached_response(request, key, end, build, media_type=MEDIA_TYPES[fmt], bar=bar)
+
+@router.get("/latest", response_model=List[TrendSnapshot])
+async def latest_trend_bias(
+    symbols: str = Query(..., description="Comma-separated stock symbols"),
+    start: str = Query(...),
     end: str = Query(...)
 ):
-    return await get_trend_for_symbol(symbol, start, end)
+    """
+    Latest trend bias for each symbol, screened in one vectorised pass.
+    """
+    return await get_latest_trend_bias([s.strip() for s in symbols.split(",") if s.strip()], start, end)
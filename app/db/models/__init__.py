@@ -0,0 +1,9 @@
+# Importing any model imports them all, so relationships between them (e.g.
+# Watchlist.iv_history) always resolve, and alembic sees every table.
+from app.db.models.watchlist import Watchlist
+from app.db.models.iv_history import IvHistory
+from app.db.models.iv_daily import IvDaily
+from app.db.models.signal_snapshot import SignalSnapshot
+from app.db.models.job_task import JobTask
+
+__all__ = ["Watchlist", "IvHistory", "IvDaily", "SignalSnapshot", "JobTask"]
@@ -0,0 +1,22 @@
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, UniqueConstraint
+from app.db.base import Base
+
+class IvDaily(Base):
+    """
+    Daily IV aggregate per symbol, maintained by the ingestion job from IvHistory.
+    """
+    __tablename__ = "ivdaily"
+    __table_args__ = (
+        # also the index used by lookback queries
+        UniqueConstraint("watchlist_id", "date", name="uq_ivdaily_watchlist_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String, index=True, nullable=False)
+    date = Column(DateTime, nullable=False)
+    median_iv = Column(Float, nullable=False)
+    mean_iv = Column(Float, nullable=False)
+    contracts = Column(Integer, nullable=False)
+
+    watchlist_id = Column(Integer, ForeignKey("watchlist.id"), nullable=False)
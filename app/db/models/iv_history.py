@@ -1,10 +1,16 @@
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
 class IvHistory(Base):
     __tablename__ = "ivhistory"
+    __table_args__ = (
+        # one row per contract per day; also the conflict target of the ingestion upsert
+        UniqueConstraint("watchlist_id", "contract_id", "date", name="uq_ivhistory_watchlist_contract_date"),
+        # lookback and max-date queries filter on watchlist_id and sort on date
+        Index("ix_ivhistory_watchlist_date", "watchlist_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String, index=True, nullable=False)
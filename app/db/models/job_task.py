@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
+from app.db.base import Base
+
+class JobTask(Base):
+    """
+    One symbol's share of a scheduled job for one market session. Persisted so a
+    restarted scheduler resumes where it stopped and only failed symbols are retried.
+    """
+    __tablename__ = "jobtask"
+    __table_args__ = (
+        # also the conflict target used when a session's tasks are created
+        UniqueConstraint("job", "session_date", "symbol", name="uq_jobtask_job_session_symbol"),
+        # pending-work query: a job's unfinished tasks of a session
+        Index("ix_jobtask_job_session_status", "job", "session_date", "status"),
+    )
+
+    id            = Column(Integer, primary_key=True, index=True)
+    job           = Column(String,   nullable=False)
+    session_date  = Column(DateTime, nullable=False)
+    symbol        = Column(String,   nullable=False)
+    watchlist_id  = Column(Integer,  nullable=True)
+
+    status        = Column(String,   default="pending", nullable=False)
+    attempts      = Column(Integer,  default=0, nullable=False)
+    last_error    = Column(String,   nullable=True)
+
+    started_at    = Column(DateTime, nullable=True)
+    finished_at   = Column(DateTime, nullable=True)
+    created_at    = Column(DateTime, default=datetime.utcnow, nullable=False)
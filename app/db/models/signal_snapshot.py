@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from app.db.base import Base
+
+class SignalSnapshot(Base):
+    """
+    Latest trend bias, regime and IV rank per watchlist symbol, maintained by the
+    snapshot refresh job so the screener never recomputes signals.
+    """
+    __tablename__ = "signalsnapshot"
+    __table_args__ = (
+        # the usual screen: a trend bias in a given regime
+        Index("ix_signalsnapshot_trend_regime", "trend_bias", "regime_level"),
+    )
+
+    # one row per symbol; also the conflict target of the refresh upsert
+    watchlist_id  = Column(Integer, ForeignKey("watchlist.id"), primary_key=True)
+    symbol        = Column(String,  nullable=False, index=True)
+    as_of         = Column(DateTime, nullable=False)
+    close         = Column(Float,   nullable=False)
+
+    trend_bias    = Column(String,  nullable=True)
+    regime        = Column(Integer, nullable=True)
+    regime_level  = Column(String,  nullable=True, index=True)
+    regime_vol    = Column(Float,   nullable=True)
+    n_regimes     = Column(Integer, nullable=True)
+
+    iv            = Column(Float,   nullable=True)
+    iv_rank       = Column(Float,   nullable=True, index=True)
+    iv_percentile = Column(Float,   nullable=True)
+
+    updated_at    = Column(DateTime, default=datetime.utcnow, nullable=False)
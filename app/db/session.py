@@ -1,4 +1,8 @@
+from typing import AsyncIterator, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 import os
@@ -7,5 +11,75 @@ load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
-engine = create_engine(DATABASE_URL, echo=False)
+# ── async pool settings (API) ────────────────────────────────────
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+# prepared statements kept per asyncpg connection
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '500'))
+
+# The compute endpoints run without a database, so only bind when one is configured
+engine = create_engine(DATABASE_URL, echo=False) if DATABASE_URL else None
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal = async_sessionmaker(expire_on_commit=False, autoflush=False)
+
+
+def get_db():
+    """
+    FastAPI dependency yielding a session that is closed after the request.
+    """
+    with SessionLocal() as db:
+        yield db
+
+
+def async_database_url(url: str) -> str:
+    """
+    Map the sync DATABASE_URL onto its async driver (asyncpg for Postgres).
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg").update_query_dict(
+            {"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)}
+        )
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def init_async_engine() -> Optional[AsyncEngine]:
+    """
+    Create the pooled async engine used by the API. Called from the app lifespan.
+    """
+    global async_engine
+    if async_engine is None and DATABASE_URL:
+        url = async_database_url(DATABASE_URL)
+        pool_args = {} if url.startswith("sqlite") else {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+        }
+        async_engine = create_async_engine(url, echo=False, pool_pre_ping=True, **pool_args)
+        AsyncSessionLocal.configure(bind=async_engine)
+    return async_engine
+
+
+async def dispose_async_engine() -> None:
+    global async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+    async_engine = None
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    FastAPI dependency yielding an async session from the shared pool.
+    """
+    if init_async_engine() is None:
+        raise RuntimeError("DATABASE_URL is not set")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,24 @@
+from typing import List
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def upsert_statement(model, dialect_name: str, index_elements: List[str], update_columns: List[str]):
+    """
+    INSERT ... ON CONFLICT (index_elements) DO UPDATE for the given ORM model.
+    Postgres in production; SQLite shares the same syntax for local runs.
+    """
+    insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+    stmt = insert(model)
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={col: stmt.excluded[col] for col in update_columns},
+    )
+
+
+def insert_missing_statement(model, dialect_name: str, index_elements: List[str]):
+    """
+    INSERT ... ON CONFLICT (index_elements) DO NOTHING for the given ORM model.
+    """
+    insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+    return insert(model).on_conflict_do_nothing(index_elements=index_elements)
@@ -0,0 +1,106 @@
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.domain.market_calendar import MARKET_TZ
+
+
+class FeatureMatrix(NamedTuple):
+    """
+    HMM input: one C-contiguous float64 row per bar that has every feature.
+    """
+    index: pd.DatetimeIndex
+    values: np.ndarray
+    names: tuple
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, index=self.index, columns=list(self.names))
+
+
+def _log_returns(df: pd.DataFrame) -> pd.Series:
+    return np.log(df["close"] / df["close"].shift(1))
+
+
+def _volatility(log_ret: pd.Series, window: int) -> pd.Series:
+    return log_ret.rolling(window).std()
+
+
+def _basic(df: pd.DataFrame, iv: Optional[pd.Series]) -> Dict[str, pd.Series]:
+    # The original model inputs: log return and 20-bar volatility
+    log_ret = _log_returns(df)
+    return {"log_ret": log_ret, "vol": _volatility(log_ret, 20)}
+
+
+def _multi_vol(df: pd.DataFrame, iv: Optional[pd.Series]) -> Dict[str, pd.Series]:
+    log_ret = _log_returns(df)
+    return {"log_ret": log_ret, **{f"vol_{w}": _volatility(log_ret, w) for w in (5, 20, 60)}}
+
+
+def _volume(df: pd.DataFrame, iv: Optional[pd.Series]) -> Dict[str, pd.Series]:
+    features = _basic(df, iv)
+    # Volume relative to its recent average, in logs so spikes do not dominate
+    volume = df["volume"].where(df["volume"] > 0)
+    features["rel_volume"] = np.log(volume / volume.rolling(20).mean())
+    return features
+
+
+def align_daily(index: pd.DatetimeIndex, daily: pd.Series) -> pd.Series:
+    """
+    Value of a daily series (indexed by date) for each bar: the last value on or
+    before the bar's New York trading date.
+    """
+    bar_dates = pd.DataFrame({"date": index.tz_convert(MARKET_TZ).tz_localize(None).normalize()})
+    values = daily.dropna()
+    values.index = pd.DatetimeIndex(values.index).tz_localize(None).normalize()
+    values = values.groupby(level=0).last().rename("value").rename_axis("date").reset_index()
+    aligned = pd.merge_asof(bar_dates, values, on="date", direction="backward")
+    return pd.Series(aligned["value"].to_numpy(), index=index)
+
+
+def _iv(df: pd.DataFrame, iv: Optional[pd.Series]) -> Dict[str, pd.Series]:
+    if iv is None or iv.dropna().empty:
+        raise ValueError("the 'iv' feature set needs an implied volatility series")
+    features = _basic(df, iv)
+    features["iv"] = align_daily(df.index, iv)
+    return features
+
+
+FEATURE_SETS: Dict[str, Callable[[pd.DataFrame, Optional[pd.Series]], Dict[str, pd.Series]]] = {
+    "basic": _basic,
+    "multi_vol": _multi_vol,
+    "volume": _volume,
+    "iv": _iv,
+}
+
+# Bar columns each feature set reads; fits and cached matrices are keyed on all of them
+FEATURE_INPUTS: Dict[str, Tuple[str, ...]] = {
+    "basic": ("close",),
+    "multi_vol": ("close",),
+    "volume": ("close", "volume"),
+    "iv": ("close",),
+}
+
+
+def build_features(df: pd.DataFrame, feature_set: str = "basic", iv: Optional[pd.Series] = None) -> FeatureMatrix:
+    """
+    Build the HMM input matrix for `df` without modifying it.
+
+    Parameters:
+    - df: Bars indexed by datetime; 'close' is always needed, 'volume' for the volume set
+    - feature_set: One of `FEATURE_SETS`
+    - iv: Daily implied volatility indexed by date, for the 'iv' set
+
+    Returns:
+    - FeatureMatrix of the bars where every feature is defined (warm-up rows dropped)
+    """
+    if feature_set not in FEATURE_SETS:
+        raise ValueError(f"unknown feature set: {feature_set!r}")
+
+    columns = FEATURE_SETS[feature_set](df, iv)
+    frame = pd.DataFrame(columns).replace([np.inf, -np.inf], np.nan).dropna()
+    values = np.ascontiguousarray(frame.to_numpy(dtype="float64"))
+    return FeatureMatrix(frame.index, values, tuple(frame.columns))
@@ -1,43 +1,346 @@
+import time
+from typing import List, Optional, Tuple
+
 import numpy as np
 import pandas as pd
 from hmmlearn.hmm import GaussianHMM
+from scipy.stats import multivariate_normal
+
+from app.domain.hmm_features import FeatureMatrix, build_features
+
+PARAM_NAMES = ("startprob", "transmat", "means", "covars")
+# Extra seeds tried when every requested restart fails
+FIT_ATTEMPTS = 3
+# How the fit went; returned with the state so callers in another process can report it
+FIT_STAT_NAMES = ("fit_iterations", "fit_converged", "fit_seconds", "predict_seconds")
+
+def hmm_params(model: GaussianHMM) -> dict:
+    """
+    Extract the fitted parameters needed to rebuild the model without refitting.
+    """
+    return {
+        "startprob": model.startprob_,
+        "transmat": model.transmat_,
+        "means": model.means_,
+        "covars": model.covars_,
+    }
+
+def hmm_from_params(params: dict) -> GaussianHMM:
+    """
+    Rebuild a fitted full-covariance GaussianHMM from `hmm_params` output.
+    """
+    n_components, n_features = params["means"].shape
+    model = GaussianHMM(n_components=n_components, covariance_type='full', init_params='')
+    model.n_features = n_features
+    model.startprob_ = params["startprob"]
+    model.transmat_ = params["transmat"]
+    model.means_ = params["means"]
+    model.covars_ = params["covars"]
+    return model
+
+def _fit_stats(fit: Optional[dict], fit_seconds: float, predict_seconds: float) -> dict:
+    # `fit` is the winning `fit_restart` result, or a warm-start summary; None when not fitted
+    return {
+        "fit_iterations": np.int64(fit["iterations"] if fit is not None else 0),
+        "fit_converged": np.bool_(fit["converged"] if fit is not None else True),
+        "fit_seconds": np.float64(fit_seconds),
+        "predict_seconds": np.float64(predict_seconds),
+    }
+
+def split_fit_stats(state: dict) -> dict:
+    """
+    Remove the fit statistics from a state (so it can be cached) and return them.
+    """
+    return {name: state.pop(name) for name in FIT_STAT_NAMES if name in state}
+
+def forward_filter(params: dict, features: np.ndarray, prior: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Filtered state probabilities P(state_t | obs_1..t) for each row of `features`.
+
+    Parameters:
+    - params: Fitted parameters (see `hmm_params`)
+    - features: (T, n_features) observations to filter
+    - prior: Filtered distribution at the step before `features[0]`; None starts from `startprob`
+
+    Returns:
+    - (T, n_components) array of filtered probabilities
+    """
+    n_components = params["means"].shape[0]
+    log_lik = np.column_stack([
+        multivariate_normal.logpdf(features, mean=params["means"][k], cov=params["covars"][k], allow_singular=True)
+        for k in range(n_components)
+    ]).reshape(len(features), n_components)
+
+    predicted = params["startprob"] if prior is None else prior @ params["transmat"]
+    filtered = np.empty_like(log_lik)
+    for t in range(len(features)):
+        alpha = predicted * np.exp(log_lik[t] - log_lik[t].max())
+        filtered[t] = alpha / alpha.sum()
+        predicted = filtered[t] @ params["transmat"]
+    return filtered
+
+def canonical_order(params: dict) -> np.ndarray:
+    """
+    Relabelling that sorts states by the variance of their log returns, so regime 0 is
+    always the calmest one whatever order EM found the states in.
+
+    Returns:
+    - array `rank` where `rank[state]` is the canonical label of `state`
+    """
+    rank = np.empty(len(params["covars"]), dtype=np.int64)
+    rank[np.argsort(params["covars"][:, 0, 0], kind="stable")] = np.arange(len(rank))
+    return rank
+
+def canonical_params(params: dict) -> dict:
+    """
+    The same model with its states renumbered in `canonical_order`, so equivalent fits
+    number their regimes the same way whichever seed or worker found them.
+    """
+    order = np.argsort(params["covars"][:, 0, 0], kind="stable")
+    return {
+        "startprob": params["startprob"][order],
+        "transmat": params["transmat"][np.ix_(order, order)],
+        "means": params["means"][order],
+        "covars": params["covars"][order],
+    }
+
+def floor_covars(model: GaussianHMM) -> None:
+    """
+    Make the fitted covariances of `model` symmetric positive-definite in place.
+
+    EM can collapse a state onto a few bars and leave its covariance singular; such
+    states get `min_covar` added to the diagonal, the way hmmlearn's own scoring does,
+    so the parameters can be stored, rebuilt and decoded.
+    Raises ValueError (or LinAlgError) when the covariances cannot be repaired.
+    """
+    covars = (model.covars_ + model.covars_.transpose(0, 2, 1)) / 2
+    singular = np.linalg.eigvalsh(covars)[:, 0] <= 0
+    covars[singular] += model.min_covar * np.eye(covars.shape[1])
+    model.covars_ = covars
+
+def fit_restart(features: np.ndarray, n_components: int, seed: int, n_iter: int = 1000) -> Optional[dict]:
+    """
+    One seeded EM run on `features`; deterministic for a given seed. Runs in the process pool.
+
+    Returns:
+    - dict with canonical 'params', 'log_likelihood', 'converged', 'iterations' and
+      'fit_seconds', or None when the fit failed
+    """
+    t0 = time.perf_counter()
+    model = GaussianHMM(n_components=n_components, covariance_type='full', n_iter=n_iter, random_state=seed)
+    try:
+        model.fit(features)
+        floor_covars(model)
+        log_likelihood = model.score(features)
+    except (ValueError, np.linalg.LinAlgError):
+        return None
+    if not np.isfinite(log_likelihood):
+        return None
+    return {
+        "params": canonical_params(hmm_params(model)),
+        "log_likelihood": float(log_likelihood),
+        "converged": bool(model.monitor_.converged),
+        "iterations": int(model.monitor_.iter),
+        "fit_seconds": time.perf_counter() - t0,
+    }
 
-def compute_hmm(df: pd.DataFrame, n_components: int = 3) -> pd.DataFrame:
+def best_restart(fits: List[Optional[dict]]) -> Optional[dict]:
+    """
+    The `fit_restart` result with the highest log-likelihood (the lowest seed on ties), if any.
+    """
+    ok = [fit for fit in fits if fit is not None]
+    return max(ok, key=lambda fit: fit["log_likelihood"]) if ok else None
+
+def fit_best(features: np.ndarray, n_components: int, restarts: int = 1, random_state: int = 0) -> dict:
+    """
+    Best of `restarts` seeded fits (seeds `random_state`, `random_state + 1`, ...).
+    When all of them fail, up to `FIT_ATTEMPTS` further seeds are tried one by one.
+    """
+    best = best_restart([fit_restart(features, n_components, random_state + i) for i in range(restarts)])
+    for seed in range(random_state + restarts, random_state + restarts + FIT_ATTEMPTS):
+        if best is not None:
+            break
+        best = fit_restart(features, n_components, seed)
+    if best is None:
+        raise ValueError(f"every {n_components}-state fit failed; try fewer components or a longer window")
+    return best
+
+def _label_frame(df: pd.DataFrame, index: pd.DatetimeIndex, hidden_states: np.ndarray,
+                 posteriors: np.ndarray) -> pd.DataFrame:
+    # Insert regime and state probability columns back into a copy of the original DataFrame
+    df = df[['close']].copy()
+    df['regime'] = np.nan
+    df.loc[index, 'regime'] = hidden_states
+    prob_columns = [f"p_{k}" for k in range(posteriors.shape[1])]
+    df = df.join(pd.DataFrame(posteriors, index=index, columns=prob_columns))
+
+    # Final cleanup: convert to output format
+    df = df.reset_index().dropna(subset=['regime'])
+    df['regime'] = df['regime'].astype(int)
+
+    return df[['t', 'close', 'regime', *prob_columns]]
+
+def compute_hmm(df: pd.DataFrame, n_components: int = 3, params: Optional[dict] = None,
+                features: Optional[FeatureMatrix] = None, restarts: int = 1, random_state: int = 0) -> pd.DataFrame:
     """
     Fits an HMM to log returns and volatility features and returns the DataFrame
-    with predicted market regime labels.
+    with predicted market regime labels. `df` is not modified.
+
+    Fitting is deterministic: `restarts` seeded EM runs, the best log-likelihood wins, and
+    the states are numbered by volatility (regime 0 is the calmest).
     
     Parameters:
     - df: DataFrame with 'close' price indexed by datetime
     - n_components: Number of regimes to detect
+    - params: Previously fitted parameters (see `hmm_params`); when given, the fit is skipped
+    - features: Precomputed `build_features(df, ...)` output; defaults to the basic set
+    - restarts: Seeded EM runs to pick the best fit from
+    - random_state: Seed of the first run
     
     Returns:
-    - DataFrame with ['t', 'close', 'regime'] columns
+    - DataFrame with ['t', 'close', 'regime'] columns, plus the per-bar posterior
+      probability of each regime as 'p_0' ... 'p_{n_components - 1}'
     """
+    labeled, _ = compute_hmm_with_params(df, n_components, params, features, restarts, random_state)
+    return labeled
 
-    # Step 1: Calculate log returns
-    df['log_ret'] = np.log(df['close'] / df['close'].shift(1))
+def compute_hmm_with_params(df: pd.DataFrame, n_components: int = 3, params: Optional[dict] = None,
+                            features: Optional[FeatureMatrix] = None, restarts: int = 1,
+                            random_state: int = 0) -> Tuple[pd.DataFrame, dict]:
+    """
+    Same as `compute_hmm`, but also returns the model state so callers can cache it.
 
-    # Step 2: Calculate rolling volatility (20-day standard deviation of returns)
-    df['vol'] = df['log_ret'].rolling(20).std()
+    The state holds the fitted parameters plus what `update_hmm` needs to extend the
+    labelling later: the decoded labels, their posteriors, the filtered distribution at
+    the last bar and the number of bars the model has seen.
+    """
+    if features is None:
+        features = build_features(df)
+    X = features.values
 
-    # Step 3: Drop rows with NaNs from rolling calculations
-    features = df[['log_ret', 'vol']].dropna()
+    # Fit the HMM model, or rebuild it from cached parameters
+    t0 = time.perf_counter()
+    if params is None:
+        best = fit_best(X, n_components, restarts, random_state)
+        params = best["params"]
+    else:
+        best = None
+    model = hmm_from_params(canonical_params(params))
+    t1 = time.perf_counter()
 
-    # Step 4: Fit the HMM model
-    model = GaussianHMM(n_components=n_components, covariance_type='full', n_iter=1000)
-    model.fit(features)
+    # Predict regime labels and their smoothed posteriors
+    hidden_states = model.predict(X)
+    posteriors = model.predict_proba(X)
 
-    # Step 5: Predict regime labels
-    hidden_states = model.predict(features)
+    state = hmm_params(model)
+    state["labels"] = hidden_states
+    state["posteriors"] = posteriors
+    # At the last step the smoothed posterior equals the filtered one
+    state["filtered"] = posteriors[-1]
+    state["n_bars"] = np.int64(len(df))
+    state.update(_fit_stats(best, t1 - t0, time.perf_counter() - t1))
 
-    # Step 6: Insert regime column back into original DataFrame
-    df = df.copy()
-    df['regime'] = np.nan
-    df.loc[features.index, 'regime'] = hidden_states
+    return _label_frame(df, features.index, hidden_states, posteriors), state
 
-    # Step 7: Final cleanup: convert to output format
-    df = df.reset_index().dropna(subset=['regime'])
-    df['regime'] = df['regime'].astype(int)
+def update_hmm(df: pd.DataFrame, state: dict, n_iter: int = 10,
+               features: Optional[FeatureMatrix] = None) -> Tuple[pd.DataFrame, dict]:
+    """
+    Extend a previous fit to bars appended after it, without refitting from scratch.
+
+    EM is warm-started from the previous parameters with a small iteration budget,
+    which also keeps the state numbering stable. Only the new tail is decoded, with a
+    forward-filter update from the last filtered distribution; earlier labels and their
+    posteriors are kept (the new bars get filtered probabilities). Should EM reorder the
+    states by volatility, the kept labels are renumbered to stay canonical.
+
+    Parameters:
+    - df: DataFrame with 'close' price indexed by datetime; its first `state["n_bars"]`
+      rows must be the bars the previous state was fitted on
+    - state: State returned by `compute_hmm_with_params` or a previous `update_hmm`
+    - n_iter: EM iterations for the warm start
+    - features: `build_features(df, ...)` output of the feature set the state was fitted on;
+      defaults to the basic set
+
+    Returns:
+    - DataFrame as returned by `compute_hmm` and the updated state
+
+    Raises ValueError when the warm-started EM fails (e.g. a state collapsed beyond
+    repair); callers should fit from scratch instead.
+    """
+    if features is None:
+        features = build_features(df)
+    n_seen = len(state["labels"])
+    previous = hmm_from_params(state)
+    # States cached before posteriors were kept: recover them from the previous fit
+    seen_posteriors = state["posteriors"] if "posteriors" in state else previous.predict_proba(features.values[:n_seen])
+
+    t0 = time.perf_counter()
+    model = hmm_from_params(state)
+    model.n_iter = n_iter
+    try:
+        model.fit(features.values)
+        floor_covars(model)
+    except np.linalg.LinAlgError as e:
+        raise ValueError(f"warm-start fit failed: {e}") from e
+    fitted = hmm_params(model)
+    rank = canonical_order(fitted)
+    order = np.argsort(rank)
+    params = canonical_params(fitted)
+    t1 = time.perf_counter()
+
+    tail = features.values[n_seen:]
+    prior = np.asarray(state["filtered"])[order]
+    filtered = forward_filter(params, tail, prior=prior) if len(tail) else prior[None, :]
+    hidden_states = np.concatenate([rank[state["labels"]], filtered.argmax(axis=1)[:len(tail)]])
+    posteriors = np.concatenate([np.asarray(seen_posteriors)[:, order], filtered[:len(tail)]])
+
+    new_state = dict(params)
+    new_state["labels"] = hidden_states
+    new_state["posteriors"] = posteriors
+    new_state["filtered"] = filtered[-1]
+    new_state["n_bars"] = np.int64(len(df))
+    new_state.update(_fit_stats({"iterations": model.monitor_.iter, "converged": model.monitor_.converged},
+                                t1 - t0, time.perf_counter() - t1))
+
+    return _label_frame(df, features.index, hidden_states, posteriors), new_state
+
+class RegimeTracker:
+    """
+    Online regime label for one symbol from an existing fit: each new bar costs one
+    forward-filter step on the same log-return / 20-bar volatility features.
+
+    A bar with the same timestamp as the last one replaces it (live, still-forming bar).
+    """
+
+    VOL_WINDOW = 20
+
+    def __init__(self, state: dict, closes: pd.Series):
+        """
+        Parameters:
+        - state: State from `compute_hmm_with_params` / `update_hmm` fitted on bars ending with `closes`
+        - closes: The fitted bars' closes indexed by datetime (only the tail is kept)
+        """
+        self.params = {name: state[name] for name in PARAM_NAMES}
+        self.filtered = np.asarray(state["filtered"])
+        self.regime = int(np.argmax(self.filtered))
+        self.last_time = closes.index[-1]
+        self._closes = list(closes.to_numpy(dtype="float64")[-(self.VOL_WINDOW + 1):])
+        self._before_last = None
+
+    def push(self, t: pd.Timestamp, close: float) -> Optional[int]:
+        if t == self.last_time and self._before_last is not None:
+            self._closes, self.filtered = self._before_last
+        elif t <= self.last_time:
+            raise ValueError(f"bar at {t} is not newer than the last bar at {self.last_time}")
+
+        self._before_last = (list(self._closes), self.filtered)
+        self._closes = (self._closes + [float(close)])[-(self.VOL_WINDOW + 1):]
+        self.last_time = t
 
-    return df[['t', 'close', 'regime']]
+        log_ret = np.diff(np.log(self._closes))
+        if len(log_ret) < self.VOL_WINDOW:
+            return None
+        features = np.array([[log_ret[-1], log_ret.std(ddof=1)]])
+        self.filtered = forward_filter(self.params, features, prior=self.filtered)[-1]
+        self.regime = int(np.argmax(self.filtered))
+        return self.regime
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+def compute_iv_rank(iv: pd.Series) -> dict:
+    """
+    IV rank and IV percentile of the latest value against the whole series.
+
+    Parameters:
+    - iv: Daily IV values indexed by date (oldest first)
+
+    Returns:
+    - dict with 'date', 'iv', 'iv_rank' and 'iv_percentile' (both 0-100)
+      - iv_rank: where today's IV sits between the period low and high
+      - iv_percentile: share of prior days with an IV below today's
+    """
+    values = iv.dropna()
+    if values.empty:
+        raise ValueError("IV series is empty")
+
+    current = float(values.iloc[-1])
+    low, high = float(values.min()), float(values.max())
+    iv_rank = 100.0 * (current - low) / (high - low) if high > low else 0.0
+
+    history = values.to_numpy()[:-1]
+    iv_percentile = 100.0 * float(np.mean(history < current)) if len(history) else 0.0
+
+    return {"date": values.index[-1], "iv": current, "iv_rank": iv_rank, "iv_percentile": iv_percentile}
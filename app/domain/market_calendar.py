@@ -0,0 +1,34 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE = time(16, 0)
+
+def market_today(now: datetime) -> date:
+    """
+    Current trading-calendar date (New York) for an aware `now`.
+    """
+    return now.astimezone(MARKET_TZ).date()
+
+def next_market_close(now: datetime) -> datetime:
+    """
+    The next weekday 16:00 New York close strictly after `now`.
+    Exchange holidays are not modelled; a 'close' on a holiday just comes early.
+    """
+    day = market_today(now)
+    while True:
+        close = datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ)
+        if close > now and day.weekday() < 5:
+            return close
+        day += timedelta(days=1)
+
+def last_market_close(now: datetime) -> datetime:
+    """
+    The latest weekday 16:00 New York close at or before `now`.
+    """
+    day = market_today(now)
+    while True:
+        close = datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ)
+        if close <= now and day.weekday() < 5:
+            return close
+        day -= timedelta(days=1)
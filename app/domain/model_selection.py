@@ -0,0 +1,55 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.domain.hmm_model import best_restart
+
+CRITERIA = ("bic", "aic", "log_likelihood")
+
+def n_parameters(n_components: int, n_features: int) -> int:
+    """
+    Free parameters of a full-covariance Gaussian HMM: start probabilities, transition
+    rows, means and the lower triangle of each covariance matrix.
+    """
+    k, d = n_components, n_features
+    return (k - 1) + k * (k - 1) + k * d + k * d * (d + 1) // 2
+
+def score_fits(fits: Dict[int, List[Optional[dict]]], n_obs: int, n_features: int) -> List[dict]:
+    """
+    Keep the best restart of each component count and score it.
+
+    Parameters:
+    - fits: component count -> `hmm_model.fit_restart` results of its restarts
+    - n_obs, n_features: Shape of the feature matrix the fits ran on
+
+    Returns:
+    - one dict per component count with 'components', 'log_likelihood', 'aic', 'bic',
+      'n_parameters', 'restarts', 'failed_restarts', 'converged' and the winning 'params'
+      (None scores when every restart failed)
+    """
+    scores = []
+    for n_components, results in sorted(fits.items()):
+        best = best_restart(results)
+        failed = sum(r is None for r in results)
+        p = n_parameters(n_components, n_features)
+        row = {"components": n_components, "n_parameters": p, "restarts": len(results),
+               "failed_restarts": failed, "log_likelihood": None, "aic": None,
+               "bic": None, "converged": None, "params": None}
+        if best is not None:
+            ll = best["log_likelihood"]
+            row.update(log_likelihood=ll, aic=2 * p - 2 * ll, bic=p * np.log(n_obs) - 2 * ll,
+                       converged=best["converged"], params=best["params"])
+        scores.append(row)
+    return scores
+
+def best_components(scores: List[dict], criterion: str = "bic") -> dict:
+    """
+    The scored candidate that wins `criterion` (lowest BIC / AIC, highest log-likelihood).
+    """
+    if criterion not in CRITERIA:
+        raise ValueError(f"unknown criterion: {criterion!r}")
+    candidates = [s for s in scores if s["params"] is not None]
+    if not candidates:
+        raise ValueError("every fit failed; try fewer components or a longer window")
+    sign = -1 if criterion == "log_likelihood" else 1
+    return min(candidates, key=lambda s: (sign * s[criterion], s["components"]))
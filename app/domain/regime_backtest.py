@@ -0,0 +1,95 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.domain.hmm_features import build_features
+from app.domain.hmm_model import fit_best, forward_filter
+
+# (train_start, test_start, test_end) row offsets into the feature matrix
+Window = Tuple[int, int, int]
+
+def walk_forward_windows(n_rows: int, train_size: int, test_size: int, expanding: bool = False) -> List[Window]:
+    """
+    Split `n_rows` feature rows into walk-forward windows.
+
+    Each window trains on `train_size` rows (or on everything so far when `expanding`)
+    and is evaluated on the next `test_size` rows; test segments are consecutive and
+    never overlap, the last one may be shorter.
+    """
+    if train_size < 1 or test_size < 1:
+        raise ValueError("train_size and test_size must be positive")
+    windows = []
+    for test_start in range(train_size, n_rows, test_size):
+        train_start = 0 if expanding else test_start - train_size
+        windows.append((train_start, test_start, min(test_start + test_size, n_rows)))
+    return windows
+
+def fit_window(features: np.ndarray, window: Window, n_components: int, random_state: int = 0) -> np.ndarray:
+    """
+    Fit on the window's training rows and label its test rows out of sample.
+
+    The test rows are labelled by forward filtering from the end of the training
+    segment, so the label at a bar only uses observations up to that bar.
+
+    Returns:
+    - canonical regime labels for `features[test_start:test_end]`
+    """
+    train_start, test_start, test_end = window
+    train = features[train_start:test_start]
+
+    # canonical parameters, so the labels are already ordered by volatility
+    params = fit_best(train, n_components, random_state=random_state)["params"]
+    prior = forward_filter(params, train)[-1]
+    filtered = forward_filter(params, features[test_start:test_end], prior=prior)
+    return filtered.argmax(axis=1)
+
+def backtest_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Feature rows used by the walk-forward engine: the same ones as `compute_hmm`.
+    """
+    return build_features(df).frame()
+
+def label_out_of_sample(df: pd.DataFrame, features: pd.DataFrame, windows: List[Window], labels: List[np.ndarray]) -> pd.DataFrame:
+    """
+    Assemble the per-window test labels into a ['t', 'close', 'regime'] frame,
+    with the next bar's log return as 'forward_return' (NaN on the last bar).
+    """
+    index = features.index[windows[0][1]:windows[-1][2]]
+    out = df.loc[index, ["close"]].copy()
+    out["regime"] = np.concatenate(labels).astype(int)
+    out["forward_return"] = np.log(df["close"].shift(-1) / df["close"]).loc[index]
+    return out.reset_index()[["t", "close", "regime", "forward_return"]]
+
+def regime_stats(labeled: pd.DataFrame, n_components: int, periods_per_year: int = 252) -> pd.DataFrame:
+    """
+    Out-of-sample statistics per regime, from the return of the bar after each label.
+
+    Returns:
+    - DataFrame with one row per regime: ['regime', 'bars', 'share', 'mean_return',
+      'volatility', 'sharpe', 'avg_duration']; returns are annualised
+    """
+    regimes = labeled["regime"].to_numpy()
+    returns = labeled["forward_return"].to_numpy(dtype="float64")
+
+    # Lengths of consecutive runs of the same label
+    run_starts = np.flatnonzero(np.r_[True, regimes[1:] != regimes[:-1]])
+    run_lengths = np.diff(np.r_[run_starts, len(regimes)])
+    run_labels = regimes[run_starts]
+
+    rows = []
+    for regime in range(n_components):
+        r = returns[(regimes == regime) & ~np.isnan(returns)]
+        mean = r.mean() * periods_per_year if len(r) else np.nan
+        vol = r.std(ddof=1) * np.sqrt(periods_per_year) if len(r) > 1 else np.nan
+        runs = run_lengths[run_labels == regime]
+        rows.append({
+            "regime": regime,
+            "bars": int((regimes == regime).sum()),
+            "share": float((regimes == regime).mean()) if len(regimes) else 0.0,
+            "mean_return": mean,
+            "volatility": vol,
+            "sharpe": mean / vol if vol and not np.isnan(vol) else np.nan,
+            "avg_duration": runs.mean() if len(runs) else np.nan,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,99 @@
+import re
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.domain.market_calendar import MARKET_TZ
+
+# Alpaca timeframe units and their aliases
+_UNITS = {"Min": "Min", "T": "Min", "Hour": "Hour", "H": "Hour", "Day": "Day", "D": "Day",
+          "Week": "Week", "W": "Week", "Month": "Month", "M": "Month"}
+_UNIT_NS = {"Min": 60 * 10**9, "Hour": 3600 * 10**9}
+
+# Series every timeframe is resampled from: minutes for intraday bars, days above that
+INTRADAY_BASE = "1Min"
+DAILY_BASE = "1D"
+
+def parse_timeframe(timeframe: str) -> Tuple[int, str]:
+    """
+    Split an Alpaca timeframe such as '5Min', '1H' or '1Day' into (amount, unit).
+    """
+    match = re.fullmatch(r"(\d+)([A-Za-z]+)", timeframe)
+    if not match or match.group(2) not in _UNITS or int(match.group(1)) < 1:
+        raise ValueError(f"unsupported timeframe: {timeframe!r}")
+    return int(match.group(1)), _UNITS[match.group(2)]
+
+def base_timeframe(timeframe: str) -> str:
+    """
+    The stored base series `timeframe` is built from.
+    """
+    _, unit = parse_timeframe(timeframe)
+    return INTRADAY_BASE if unit in _UNIT_NS else DAILY_BASE
+
+def intraday_span(timeframe: str) -> Optional[pd.Timedelta]:
+    """
+    Length of one `timeframe` bar, or None for daily and longer bars.
+    """
+    amount, unit = parse_timeframe(timeframe)
+    return pd.Timedelta(amount * _UNIT_NS[unit], unit="ns") if unit in _UNIT_NS else None
+
+def is_base(timeframe: str) -> bool:
+    return parse_timeframe(timeframe) == parse_timeframe(base_timeframe(timeframe))
+
+def _bucket_keys(index: pd.DatetimeIndex, amount: int, unit: str) -> np.ndarray:
+    if unit in _UNIT_NS:
+        # Intraday buckets are aligned on the UTC clock, like Alpaca's
+        step = amount * _UNIT_NS[unit]
+        return index.asi8 // step * step
+
+    # Daily and longer buckets follow New York trading dates
+    local = index.tz_convert(MARKET_TZ)
+    if unit == "Day":
+        return (local.normalize().tz_localize(None).asi8 // (86400 * 10**9)) // amount
+    if unit == "Week":
+        return local.tz_localize(None).to_period("W-SUN").asi8 // amount
+    return (local.year.to_numpy() * 12 + local.month.to_numpy() - 1) // amount
+
+def resample_bars(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregate bars into coarser `timeframe` bars in one vectorised pass.
+
+    open/close take the first/last bar, high/low the extremes, volume and trade_count
+    are summed and vwap is volume-weighted. Intraday bars are stamped with the bucket
+    start, daily and longer ones with their first bar, as Alpaca does.
+
+    Parameters:
+    - df: Sorted bars with the `BAR_COLUMNS` columns, indexed by UTC datetime
+    - timeframe: Target Alpaca timeframe, coarser than the bars in `df`
+
+    Returns:
+    - DataFrame with the same columns, one row per non-empty bucket
+    """
+    if df.empty:
+        return df
+
+    amount, unit = parse_timeframe(timeframe)
+    keys = _bucket_keys(df.index, amount, unit)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    column = lambda name: df[name].to_numpy(dtype="float64")
+    volume = np.add.reduceat(column("volume"), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vwap = np.add.reduceat(column("vwap") * column("volume"), starts) / volume
+
+    if unit in _UNIT_NS:
+        index = pd.DatetimeIndex(pd.to_datetime(keys[starts], unit="ns", utc=True), name=df.index.name)
+    else:
+        index = df.index[starts]
+
+    return pd.DataFrame({
+        "open": column("open")[starts],
+        "high": np.maximum.reduceat(column("high"), starts),
+        "low": np.minimum.reduceat(column("low"), starts),
+        "close": column("close")[ends],
+        "volume": volume,
+        "trade_count": np.add.reduceat(column("trade_count"), starts),
+        "vwap": vwap,
+    }, index=index)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+REGIME_LEVELS = ("low_vol", "mid_vol", "high_vol")
+
+def regime_level(regime: int, n_components: int) -> str:
+    """
+    Name of a canonical regime: the calmest is 'low_vol', the most volatile 'high_vol',
+    anything in between 'mid_vol'.
+    """
+    if regime == 0:
+        return "low_vol"
+    return "high_vol" if regime == n_components - 1 else "mid_vol"
+
+def regime_snapshot(labeled_df: pd.DataFrame, params: dict, periods_per_year: int = 252) -> dict:
+    """
+    Regime of the last labeled bar, in the canonical numbering so it is comparable across symbols.
+
+    Parameters:
+    - labeled_df: `compute_hmm` output
+    - params: The fitted parameters `labeled_df` was decoded with (see `hmm_params`)
+    - periods_per_year: Bars per year, to annualise the regime volatility
+
+    Returns:
+    - dict with 'regime' (canonical, 0 = calmest), 'regime_level' (see `regime_level`),
+      'regime_vol' (annualised volatility of the regime's log returns) and 'n_regimes'
+    """
+    n_components = len(params["means"])
+    regime = int(labeled_df["regime"].iloc[-1])
+    return {
+        "regime": regime,
+        "regime_level": regime_level(regime, n_components),
+        "regime_vol": float(np.sqrt(params["covars"][regime, 0, 0] * periods_per_year)),
+        "n_regimes": n_components,
+    }
@@ -1,4 +1,7 @@
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
 
 def compute_ema(df: pd.DataFrame, period: int, column="close", name=None):
     col_name = name or f"ema_{period}"
@@ -25,3 +28,63 @@ def compute_trend_bias(df: pd.DataFrame, short_ema=21, long_ema=50, rsi_threshol
     df.loc[(df[f"ema_{short_ema}"] < df[f"ema_{long_ema}"]) & (df["rsi"] < rsi_threshold), "trend_bias"] = "bearish"
 
     return df.reset_index()
+
+# Compact bias codes used by the matrix kernel
+BIAS_BEARISH, BIAS_NEUTRAL, BIAS_BULLISH = -1, 0, 1
+BIAS_LABELS = {BIAS_BEARISH: "bearish", BIAS_NEUTRAL: "neutral", BIAS_BULLISH: "bullish"}
+
+def ema_matrix(closes: np.ndarray, period: int) -> np.ndarray:
+    """
+    EMA (adjust=False) down every column of a (dates x symbols) matrix in one pass.
+    Leading NaNs (symbols with shorter history) stay NaN; interior gaps carry the last close.
+    """
+    alpha = 2.0 / (period + 1.0)
+    valid = ~np.isnan(closes)
+    started = np.maximum.accumulate(valid, axis=0)
+
+    filled = pd.DataFrame(closes).ffill().bfill().to_numpy()
+    # zi seeds the filter so that the first output equals the first close, as pandas does
+    zi = (1 - alpha) * filled[:1]
+    ema, _ = lfilter([alpha], [1.0, alpha - 1.0], filled, axis=0, zi=zi)
+    ema[~started] = np.nan
+    return ema
+
+def rsi_matrix(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Rolling-mean RSI down every column of a (dates x symbols) matrix, matching `compute_rsi`.
+    """
+    delta = np.full_like(closes, np.nan)
+    delta[1:] = np.diff(closes, axis=0)
+    up = np.clip(delta, 0, None)
+    down = -np.clip(delta, None, 0)
+
+    gain = np.full_like(closes, np.nan)
+    loss = np.full_like(closes, np.nan)
+    if len(closes) >= period:
+        gain[period - 1:] = sliding_window_view(up, period, axis=0).mean(axis=-1)
+        loss[period - 1:] = sliding_window_view(down, period, axis=0).mean(axis=-1)
+
+    rs = gain / (loss + 1e-10)
+    return 100 - (100 / (1 + rs))
+
+def compute_trend_bias_matrix(closes: np.ndarray, short_ema=21, long_ema=50, rsi_threshold=50) -> dict:
+    """
+    Batched `compute_trend_bias` over an aligned (dates x symbols) close matrix.
+
+    Parameters:
+    - closes: float64 array, one column per symbol; NaN where a symbol has no bar
+
+    Returns:
+    - dict with 'ema_short', 'ema_long', 'rsi' float arrays and 'bias' int8 codes
+      (see BIAS_LABELS), all shaped like `closes`
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    ema_short = ema_matrix(closes, short_ema)
+    ema_long = ema_matrix(closes, long_ema)
+    rsi = rsi_matrix(closes)
+
+    bias = np.zeros(closes.shape, dtype=np.int8)
+    bias[(ema_short > ema_long) & (rsi > rsi_threshold)] = BIAS_BULLISH
+    bias[(ema_short < ema_long) & (rsi < rsi_threshold)] = BIAS_BEARISH
+
+    return {"ema_short": ema_short, "ema_long": ema_long, "rsi": rsi, "bias": bias}
@@ -0,0 +1,217 @@
+import copy
+import math
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class _Ema:
+    """
+    Online equivalent of ``Series.ewm(span=period, adjust=False).mean()``,
+    using the same update formula so results match bit for bit.
+    """
+
+    def __init__(self, period: int):
+        self.alpha = 2.0 / (period + 1.0)
+        self.value = math.nan
+
+    def update(self, x: float) -> float:
+        if math.isnan(self.value):
+            self.value = x
+        elif self.value != x:
+            old_wt = 1.0 - self.alpha
+            self.value = (old_wt * self.value + self.alpha * x) / (old_wt + self.alpha)
+        return self.value
+
+
+class _RollingMean:
+    """
+    Online equivalent of ``Series.rolling(period).mean()``: a Kahan-compensated
+    running sum over a fixed window, mirroring pandas' add/remove steps.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window: deque = deque()
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.compensation = 0.0
+        self.same_run = 0
+        self.prev_value = math.nan
+
+    def _add(self, val: float) -> None:
+        if val != val:
+            return
+        self.nobs += 1
+        y = val - self.compensation
+        t = self.sum_x + y
+        self.compensation = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+        self.same_run = self.same_run + 1 if val == self.prev_value else 1
+        self.prev_value = val
+
+    def _remove(self, val: float) -> None:
+        if val != val:
+            return
+        self.nobs -= 1
+        y = -val - self.compensation
+        t = self.sum_x + y
+        self.compensation = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+    def update(self, val: float) -> float:
+        self.window.append(val)
+        if len(self.window) > self.period:
+            self._remove(self.window.popleft())
+        self._add(val)
+
+        if self.nobs < self.period:
+            return math.nan
+        result = self.sum_x / self.nobs
+        if self.same_run >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class TrendState:
+    """
+    Constant-time, per-bar version of `compute_trend_bias`.
+
+    Holds both EMAs, the RSI gain/loss windows and the last bias label; each call to
+    `update` consumes one close and produces the same values as the batch version.
+    """
+
+    def __init__(self, short_ema: int = 21, long_ema: int = 50, rsi_threshold: float = 50, rsi_period: int = 14):
+        self.short_ema = short_ema
+        self.long_ema = long_ema
+        self.rsi_threshold = rsi_threshold
+        self._ema_short = _Ema(short_ema)
+        self._ema_long = _Ema(long_ema)
+        self._gain = _RollingMean(rsi_period)
+        self._loss = _RollingMean(rsi_period)
+        self._prev_close = math.nan
+        self.bias: Optional[str] = None
+
+    def update(self, close: float) -> tuple:
+        """
+        Consume one close. Returns (ema_short, ema_long, rsi, trend_bias).
+        """
+        close = float(close)
+        ema_short = self._ema_short.update(close)
+        ema_long = self._ema_long.update(close)
+
+        delta = close - self._prev_close
+        self._prev_close = close
+        # Same signed zeros as delta.clip(lower=0) / -delta.clip(upper=0)
+        up = delta if delta != delta else max(delta, 0.0)
+        down = delta if delta != delta else -min(delta, 0.0)
+        gain = self._gain.update(up)
+        loss = self._loss.update(down)
+        rs = gain / (loss + 1e-10)
+        rsi = 100 - (100 / (1 + rs))
+
+        if ema_short > ema_long and rsi > self.rsi_threshold:
+            self.bias = "bullish"
+        elif ema_short < ema_long and rsi < self.rsi_threshold:
+            self.bias = "bearish"
+        else:
+            self.bias = "neutral"
+        return ema_short, ema_long, rsi, self.bias
+
+    def copy(self) -> "TrendState":
+        return copy.deepcopy(self)
+
+
+class TrendTracker:
+    """
+    Trend bias for one symbol's bar series, updated one bar at a time.
+
+    Keeps the emitted rows so the full series can be served, and a snapshot of the
+    state before the last bar so a live, still-forming bar can be revised in place.
+    """
+
+    def __init__(self, short_ema: int = 21, long_ema: int = 50, rsi_threshold: float = 50):
+        self.short_ema = short_ema
+        self.long_ema = long_ema
+        self._state = TrendState(short_ema, long_ema, rsi_threshold)
+        self._before_last: Optional[TrendState] = None
+        self.times: List[pd.Timestamp] = []
+        self.rows: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def bias(self) -> Optional[str]:
+        return self._state.bias
+
+    def push(self, t: pd.Timestamp, close: float) -> str:
+        """
+        Add the bar at `t`. A bar with the same timestamp as the last one replaces it.
+        """
+        return self._push(t, close, revisable=True)
+
+    def _push(self, t: pd.Timestamp, close: float, revisable: bool) -> str:
+        if self.times and t == self.times[-1]:
+            if self._before_last is None:
+                raise ValueError(f"bar at {t} cannot be revised")
+            self._state = self._before_last
+            self.times.pop()
+            self.rows.pop()
+        elif self.times and t < self.times[-1]:
+            raise ValueError(f"bar at {t} is older than the last bar at {self.times[-1]}")
+
+        # Snapshotting the state is the expensive part, so only the last bar pays for it
+        self._before_last = self._state.copy() if revisable else None
+        ema_short, ema_long, rsi, bias = self._state.update(close)
+        self.times.append(t)
+        self.rows.append((float(close), ema_short, ema_long, rsi, bias))
+        return bias
+
+    def trim(self, keep: int = 1) -> None:
+        """
+        Forget all but the last `keep` emitted rows (at least one). The indicator state is
+        untouched, so new bars and revisions of the last one work as before; `frame` and
+        `common_prefix` only see the kept rows.
+        """
+        keep = max(keep, 1)
+        del self.times[:-keep]
+        del self.rows[:-keep]
+
+    def extend(self, df: pd.DataFrame) -> None:
+        closes = df["close"].to_numpy(dtype="float64")
+        for i, (t, close) in enumerate(zip(df.index, closes)):
+            self._push(t, close, revisable=i == len(closes) - 1)
+
+    def common_prefix(self, df: pd.DataFrame) -> int:
+        """
+        Number of leading bars of `df` identical (timestamp and close) to the tracked ones.
+        """
+        n = min(len(self), len(df))
+        if n == 0:
+            return 0
+        same = (df.index[:n] == pd.DatetimeIndex(self.times[:n])) & (
+            df["close"].to_numpy(dtype="float64")[:n] == np.array([row[0] for row in self.rows[:n]])
+        )
+        return n if same.all() else int(np.argmin(same))
+
+    def frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        """
+        The first `n` tracked bars in the same layout as `compute_trend_bias`.
+        """
+        n = len(self) if n is None else n
+        columns = ["close", f"ema_{self.short_ema}", f"ema_{self.long_ema}", "rsi", "trend_bias"]
+        df = pd.DataFrame(self.rows[:n], columns=columns)
+        df.insert(0, "t", pd.DatetimeIndex(self.times[:n]))
+        return df
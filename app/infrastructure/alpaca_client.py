@@ -1,8 +1,19 @@
+import asyncio
 import os
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 import httpx
 from dotenv import load_dotenv
 
+from app.infrastructure.bar_cache import (
+    BAR_COLUMNS, bar_store, empty_bars, merge_bars, merge_ranges, missing_ranges, settled_until, to_utc
+)
+from app.infrastructure.metrics import ALPACA_BYTES, ALPACA_PAGES, ALPACA_RETRIES, span
+from app.domain.resample import base_timeframe, is_base, resample_bars
+
 load_dotenv()
 
 BASE_URL = os.getenv("ALPACA_BASE_URL", "https://data.alpaca.markets/v2")
@@ -15,38 +26,191 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
-async def fetch_bars(symbol: str, start_date: str, end_date: str, timeframe: str = "1D") -> pd.DataFrame:
+# Alpaca caps a page at 10000 bars
+PAGE_LIMIT = int(os.getenv("ALPACA_PAGE_LIMIT", "10000"))
+MAX_CONNECTIONS = int(os.getenv("ALPACA_MAX_CONNECTIONS", "20"))
+MAX_IN_FLIGHT = int(os.getenv("ALPACA_MAX_IN_FLIGHT", "8"))
+REQUEST_TIMEOUT = float(os.getenv("ALPACA_TIMEOUT_SECONDS", "30"))
+# Rate-limited (429) and server error responses are retried with exponential backoff
+MAX_RETRIES = int(os.getenv("ALPACA_MAX_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("ALPACA_RETRY_BACKOFF_SECONDS", "0.5"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+BAR_FIELDS = {"o": "open", "h": "high", "l": "low", "c": "close", "v": "volume", "n": "trade_count", "vw": "vwap"}
+
+
+# Upper bound on bars per calendar day, used to size the download windows
+# (intraday counts include pre/post market: 04:00-20:00 ET)
+_BARS_PER_DAY = {"Min": 960, "T": 960, "Hour": 16, "H": 16, "Day": 5 / 7, "D": 5 / 7, "Week": 1 / 7, "W": 1 / 7}
+
+_client: Optional[httpx.AsyncClient] = None
+_in_flight: Optional[asyncio.Semaphore] = None
+
+
+async def open_client() -> httpx.AsyncClient:
+    """
+    Create the shared, pooled Alpaca client. Called from the app lifespan.
+    """
+    global _client, _in_flight
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers={k: v for k, v in HEADERS.items() if v is not None},
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+        )
+        _in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    return _client
+
+
+async def close_client() -> None:
+    global _client, _in_flight
+    if _client is not None:
+        await _client.aclose()
+    _client, _in_flight = None, None
+
+
+def _rfc3339(ts: pd.Timestamp) -> str:
+    return ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return RETRY_BACKOFF * 2 ** attempt
+
+
+async def _get_page(client: httpx.AsyncClient, url: str, params: dict) -> httpx.Response:
+    for attempt in range(MAX_RETRIES + 1):
+        async with _in_flight:
+            r = await client.get(url, params=params)
+        if r.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            break
+        ALPACA_RETRIES.labels(status=str(r.status_code)).inc()
+        await asyncio.sleep(_retry_delay(r, attempt))
+    r.raise_for_status()
+    return r
+
+
+def _window_span(timeframe: str) -> Optional[pd.Timedelta]:
+    """
+    Calendar span that holds at most one page of `timeframe` bars, or None if unknown.
+    """
+    match = re.fullmatch(r"(\d+)([A-Za-z]+)", timeframe)
+    if not match or match.group(2) not in _BARS_PER_DAY:
+        return None
+    amount, unit = int(match.group(1)), match.group(2)
+    return pd.Timedelta(days=PAGE_LIMIT * amount / _BARS_PER_DAY[unit])
+
+
+def split_windows(start: pd.Timestamp, end: pd.Timestamp, timeframe: str) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    Split [start, end] into consecutive, non-overlapping windows of about one page each.
+    """
+    span = _window_span(timeframe)
+    if span is None:
+        return [(start, end)]
+
+    windows = []
+    lo = start
+    while lo <= end:
+        hi = min(lo + span, end)
+        windows.append((lo, hi))
+        lo = hi + pd.Timedelta(seconds=1)
+    return windows
+
+
+async def _download_window(symbol: str, start: pd.Timestamp, end: pd.Timestamp, timeframe: str) -> list:
+    """
+    Walk every page of bars for one window.
+    """
+    client = await open_client()
     url = f"{BASE_URL}/stocks/{symbol}/bars"
     params = {
-        "start": start_date,
-        "end": end_date,
+        "start": _rfc3339(start),
+        "end": _rfc3339(end),
         "timeframe": timeframe,
-        "limit": 3000  # Adjust as needed
+        "limit": PAGE_LIMIT,
     }
 
     all_bars = []
     next_token = None
 
-    async with httpx.AsyncClient() as client:
-        while True:
-            if next_token:
-                params["page_token"] = next_token
+    while True:
+        if next_token:
+            params["page_token"] = next_token
+
+        r = await _get_page(client, url, params)
+        ALPACA_PAGES.labels(timeframe=timeframe).inc()
+        ALPACA_BYTES.labels(timeframe=timeframe).inc(len(r.content))
+        json_data = r.json()
+
+        bars = json_data.get("bars") or []
+        all_bars.extend(bars)
+
+        next_token = json_data.get("next_page_token")
+        if not next_token:
+            break
+
+    return all_bars
 
-            r = await client.get(url, headers=HEADERS, params=params)
-            r.raise_for_status()
-            json_data = r.json()
 
-            bars = json_data.get("bars", [])
-            all_bars.extend(bars)
+async def _download_bars(symbol: str, start: pd.Timestamp, end: pd.Timestamp, timeframe: str) -> pd.DataFrame:
+    """
+    Download bars for [start, end] from Alpaca, fetching the windows concurrently
+    and stitching them back together in order.
+    """
+    windows = split_windows(start, end, timeframe)
+    with span("alpaca_download"):
+        pages = await asyncio.gather(*(_download_window(symbol, lo, hi, timeframe) for lo, hi in windows))
+    all_bars = [bar for page in pages for bar in page]
 
-            next_token = json_data.get("next_page_token")
-            if not next_token:
-                break
+    if not all_bars:
+        return empty_bars()
 
     # Parse the full result
-    df = pd.DataFrame(all_bars)
-    df["t"] = pd.to_datetime(df["t"])
+    df = pd.DataFrame(all_bars).rename(columns=BAR_FIELDS)
+    df["t"] = pd.to_datetime(df["t"], utc=True)
     df.set_index("t", inplace=True)
-    df.rename(columns={"c": "close"}, inplace=True)
-    return df[["close"]]
+    df = df[~df.index.duplicated(keep="last")]
+    return df.reindex(columns=BAR_COLUMNS).astype("float64")
+
+
+async def fetch_bars(symbol: str, start_date: str, end_date: str, timeframe: str = "1D") -> pd.DataFrame:
+    """
+    Return OHLCV bars for [start_date, end_date], served from the local bar store.
+
+    Only one base series is stored and downloaded per symbol (1Min for intraday
+    timeframes, 1D for daily and longer); other timeframes are resampled from it, so
+    one upstream pull serves them all. Only the ranges the store has not seen yet are
+    downloaded from Alpaca and merged in.
+    """
+    with span("fetch_bars"):
+        return await _fetch_bars(symbol, to_utc(start_date), to_utc(end_date), timeframe)
+
+
+async def _fetch_bars(symbol: str, start: pd.Timestamp, end: pd.Timestamp, timeframe: str) -> pd.DataFrame:
+    base = base_timeframe(timeframe)
+
+    async with bar_store.lock(symbol, base):
+        cached, coverage = bar_store.load(symbol, base)
+        gaps = missing_ranges(coverage, start, end)
+
+        if gaps:
+            fetched = await asyncio.gather(*(_download_bars(symbol, lo, hi, base) for lo, hi in gaps))
+            cached = merge_bars(cached, fetched)
+
+            # Recent bars can still change upstream, so only settled ranges count as covered;
+            # the file is only rewritten when that coverage grows
+            settled = settled_until()
+            grown = merge_ranges(coverage, [(lo, min(hi, settled)) for lo, hi in gaps if lo <= settled])
+            if np.array_equal(grown, coverage):
+                bar_store.keep(symbol, base, cached, coverage)
+            else:
+                bar_store.save(symbol, base, cached, grown)
 
+    df = cached.loc[start:end, BAR_COLUMNS]
+    if is_base(timeframe):
+        return df
+    with span("resample"):
+        return resample_bars(df, timeframe)
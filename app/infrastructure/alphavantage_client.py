@@ -0,0 +1,61 @@
+import os
+from typing import List
+
+import httpx
+import pandas as pd
+from dotenv import load_dotenv
+
+from app.infrastructure.rate_limiter import AsyncRateLimiter
+
+load_dotenv()
+
+ALPHAVANTAGE_API_KEY = os.getenv("ALPHAVANTAGE_API_KEY")
+BASE_URL = "https://www.alphavantage.co/query"
+# Quota of the AlphaVantage plan in use (premium tiers start at 75/min)
+REQUESTS_PER_MINUTE = int(os.getenv("ALPHAVANTAGE_REQUESTS_PER_MINUTE", "75"))
+REQUEST_TIMEOUT = float(os.getenv("ALPHAVANTAGE_TIMEOUT_SECONDS", "30"))
+
+OPTION_COLUMNS = ["contract_id", "expiration", "iv", "date"]
+# Keys of the payloads AlphaVantage sends instead of data (quota exceeded, bad request, ...)
+ERROR_KEYS = ("Note", "Information", "Error Message")
+
+rate_limiter = AsyncRateLimiter(REQUESTS_PER_MINUTE, 60.0)
+
+
+async def fetch_historical_options(client: httpx.AsyncClient, symbol: str) -> List[dict]:
+    """
+    Call AlphaVantage HISTORICAL_OPTIONS endpoint and return the raw list of option data.
+    Calls are spaced to stay within the configured quota.
+
+    AlphaVantage answers throttling and errors with HTTP 200 and a message instead of
+    data; those raise RuntimeError, so callers retry rather than take them as "no data".
+    """
+    params = {
+        "function": "HISTORICAL_OPTIONS",
+        "symbol": symbol,
+        "apikey": ALPHAVANTAGE_API_KEY,
+    }
+    async with rate_limiter:
+        resp = await client.get(BASE_URL, params=params, timeout=REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    payload = resp.json()
+    for key in ERROR_KEYS:
+        if key in payload:
+            raise RuntimeError(f"AlphaVantage refused {symbol}: {payload[key]}")
+    return payload.get("data", [])
+
+
+def parse_option_records(raw: List[dict]) -> pd.DataFrame:
+    """
+    Parse raw option dicts into a frame with OPTION_COLUMNS in one vectorised step.
+    Records with missing or invalid required fields are dropped.
+    """
+    df = pd.DataFrame.from_records(raw, columns=["contractID", "expiration", "implied_volatility", "date"])
+    df = df.rename(columns={"contractID": "contract_id", "implied_volatility": "iv"})
+
+    df["iv"] = pd.to_numeric(df["iv"], errors="coerce")
+    df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d", errors="coerce")
+    df = df.dropna(subset=OPTION_COLUMNS)
+    df = df.astype({"contract_id": str, "expiration": str})
+
+    return df[OPTION_COLUMNS].reset_index(drop=True)
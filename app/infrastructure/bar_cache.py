@@ -0,0 +1,171 @@
+import asyncio
+import os
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BAR_CACHE_DIR = os.getenv("BAR_CACHE_DIR", ".cache/bars")
+# Bars younger than this may still be revised upstream (e.g. today's daily bar),
+# so the ranges they fall in are never marked as covered.
+BAR_CACHE_SETTLE_HOURS = float(os.getenv("BAR_CACHE_SETTLE_HOURS", "24"))
+# Symbol/timeframe files kept in memory (least recently used are dropped)
+BAR_CACHE_MEMORY_ENTRIES = int(os.getenv("BAR_CACHE_MEMORY_ENTRIES", "64"))
+
+BAR_COLUMNS = ["open", "high", "low", "close", "volume", "trade_count", "vwap"]
+
+Range = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+def to_utc(value) -> pd.Timestamp:
+    """
+    Parse a date / RFC3339 string (or timestamp) into a UTC timestamp.
+    Naive values are taken as UTC, which is how Alpaca reads bare dates.
+    """
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def empty_bars() -> pd.DataFrame:
+    index = pd.DatetimeIndex([], tz="UTC", name="t")
+    return pd.DataFrame({col: pd.Series(dtype="float64") for col in BAR_COLUMNS}, index=index)
+
+
+def missing_ranges(coverage: np.ndarray, start: pd.Timestamp, end: pd.Timestamp) -> List[Range]:
+    """
+    Return the parts of [start, end] not contained in the covered intervals.
+
+    Parameters:
+    - coverage: (k, 2) int64 array of sorted, non-overlapping [start, end] UTC nanoseconds
+    - start, end: requested UTC bounds (inclusive)
+    """
+    gaps = []
+    cursor, covered = start.value, False
+    for lo, hi in coverage:
+        if hi < cursor:
+            continue
+        if lo > end.value:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo))
+        cursor, covered = max(cursor, hi), True
+        if cursor >= end.value:
+            break
+    if not covered or cursor < end.value:
+        gaps.append((cursor, end.value))
+    return [(pd.Timestamp(lo, tz="UTC"), pd.Timestamp(hi, tz="UTC")) for lo, hi in gaps]
+
+
+def merge_ranges(coverage: np.ndarray, ranges: List[Range]) -> np.ndarray:
+    """
+    Add [start, end] ranges to the coverage array, merging any that touch or overlap.
+    """
+    intervals = [tuple(row) for row in coverage.tolist()]
+    intervals += [(lo.value, hi.value) for lo, hi in ranges if lo <= hi]
+    intervals.sort()
+
+    merged: List[List[int]] = []
+    for lo, hi in intervals:
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return np.array(merged, dtype=np.int64).reshape(-1, 2)
+
+
+def merge_bars(cached: pd.DataFrame, fetched: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Combine cached bars with freshly downloaded ones; upstream wins on overlapping timestamps.
+    """
+    frames = [f for f in [cached, *fetched] if not f.empty]
+    if not frames:
+        return empty_bars()
+    df = pd.concat(frames)
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index()
+
+
+def settled_until() -> pd.Timestamp:
+    now = datetime.now(timezone.utc) - timedelta(hours=BAR_CACHE_SETTLE_HOURS)
+    return pd.Timestamp(now)
+
+
+class BarStore:
+    """
+    Persistent bar store with one columnar ``.npz`` file per symbol/timeframe.
+
+    Each file holds the bar timestamps, one array per OHLCV column and the list of
+    [start, end] ranges already fetched from upstream, so that a request only has to
+    download the ranges it is missing. The most recently used files are kept in memory.
+    """
+
+    def __init__(self, root: str, max_entries: int = BAR_CACHE_MEMORY_ENTRIES):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self._frames: "OrderedDict[Tuple[str, str], Tuple[pd.DataFrame, np.ndarray]]" = OrderedDict()
+        # Only the locks someone holds or waits on stay alive
+        self._locks: "weakref.WeakValueDictionary[Tuple[str, str], asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def _path(self, symbol: str, timeframe: str) -> Path:
+        return self.root / timeframe / f"{symbol.upper().replace('/', '_')}.npz"
+
+    def lock(self, symbol: str, timeframe: str) -> asyncio.Lock:
+        key = (symbol.upper(), timeframe)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def load(self, symbol: str, timeframe: str) -> Tuple[pd.DataFrame, np.ndarray]:
+        key = (symbol.upper(), timeframe)
+        if key in self._frames:
+            self._frames.move_to_end(key)
+            return self._frames[key]
+
+        path = self._path(symbol, timeframe)
+        if not path.exists():
+            return empty_bars(), np.empty((0, 2), dtype=np.int64)
+
+        with np.load(path) as data:
+            index = pd.DatetimeIndex(pd.to_datetime(data["t"], unit="ns", utc=True), name="t")
+            df = pd.DataFrame({col: data[col] for col in BAR_COLUMNS}, index=index)
+            coverage = data["coverage"].reshape(-1, 2)
+
+        self.keep(symbol, timeframe, df, coverage)
+        return df, coverage
+
+    def keep(self, symbol: str, timeframe: str, df: pd.DataFrame, coverage: np.ndarray) -> None:
+        """
+        Update the in-memory copy only, e.g. with unsettled bars that must not be persisted as covered.
+        """
+        key = (symbol.upper(), timeframe)
+        self._frames[key] = (df, coverage)
+        self._frames.move_to_end(key)
+        while len(self._frames) > self.max_entries:
+            self._frames.popitem(last=False)
+
+    def save(self, symbol: str, timeframe: str, df: pd.DataFrame, coverage: np.ndarray) -> None:
+        path = self._path(symbol, timeframe)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                t=df.index.asi8,
+                coverage=coverage,
+                **{col: df[col].to_numpy(dtype="float64") for col in BAR_COLUMNS},
+            )
+        os.replace(tmp, path)
+
+        self.keep(symbol, timeframe, df, coverage)
+
+
+bar_store = BarStore(BAR_CACHE_DIR)
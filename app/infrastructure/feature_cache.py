@@ -0,0 +1,43 @@
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.domain.hmm_features import FeatureMatrix
+
+load_dotenv()
+
+HMM_FEATURE_CACHE_SIZE = int(os.getenv("HMM_FEATURE_CACHE_SIZE", "256"))
+
+
+class FeatureCache:
+    """
+    In-memory LRU of HMM feature matrices, keyed by symbol, timeframe, feature set and
+    data fingerprint, so fits of the same window with different component counts
+    reuse one matrix.
+    """
+
+    def __init__(self, max_entries: int = HMM_FEATURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, FeatureMatrix]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[FeatureMatrix]:
+        features = self._entries.get(key)
+        if features is not None:
+            self._entries.move_to_end(key)
+        return features
+
+    def put(self, key: str, features: FeatureMatrix) -> None:
+        # Shared between requests, so make sure nobody writes into it
+        features.values.flags.writeable = False
+        self._entries[key] = features
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+feature_cache = FeatureCache()
@@ -0,0 +1,79 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+# Spans recorded while serving the current request, for the Server-Timing header
+request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+SPAN_SECONDS = Histogram(
+    "quant_sight_span_seconds",
+    "Duration of instrumented hot-path spans",
+    ["span"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+ALPACA_PAGES = Counter("quant_sight_alpaca_pages_total", "Bar pages downloaded from Alpaca", ["timeframe"])
+ALPACA_BYTES = Counter("quant_sight_alpaca_bytes_total", "Response bytes downloaded from Alpaca", ["timeframe"])
+ALPACA_RETRIES = Counter("quant_sight_alpaca_retries_total", "Alpaca requests retried, by response status", ["status"])
+
+HMM_FITS = Counter("quant_sight_hmm_fits_total", "HMM fits (full or warm-started), by convergence", ["kind", "converged"])
+HMM_EM_ITERATIONS = Histogram(
+    "quant_sight_hmm_em_iterations",
+    "EM iterations until an HMM fit stopped",
+    ["kind"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+IV_RECORDS_FETCHED = Counter("quant_sight_iv_records_fetched_total", "Option records fetched by the IV job", ["symbol"])
+IV_RECORDS_STORED = Counter("quant_sight_iv_records_stored_total", "Option records upserted by the IV job", ["symbol"])
+IV_SYMBOL_SECONDS = Histogram(
+    "quant_sight_iv_symbol_seconds",
+    "Time to ingest one symbol in the IV job",
+    ["symbol"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+
+JOB_TASKS = Counter("quant_sight_job_tasks_total", "Scheduled per-symbol tasks finished, by job and outcome", ["job", "status"])
+
+
+def record_span(name: str, seconds: float) -> None:
+    """
+    Record a span measured elsewhere (e.g. in a pool worker).
+    """
+    SPAN_SECONDS.labels(span=name).observe(seconds)
+    spans = request_spans.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - t0)
+
+
+def observe_hmm_fit(stats: Dict[str, float], kind: str) -> None:
+    """
+    Record the fit statistics returned with an HMM state (see `hmm_model.FIT_STAT_NAMES`).
+    """
+    if stats.get("fit_iterations", 0) > 0:
+        HMM_FITS.labels(kind=kind, converged=str(bool(stats["fit_converged"])).lower()).inc()
+        HMM_EM_ITERATIONS.labels(kind=kind).observe(stats["fit_iterations"])
+        record_span("hmm_fit", stats["fit_seconds"])
+    record_span("hmm_predict", stats["predict_seconds"])
+
+
+def server_timing(spans: List[Tuple[str, float]]) -> str:
+    """
+    `Server-Timing` header value, with the durations of same-named spans added up.
+    """
+    totals: Dict[str, float] = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
@@ -0,0 +1,116 @@
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HMM_MODEL_CACHE_SIZE = int(os.getenv("HMM_MODEL_CACHE_SIZE", "512"))
+# Unset: memory only. Set: fitted parameters are also persisted as one .npz per model.
+HMM_MODEL_CACHE_DIR = os.getenv("HMM_MODEL_CACHE_DIR")
+
+
+def data_fingerprint(df: pd.DataFrame, *extra: pd.Series, columns: Sequence[str] = ("close",)) -> str:
+    """
+    Stable hash of the bars a model is fitted on (timestamps and the bar `columns` its
+    features read), plus any other series its features are built from (e.g. implied volatility).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(df.index.asi8).tobytes())
+    for column in columns:
+        digest.update(np.ascontiguousarray(df[column].to_numpy(dtype="float64")).tobytes())
+    for series in extra:
+        digest.update(np.ascontiguousarray(pd.DatetimeIndex(series.index).asi8).tobytes())
+        digest.update(np.ascontiguousarray(series.to_numpy(dtype="float64")).tobytes())
+    return digest.hexdigest()
+
+
+def model_key(symbol: str, n_components: int, fingerprint: str, feature_set: str = "basic") -> str:
+    return f"{symbol.upper().replace('/', '_')}_{feature_set}_{n_components}_{fingerprint}"
+
+
+def window_key(symbol: str, n_components: int, first_bar: pd.Timestamp, timeframe: str = "1D", feature_set: str = "basic") -> str:
+    """
+    Identifies a fitting window by where it starts, so that later fits over the same
+    window extended with new bars can find the previous one.
+    """
+    return f"{symbol.upper().replace('/', '_')}_{timeframe}_{feature_set}_{n_components}_{first_bar.value}"
+
+
+class ModelRegistry:
+    """
+    Fitted HMM parameters keyed by symbol, component count and data fingerprint.
+
+    An in-memory LRU tier sits in front of an optional on-disk tier; a disk hit is
+    promoted back into memory. Entries can also be tagged with a window so that the
+    most recent fit for that window can be looked up for warm starts.
+    """
+
+    def __init__(self, max_entries: int = HMM_MODEL_CACHE_SIZE, cache_dir: Optional[str] = HMM_MODEL_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._latest: dict = {}
+        # window each in-memory entry is the latest fit of, so evicting it also drops the window
+        self._windows: dict = {}
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.npz"
+
+    def get(self, key: str) -> Optional[dict]:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        if self.cache_dir is None or not self._path(key).exists():
+            return None
+
+        with np.load(self._path(key)) as data:
+            params = {name: data[name] for name in data.files}
+        self._remember(key, params)
+        return params
+
+    def put(self, key: str, params: dict, window: Optional[str] = None) -> None:
+        if window is not None:
+            self._windows.pop(self._latest.get(window), None)
+            self._latest[window] = key
+            self._windows[key] = window
+        self._remember(key, params)
+
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(key).with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                np.savez(f, **params)
+            os.replace(tmp, self._path(key))
+            if window is not None:
+                (self.cache_dir / f"{window}.latest").write_text(key)
+
+    def latest(self, window: str) -> Optional[Tuple[str, dict]]:
+        """
+        Most recent entry stored for `window`, as (key, params).
+        """
+        key = self._latest.get(window)
+        if key is None and self.cache_dir is not None and (self.cache_dir / f"{window}.latest").exists():
+            key = (self.cache_dir / f"{window}.latest").read_text().strip()
+        if key is None:
+            return None
+        params = self.get(key)
+        return (key, params) if params is not None else None
+
+    def _remember(self, key: str, params: dict) -> None:
+        self._entries[key] = params
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            window = self._windows.pop(evicted, None)
+            if window is not None and self._latest.get(window) == evicted:
+                del self._latest[window]
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,125 @@
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from app.infrastructure.bar_cache import BAR_COLUMNS, empty_bars, to_utc
+
+load_dotenv()
+
+PRICE_ARCHIVE_DIR = os.getenv("PRICE_ARCHIVE_DIR", ".cache/archive")
+
+# Fixed-width column files: int64 UTC nanoseconds and float64 bar values
+TIME_DTYPE = np.dtype("<i8")
+VALUE_DTYPE = np.dtype("<f8")
+
+
+class PriceArchive:
+    """
+    Append-only columnar bar archive with one directory per symbol/timeframe and one
+    raw fixed-width file per column (`t.i8`, `close.f8`, ...).
+
+    Reads map the files with `numpy.memmap`, so a slice costs no copy and several
+    processes reading the same history share the OS page cache instead of each holding
+    its own copy. Bars can only be added after the last archived one; the timestamp
+    file is written last, so its length is the number of complete rows even while
+    another process is appending.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _dir(self, symbol: str, timeframe: str) -> Path:
+        return self.root / timeframe / symbol.upper().replace("/", "_")
+
+    def length(self, symbol: str, timeframe: str) -> int:
+        path = self._dir(symbol, timeframe) / "t.i8"
+        return path.stat().st_size // TIME_DTYPE.itemsize if path.exists() else 0
+
+    def columns(self, symbol: str, timeframe: str) -> Dict[str, np.ndarray]:
+        """
+        Read-only memory maps of every column ('t' plus `BAR_COLUMNS`), all of the same length.
+        """
+        n = self.length(symbol, timeframe)
+        if n == 0:
+            return {"t": np.empty(0, dtype=TIME_DTYPE), **{col: np.empty(0, dtype=VALUE_DTYPE) for col in BAR_COLUMNS}}
+        folder = self._dir(symbol, timeframe)
+        columns = {"t": np.memmap(folder / "t.i8", dtype=TIME_DTYPE, mode="r", shape=(n,))}
+        for col in BAR_COLUMNS:
+            columns[col] = np.memmap(folder / f"{col}.f8", dtype=VALUE_DTYPE, mode="r", shape=(n,))
+        return columns
+
+    def last_time(self, symbol: str, timeframe: str) -> Optional[pd.Timestamp]:
+        n = self.length(symbol, timeframe)
+        if n == 0:
+            return None
+        t = np.memmap(self._dir(symbol, timeframe) / "t.i8", dtype=TIME_DTYPE, mode="r", shape=(n,))
+        return pd.Timestamp(int(t[-1]), tz="UTC")
+
+    def append(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Append the bars of `df` that are newer than the last archived one.
+        Only one process may append to a symbol/timeframe at a time.
+
+        Returns:
+        - number of bars appended
+
+        Raises ValueError when the index of `df` is not strictly increasing (reads binary-search it).
+        """
+        if not df.index.is_monotonic_increasing or df.index.has_duplicates:
+            raise ValueError("bars must be appended with a strictly increasing index")
+        last = self.last_time(symbol, timeframe)
+        if last is not None:
+            df = df[df.index > last]
+        if df.empty:
+            return 0
+
+        folder = self._dir(symbol, timeframe)
+        folder.mkdir(parents=True, exist_ok=True)
+        n = self.length(symbol, timeframe)
+        for col in BAR_COLUMNS:
+            with open(folder / f"{col}.f8", "r+b" if n else "wb") as f:
+                # drop a row left over by an append that died before writing its timestamp
+                f.truncate(n * VALUE_DTYPE.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(df[col].to_numpy(dtype=VALUE_DTYPE).tobytes())
+        with open(folder / "t.i8", "r+b" if n else "wb") as f:
+            # and the partial timestamp of one that died while writing it
+            f.truncate(n * TIME_DTYPE.itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(df.index.asi8.astype(TIME_DTYPE).tobytes())
+        return len(df)
+
+    def read(self, symbol: str, timeframe: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Archived bars in [start, end] (inclusive, either bound optional) as a DataFrame
+        whose columns are views of the memory-mapped files.
+
+        The frame is read-only: adding columns is fine, writing into the existing ones fails.
+        """
+        columns = self.columns(symbol, timeframe)
+        t = columns["t"]
+        if len(t) == 0:
+            return empty_bars()
+
+        lo = 0 if start is None else int(np.searchsorted(t, to_utc(start).value, side="left"))
+        hi = len(t) if end is None else int(np.searchsorted(t, to_utc(end).value, side="right"))
+        index = pd.DatetimeIndex(np.asarray(t[lo:hi]).view("datetime64[ns]"), name="t").tz_localize("UTC")
+        # copy=False keeps one block per column, each a view of its file
+        return pd.DataFrame({col: np.asarray(columns[col][lo:hi]) for col in BAR_COLUMNS}, index=index, copy=False)
+
+
+def archived_apply(fn, symbol: str, timeframe: str, start, end, *args, root: str = PRICE_ARCHIVE_DIR, **kwargs):
+    """
+    Call `fn(bars, *args, **kwargs)` on an archive slice, opening the archive where it runs.
+
+    Meant for `run_in_pool`: only the symbol and bounds cross the process boundary,
+    and the worker maps the shared files instead of unpickling a copy of the bars.
+    """
+    return fn(PriceArchive(root).read(symbol, timeframe, start, end), *args, **kwargs)
+
+
+price_archive = PriceArchive(PRICE_ARCHIVE_DIR)
@@ -0,0 +1,38 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# CPU-bound model fits run here so they never block the event loop
+MAX_WORKERS = int(os.getenv("COMPUTE_MAX_WORKERS", str(os.cpu_count() or 1)))
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that already runs the event loop and thread pools is unsafe
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+
+
+async def run_in_pool(fn, *args, **kwargs):
+    """
+    Run a picklable, module-level function in the shared process pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(fn, *args, **kwargs))
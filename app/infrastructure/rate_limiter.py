@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Spaces calls evenly so that at most `rate` of them start per `period` seconds.
+    """
+
+    def __init__(self, rate: int, period: float = 60.0):
+        self.interval = period / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+# e.g. redis://cache:6379/0 to share cached responses between workers
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+
+
+class CachedResponse:
+    """
+    A serialised response body with its validators.
+    """
+
+    def __init__(self, body: bytes, media_type: str, last_modified: float, expires_at: float):
+        self.body = body
+        self.media_type = media_type
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    def to_bytes(self) -> bytes:
+        header = json.dumps({"media_type": self.media_type, "last_modified": self.last_modified, "expires_at": self.expires_at})
+        return header.encode() + b"\n" + self.body
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "CachedResponse":
+        header, body = raw.split(b"\n", 1)
+        return cls(body, **json.loads(header))
+
+
+class CacheBackend(ABC):
+    """
+    Storage for cached responses. Subclass to plug in a shared store.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process LRU with per-entry expiry.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Shared backend so every worker serves the same cached responses.
+    Needs the optional `redis` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "quant-sight:response:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RESPONSE_CACHE_URL is set but the 'redis' package is not installed") from e
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        raw = await self.client.get(self.prefix + key)
+        return CachedResponse.from_bytes(raw) if raw is not None else None
+
+    async def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        await self.client.set(self.prefix + key, entry.to_bytes(), ex=max(1, int(ttl)))
+
+
+class ResponseCache:
+    """
+    Two-tier response cache: the in-process LRU answers first and an optional
+    shared backend is consulted on a local miss.
+    """
+
+    def __init__(self, local: CacheBackend, shared: Optional[CacheBackend] = None):
+        self.local = local
+        self.shared = shared
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = await self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = await self.shared.get(key)
+            if entry is not None:
+                await self.local.set(key, entry, entry.expires_at - time.time())
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        ttl = entry.expires_at - time.time()
+        if ttl <= 0:
+            return
+        await self.local.set(key, entry, ttl)
+        if self.shared is not None:
+            await self.shared.set(key, entry, ttl)
+
+
+def cache_key(**params) -> str:
+    """
+    Stable key for a normalised query.
+    """
+    return hashlib.blake2b(json.dumps(params, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+
+response_cache = ResponseCache(MemoryBackend(), RedisBackend(RESPONSE_CACHE_URL) if RESPONSE_CACHE_URL else None)
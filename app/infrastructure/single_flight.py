@@ -0,0 +1,36 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one in-flight computation.
+
+    The first caller for a key starts the work as a task; callers arriving while it
+    runs await the same task and receive the same result (or exception). The key is
+    released as soon as the task finishes, so later calls compute afresh.
+
+    Each caller awaits the task through `asyncio.shield`, so a caller that goes away
+    does not cancel the work the others are waiting on.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn(*args, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
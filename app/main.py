@@ -1,8 +1,42 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.api.metrics import ServerTimingMiddleware, router as metrics_router
 from app.api.v1.hmm_router import router as hmm_router
 from app.api.v1.trend_router import router as trend_router
+from app.api.v1.iv_router import router as iv_router
+from app.api.v1.stream_router import router as stream_router
+from app.api.v1.screener_router import router as screener_router
+from app.db.session import dispose_async_engine, init_async_engine
+from app.infrastructure import alpaca_client
+from app.infrastructure.process_pool import shutdown_executor
+from app.services.scheduler import scheduler, start_scheduler
+from app.services.signal_hub import signal_hub
+from app.services.signal_snapshot_builder import start_snapshot_refresh, stop_snapshot_refresh
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await alpaca_client.open_client()
+    init_async_engine()
+    await signal_hub.start()
+    await start_snapshot_refresh()
+    await start_scheduler()
+    yield
+    await scheduler.stop()
+    await stop_snapshot_refresh()
+    await signal_hub.stop()
+    await alpaca_client.close_client()
+    await dispose_async_engine()
+    shutdown_executor()
+
 
-app = FastAPI(title="Quant Sight Core API", version="1.0.0");
+app = FastAPI(title="Quant Sight Core API", version="1.0.0", lifespan=lifespan);
+app.add_middleware(ServerTimingMiddleware)
 
 app.include_router(hmm_router, prefix="/v1/hmm", tags=["HMM Regime Detection"])
-app.include_router(trend_router, prefix="/v1/trend-bias", tags=["Trend Bias Detection"])
\ No newline at end of file
+app.include_router(trend_router, prefix="/v1/trend-bias", tags=["Trend Bias Detection"])
+app.include_router(iv_router, prefix="/v1/iv", tags=["Implied Volatility"])
+app.include_router(stream_router, prefix="/v1/stream", tags=["Live Signals"])
+app.include_router(screener_router, prefix="/v1/screener", tags=["Screener"])
+app.include_router(metrics_router, tags=["Monitoring"])
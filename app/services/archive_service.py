@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.infrastructure.alpaca_client import close_client, fetch_bars
+from app.infrastructure.bar_cache import settled_until, to_utc
+from app.infrastructure.price_archive import price_archive
+from app.domain.resample import base_timeframe
+
+logger = logging.getLogger(__name__)
+
+async def sync_archive(symbol: str, start: str, end: Optional[str] = None, timeframe: str = "1D") -> int:
+    """
+    Append the settled bars after the symbol's last archived bar (from `start` when it
+    has none yet). Bars that may still be revised upstream are left for a later run,
+    since archived bars are never rewritten.
+
+    Returns:
+    - number of bars appended
+    """
+    # Only base series are archived; coarser bars are resampled from slices of them
+    timeframe = base_timeframe(timeframe)
+    last = price_archive.last_time(symbol, timeframe)
+    end_ts = min(to_utc(end or datetime.now(timezone.utc)), settled_until())
+    start_ts = to_utc(start) if last is None else last
+    if start_ts >= end_ts:
+        return 0
+
+    df = await fetch_bars(symbol, start_ts.isoformat(), end_ts.isoformat(), timeframe)
+    appended = await asyncio.to_thread(price_archive.append, symbol, timeframe, df[df.index <= end_ts])
+    logger.info("Archived %d %s bars of %s", appended, timeframe, symbol.upper())
+    return appended
+
+async def sync_archives(symbols: List[str], start: str, timeframe: str = "1D") -> None:
+    try:
+        for symbol in dict.fromkeys(s.upper() for s in symbols):
+            try:
+                await sync_archive(symbol, start, timeframe=timeframe)
+            except Exception as e:
+                logger.exception("Failed archiving %s: %s", symbol, e)
+    finally:
+        await close_client()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Append settled bars to the memory-mapped price archive")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--start", required=True, help="first date to archive for symbols not archived yet")
+    parser.add_argument("--timeframe", default="1D", help="1D, or any intraday timeframe (stored as 1Min)")
+    args = parser.parse_args()
+    asyncio.run(sync_archives(args.symbols, args.start, args.timeframe))
@@ -0,0 +1,60 @@
+import asyncio
+from typing import List
+
+import numpy as np
+
+from app.infrastructure.alpaca_client import fetch_bars
+from app.infrastructure.process_pool import run_in_pool
+from app.domain.regime_backtest import (
+    backtest_features, fit_window, label_out_of_sample, regime_stats, walk_forward_windows
+)
+from app.adapters.response_models import RegimeBacktest, RegimePoint, RegimeStats
+
+async def _walk_forward(features: np.ndarray, windows: list, n_components: int) -> List[np.ndarray]:
+    # Ship each window only the rows it needs; every window is an independent fit
+    return await asyncio.gather(*(
+        run_in_pool(fit_window, features[lo:hi], (0, test - lo, hi - lo), n_components)
+        for lo, test, hi in windows
+    ))
+
+async def backtest_regimes(
+    symbol: str,
+    start: str,
+    end: str,
+    components: List[int],
+    train_size: int = 252,
+    test_size: int = 21,
+    expanding: bool = False,
+) -> list[RegimeBacktest]:
+    """
+    Walk-forward evaluation of the regime model for one or more component counts.
+
+    Every (component count, window) fit runs in parallel in the process pool.
+    """
+    df = await fetch_bars(symbol, start, end)
+    features = backtest_features(df)
+    windows = walk_forward_windows(len(features), train_size, test_size, expanding)
+    if not windows:
+        raise ValueError(f"need more than {train_size} feature rows, got {len(features)}")
+
+    values = np.ascontiguousarray(features.to_numpy(dtype="float64"))
+    results = await asyncio.gather(*(_walk_forward(values, windows, n) for n in components))
+
+    backtests = []
+    for n_components, labels in zip(components, results):
+        labeled = label_out_of_sample(df, features, windows, labels)
+        stats = regime_stats(labeled, n_components).replace({np.nan: None})
+        backtests.append(RegimeBacktest(
+            symbol=symbol.upper(),
+            components=n_components,
+            windows=len(windows),
+            train_size=train_size,
+            test_size=test_size,
+            expanding=expanding,
+            regimes=[
+                RegimePoint(date=row["t"], close=row["close"], regime=row["regime"])
+                for row in labeled.to_dict(orient="records")
+            ],
+            stats=[RegimeStats(**row) for row in stats.to_dict(orient="records")],
+        ))
+    return backtests
@@ -1,13 +1,31 @@
+import pandas as pd
 from sqlalchemy import select
-from app.db.models.iv_history import IvHistory
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models.iv_daily import IvDaily
 
-def get_iv_series(db: Session, watch_id: int, lookback_days: int = 252):
+async def get_iv_series(db: AsyncSession, watch_id: int, lookback_days: int = 252) -> pd.DataFrame:
+    """
+    Daily median IV for the last `lookback_days` trading days, oldest first.
+    Reads the per-day aggregates, so a date with many contracts counts once.
+    """
     stmt = (
-        select(IvHistory.date, IvHistory.iv)
-        .where(IvHistory.watchlist_id == watch_id)
-        .order_by(IvHistory.date.desc())
+        select(IvDaily.date, IvDaily.median_iv)
+        .where(IvDaily.watchlist_id == watch_id)
+        .order_by(IvDaily.date.desc())
         .limit(lookback_days)
     )
-    rows = db.execute(stmt).all()
+    rows = (await db.execute(stmt)).all()
     # rows is list of (date, iv) tuples, newest first
     return pd.DataFrame(rows, columns=["date","iv"]).set_index("date").sort_index()
+
+async def get_iv_between(db: AsyncSession, watch_id: int, start, end) -> pd.Series:
+    """
+    Daily median IV for the dates in [start, end], oldest first.
+    """
+    stmt = (
+        select(IvDaily.date, IvDaily.median_iv)
+        .where(IvDaily.watchlist_id == watch_id, IvDaily.date >= start, IvDaily.date <= end)
+        .order_by(IvDaily.date)
+    )
+    rows = (await db.execute(stmt)).all()
+    return pd.DataFrame(rows, columns=["date", "iv"]).set_index("date")["iv"]
@@ -1,13 +1,263 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from app.db.session import AsyncSessionLocal, init_async_engine
 from app.infrastructure.alpaca_client import fetch_bars
-from app.domain.hmm_model import compute_hmm
-from app.adapters.response_models import RegimePoint
+from app.infrastructure.bar_cache import to_utc
+from app.infrastructure.feature_cache import feature_cache
+from app.infrastructure.metrics import observe_hmm_fit, span
+from app.infrastructure.model_registry import HMM_MODEL_CACHE_SIZE, data_fingerprint, model_key, model_registry, window_key
+from app.infrastructure.process_pool import run_in_pool
+from app.infrastructure.single_flight import SingleFlight
+from app.domain.hmm_features import FEATURE_INPUTS, FeatureMatrix, build_features
+from app.domain.hmm_model import (
+    best_restart, compute_hmm, compute_hmm_with_params, fit_best, fit_restart, split_fit_stats, update_hmm
+)
+from app.domain.model_selection import best_components, score_fits
+from app.services.iv_service import get_iv_history_for_symbol
+from app.adapters.response_models import ComponentScore, ComponentSweep, RegimeBatchItem, RegimePoint
+
+load_dotenv()
+
+# Extend the previous fit of a grown window instead of refitting it. Faster, but the labels
+# then depend on what this worker has cached (and new bars get filtered, not smoothed,
+# posteriors), so the same request can get different answers from different workers.
+HMM_WARM_START = os.getenv("HMM_WARM_START", "false").lower() in ("1", "true", "yes")
+# EM iterations used when warm-starting from the previous fit of the same window
+HMM_WARM_ITER = int(os.getenv("HMM_WARM_ITER", "10"))
+# Seeded EM restarts of a full fit, run in parallel; the best log-likelihood wins
+HMM_RESTARTS = int(os.getenv("HMM_RESTARTS", "4"))
+# Component-count sweep: seeded EM restarts per candidate and the score that picks the winner
+HMM_SWEEP_RESTARTS = int(os.getenv("HMM_SWEEP_RESTARTS", "4"))
+HMM_SWEEP_CRITERION = os.getenv("HMM_SWEEP_CRITERION", "bic")
+SWEEP_CANDIDATES = [2, 3, 4, 5]
+AUTO_COMPONENTS = "auto"
+
+# Identical concurrent requests share one download and one fit
+_regime_flights = SingleFlight()
+# Component count the sweep picked, by symbol, timeframe, feature set and data fingerprint
+_auto_components: "OrderedDict[str, int]" = OrderedDict()
+
+def _previous_state(symbol: str, components: int, df: pd.DataFrame, timeframe: str = "1D",
+                    feature_set: str = "basic") -> Optional[dict]:
+    """
+    Latest fit over the same window whose bars are a strict prefix of `df`, if any.
+    """
+    # IV can be revised independently of the bars, so those fits are not extended
+    if feature_set == "iv":
+        return None
+    latest = model_registry.latest(window_key(symbol, components, df.index[0], timeframe, feature_set))
+    if latest is None:
+        return None
+    key, state = latest
+    n_bars = int(state["n_bars"])
+    fingerprint = data_fingerprint(df.iloc[:n_bars], columns=FEATURE_INPUTS.get(feature_set, ("close",)))
+    if n_bars >= len(df) or model_key(symbol, components, fingerprint, feature_set) != key:
+        return None
+    return state
+
+async def _load_iv(symbol: str, df: pd.DataFrame) -> pd.Series:
+    if init_async_engine() is None:
+        raise ValueError("the 'iv' feature set needs DATABASE_URL")
+    # A little history before the first bar, to carry the last value forward
+    start = (df.index[0] - pd.Timedelta(days=10)).tz_localize(None).to_pydatetime()
+    end = df.index[-1].tz_localize(None).to_pydatetime()
+    async with AsyncSessionLocal() as db:
+        iv = await get_iv_history_for_symbol(db, symbol, start, end)
+    if iv is None or iv.empty:
+        raise ValueError(f"no implied volatility stored for {symbol.upper()}")
+    return iv
 
-async def get_regimes_for_symbol(symbol: str, start: str, end: str, components: int = 3) -> list[RegimePoint]:
-    df = await fetch_bars(symbol, start, end)
+async def hmm_features(symbol: str, df: pd.DataFrame, feature_set: str = "basic",
+                       timeframe: str = "1D") -> Tuple[FeatureMatrix, str]:
+    """
+    Feature matrix of `df` for `feature_set`, from the feature cache when the same
+    bars were seen before. Also returns the data fingerprint the matrix is keyed on.
+    """
+    extra = [await _load_iv(symbol, df)] if feature_set == "iv" else []
+    fingerprint = data_fingerprint(df, *extra, columns=FEATURE_INPUTS.get(feature_set, ("close",)))
+    key = f"{symbol.upper()}_{timeframe}_{feature_set}_{fingerprint}"
 
-    labeled_df = compute_hmm(df, n_components=components)
+    features = feature_cache.get(key)
+    if features is None:
+        with span("hmm_features"):
+            features = build_features(df, feature_set, *extra)
+        feature_cache.put(key, features)
+    return features, fingerprint
 
+def regime_points(labeled_df: pd.DataFrame) -> list[RegimePoint]:
+    prob_columns = [c for c in labeled_df.columns if c.startswith("p_")]
     return [
-        RegimePoint(date=row["t"], close=row["close"], regime=row["regime"])
-        for row in labeled_df.to_dict(orient="records")
-    ]
\ No newline at end of file
+        RegimePoint(date=t, close=close, regime=regime, probabilities=list(probabilities))
+        for t, close, regime, *probabilities in labeled_df[["t", "close", "regime", *prob_columns]].itertuples(index=False)
+    ]
+
+async def fit_restarts(features: FeatureMatrix, components: int, restarts: int = HMM_RESTARTS) -> dict:
+    """
+    Best of `restarts` seeded fits run in parallel in the process pool; the same result
+    as `compute_hmm_with_params(..., restarts=restarts)` computed in one process.
+    """
+    fits = await asyncio.gather(*(run_in_pool(fit_restart, features.values, components, seed) for seed in range(restarts)))
+    best = best_restart(fits)
+    if best is None:
+        # all failed: go on with the fallback seeds, as fit_best does
+        best = await run_in_pool(fit_best, features.values, components, restarts=0, random_state=restarts)
+    return best
+
+async def label_regimes_with_params(symbol: str, df: pd.DataFrame, components: int = 3, timeframe: str = "1D",
+                                    feature_set: str = "basic") -> Tuple[pd.DataFrame, dict]:
+    """
+    Label `df` with regimes, reusing cached fits where possible: an exact hit only
+    decodes, anything else is a full fit in the process pool. With `HMM_WARM_START`,
+    new bars on a known window warm-start from the previous fit instead.
+
+    Returns:
+    - the labeled bars and the registered model state they were decoded with
+    """
+    features, fingerprint = await hmm_features(symbol, df, feature_set, timeframe)
+    key = model_key(symbol, components, fingerprint, feature_set)
+    state = model_registry.get(key)
+    if state is not None:
+        with span("hmm_predict"):
+            return compute_hmm(df, n_components=components, params=state, features=features), state
+
+    previous = _previous_state(symbol, components, df, timeframe, feature_set) if HMM_WARM_START else None
+    if previous is not None:
+        try:
+            labeled_df, state = await run_in_pool(update_hmm, df, previous, n_iter=HMM_WARM_ITER, features=features)
+            observe_hmm_fit(split_fit_stats(state), kind="warm")
+        except ValueError:
+            # the warm start collapsed a state: refit from scratch below
+            previous = None
+    if previous is None:
+        best = await fit_restarts(features, components)
+        with span("hmm_predict"):
+            labeled_df, state = compute_hmm_with_params(df, n_components=components, params=best["params"], features=features)
+        stats = split_fit_stats(state)
+        stats.update(fit_iterations=best["iterations"], fit_converged=best["converged"], fit_seconds=best["fit_seconds"])
+        observe_hmm_fit(stats, kind="full")
+
+    model_registry.put(key, state, window=window_key(symbol, components, df.index[0], timeframe, feature_set))
+    return labeled_df, state
+
+async def label_regimes(symbol: str, df: pd.DataFrame, components: int = 3, timeframe: str = "1D",
+                        feature_set: str = "basic") -> pd.DataFrame:
+    labeled_df, _ = await label_regimes_with_params(symbol, df, components, timeframe, feature_set)
+    return labeled_df
+
+async def sweep_components(symbol: str, df: pd.DataFrame, candidates: List[int] = SWEEP_CANDIDATES,
+                           restarts: int = HMM_SWEEP_RESTARTS, criterion: str = HMM_SWEEP_CRITERION,
+                           timeframe: str = "1D", feature_set: str = "basic") -> Tuple[int, List[dict], pd.DataFrame]:
+    """
+    Fit every candidate component count with `restarts` seeded EM runs each, all in
+    parallel in the process pool on one shared feature matrix, and label `df` with the
+    count that wins `criterion`.
+
+    When `restarts` matches `HMM_RESTARTS` the winning fit is exactly what `label_regimes`
+    would fit, so it is registered and later requests for that component count on the
+    same bars only decode.
+
+    Returns:
+    - the winning component count, the per-candidate scores (see `score_fits`) and the labeled bars
+    """
+    features, fingerprint = await hmm_features(symbol, df, feature_set, timeframe)
+    runs = [(n, seed) for n in candidates for seed in range(restarts)]
+    with span("hmm_sweep"):
+        results = await asyncio.gather(*(run_in_pool(fit_restart, features.values, n, seed) for n, seed in runs))
+
+    fits = {n: [] for n in candidates}
+    for (n, _), result in zip(runs, results):
+        fits[n].append(result)
+    scores = score_fits(fits, len(features), features.values.shape[1])
+    best = best_components(scores, criterion)
+
+    n = best["components"]
+    with span("hmm_predict"):
+        labeled_df, state = compute_hmm_with_params(df, n, params=best["params"], features=features)
+    split_fit_stats(state)
+    if restarts == HMM_RESTARTS:
+        model_registry.put(model_key(symbol, n, fingerprint, feature_set), state,
+                           window=window_key(symbol, n, df.index[0], timeframe, feature_set))
+    return n, scores, labeled_df
+
+async def auto_components(symbol: str, df: pd.DataFrame, timeframe: str = "1D", feature_set: str = "basic") -> int:
+    """
+    Component count `sweep_components` picks for `df`. The choice is remembered per data
+    fingerprint, so the sweep runs once per set of bars and later requests only decode.
+    """
+    _, fingerprint = await hmm_features(symbol, df, feature_set, timeframe)
+    key = f"{symbol.upper()}_{timeframe}_{feature_set}_{fingerprint}"
+    if key in _auto_components:
+        _auto_components.move_to_end(key)
+        return _auto_components[key]
+
+    n, _, _ = await sweep_components(symbol, df, timeframe=timeframe, feature_set=feature_set)
+    _auto_components[key] = n
+    while len(_auto_components) > HMM_MODEL_CACHE_SIZE:
+        _auto_components.popitem(last=False)
+    return n
+
+async def get_regimes_frame(symbol: str, start: str, end: str, components: Union[int, str] = 3, timeframe: str = "1D",
+                            feature_set: str = "basic") -> pd.DataFrame:
+    """
+    Labeled bars as a DataFrame with ['t', 'close', 'regime'] columns.
+    `components` may be "auto" to pick the count with `auto_components`.
+    Concurrent calls for the same arguments share one result, which must not be mutated.
+    """
+    async def compute() -> pd.DataFrame:
+        df = await fetch_bars(symbol, start, end, timeframe)
+        n = await auto_components(symbol, df, timeframe, feature_set) if components == AUTO_COMPONENTS else components
+        return await label_regimes(symbol, df, n, timeframe, feature_set)
+
+    key = (symbol.upper(), to_utc(start), to_utc(end), components, timeframe, feature_set)
+    return await _regime_flights.do(key, compute)
+
+async def get_regimes_for_symbol(symbol: str, start: str, end: str, components: Union[int, str] = 3, timeframe: str = "1D",
+                                 feature_set: str = "basic") -> list[RegimePoint]:
+    labeled_df = await get_regimes_frame(symbol, start, end, components, timeframe, feature_set)
+
+    with span("serialise"):
+        return regime_points(labeled_df)
+
+async def get_component_sweep(symbol: str, start: str, end: str, candidates: List[int] = SWEEP_CANDIDATES,
+                              restarts: int = HMM_SWEEP_RESTARTS, criterion: str = HMM_SWEEP_CRITERION,
+                              timeframe: str = "1D", feature_set: str = "basic") -> ComponentSweep:
+    df = await fetch_bars(symbol, start, end, timeframe)
+    n, scores, labeled_df = await sweep_components(symbol, df, candidates, restarts, criterion, timeframe, feature_set)
+
+    with span("serialise"):
+        return ComponentSweep(
+            symbol=symbol.upper(),
+            criterion=criterion,
+            best_components=n,
+            observations=len(labeled_df),
+            scores=[ComponentScore(**{k: v for k, v in row.items() if k != "params"}) for row in scores],
+            regimes=regime_points(labeled_df),
+        )
+
+async def stream_regimes_batch(symbols: List[str], start: str, end: str, components: int = 3,
+                               feature_set: str = "basic") -> AsyncIterator[RegimeBatchItem]:
+    """
+    Score many symbols at once, yielding each result as soon as its fit finishes.
+    Bars are fetched concurrently and the fits fan out to the process pool.
+    """
+    async def score(symbol: str) -> RegimeBatchItem:
+        try:
+            regimes = await get_regimes_for_symbol(symbol, start, end, components, feature_set=feature_set)
+            return RegimeBatchItem(symbol=symbol, regimes=regimes)
+        except Exception as e:
+            return RegimeBatchItem(symbol=symbol, error=str(e))
+
+    tasks = [asyncio.create_task(score(symbol)) for symbol in dict.fromkeys(s.upper() for s in symbols)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # client went away: stop whatever has not finished yet
+        for task in tasks:
+            task.cancel()
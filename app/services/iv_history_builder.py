@@ -1,139 +1,143 @@
+import asyncio
 import os
 import logging
-from datetime import datetime
-from typing import List, Optional
+import time
+from typing import List
 
 import httpx
-from sqlalchemy import func
+import pandas as pd
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal
+from app.db.upsert import upsert_statement
 from app.db.models.watchlist import Watchlist
 from app.db.models.iv_history import IvHistory
+from app.db.models.iv_daily import IvDaily
+from app.infrastructure.alphavantage_client import fetch_historical_options, parse_option_records
+from app.infrastructure.metrics import IV_RECORDS_FETCHED, IV_RECORDS_STORED, IV_SYMBOL_SECONDS
 
 # ── configure logging ────────────────────────────────────────────
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 logger = logging.getLogger(__name__)
 
 # ── constants ────────────────────────────────────────────────────
-ALPHAVANTAGE_API_KEY = os.getenv("ALPHAVANTAGE_API_KEY")
-BASE_URL = "https://www.alphavantage.co/query"
+# Symbols processed at the same time; the AlphaVantage quota is enforced separately
+IV_INGEST_CONCURRENCY = int(os.getenv("IV_INGEST_CONCURRENCY", "8"))
 
 
-def fetch_historical_options(symbol: str) -> List[dict]:
+def refresh_iv_daily(db: Session, watch_id: int, symbol: str, dates: List[pd.Timestamp]) -> int:
     """
-    Call AlphaVantage HISTORICAL_OPTIONS endpoint and return the raw list of option data.
+    Recompute the IvDaily aggregates of the given dates from the stored contracts.
+    Only the dates touched by an ingestion run are read, so the table is maintained incrementally.
     """
-    params = {
-        "function": "HISTORICAL_OPTIONS",
-        "symbol": symbol,
-        "apikey": ALPHAVANTAGE_API_KEY,
-    }
-    resp = httpx.get(BASE_URL, params=params, timeout=30)
-    resp.raise_for_status()
-    payload = resp.json()
-    return payload.get("data", [])
-
-
-def parse_option_record(raw: dict) -> Optional[IvHistory]:
-    """
-    Convert a single raw option dict into an IvHistory object.
-    Return None if required fields are missing or invalid.
-    """
-    try:
-        contract_id = raw["contractID"]
-        expiration  = raw["expiration"]
-        iv          = float(raw["implied_volatility"])
-        date        = datetime.strptime(raw["date"], "%Y-%m-%d")
-    except (KeyError, TypeError, ValueError) as e:
-        logger.debug("Skipping record with keys %s due to parse error: %s", list(raw.keys()), e)
-        return None
-
-    return IvHistory(
-        contract_id=contract_id,
-        expiration=expiration,
-        iv=iv,
-        date=date,
+    stmt = (
+        select(IvHistory.date, IvHistory.iv)
+        .where(IvHistory.watchlist_id == watch_id, IvHistory.date.in_([d.to_pydatetime() for d in dates]))
+    )
+    contracts = pd.DataFrame(db.execute(stmt).all(), columns=["date", "iv"])
+    if contracts.empty:
+        return 0
+
+    daily = (
+        contracts.groupby("date")["iv"]
+                 .agg(median_iv="median", mean_iv="mean", contracts="count")
+                 .reset_index()
+                 .assign(watchlist_id=watch_id, symbol=symbol)
     )
+    db.execute(
+        upsert_statement(IvDaily, db.get_bind().dialect.name, ["watchlist_id", "date"],
+                         ["symbol", "median_iv", "mean_iv", "contracts"]),
+        daily.to_dict(orient="records"),
+    )
+    return len(daily)
 
 
-def get_last_iv_date(db: Session, watch: Watchlist) -> datetime:
+def store_iv_records(watch_id: int, symbol: str, records: pd.DataFrame) -> int:
     """
-    Return the most recent IvHistory.date for this watch. If none exist, returns datetime.min.
+    Upsert IV history rows for the given watchlist entry with one executemany,
+    then refresh the daily aggregates of the dates it touched.
+    Re-running the job for dates already stored is therefore harmless.
+    Runs in a worker thread with its own session.
     """
-    last = (
-        db.query(func.max(IvHistory.date))
-          .filter(IvHistory.watchlist_id == watch.id)
-          .scalar()
-    )
-    return last or datetime.min
+    # the same contract/day twice in one statement would conflict with itself
+    records = records.drop_duplicates(subset=["contract_id", "date"], keep="last")
+    if records.empty:
+        return 0
+
+    rows = records.assign(watchlist_id=watch_id, symbol=symbol).to_dict(orient="records")
+    with SessionLocal() as db:
+        db.execute(
+            upsert_statement(IvHistory, db.get_bind().dialect.name, ["watchlist_id", "contract_id", "date"],
+                             ["iv", "expiration"]),
+            rows,
+        )
+        days = refresh_iv_daily(db, watch_id, symbol, list(records["date"].unique()))
+        db.commit()
+
+    logger.info("   ✔ upserted %d IV records (%d days) for %s", len(rows), days, symbol)
+    return len(rows)
 
 
-def update_iv_for_symbol(db: Session, watch: Watchlist):
+async def update_iv_for_symbol(client: httpx.AsyncClient, watch_id: int, symbol: str) -> int:
     """
-    Fetch and insert only new IV history rows for the given watchlist entry.
+    Fetch, parse and upsert IV history rows for the given watchlist entry: new
+    (contract, date) rows are inserted and already-stored ones get the latest values.
+
+    Returns:
+    - the number of rows written
+    """
+    logger.info("→ Processing %s (id=%d)", symbol, watch_id)
+    t0 = time.perf_counter()
+    try:
+        raw_data = await fetch_historical_options(client, symbol)
+        IV_RECORDS_FETCHED.labels(symbol=symbol).inc(len(raw_data))
+        logger.info("   Fetched %d raw records for %s", len(raw_data), symbol)
+        if not raw_data:
+            logger.warning("   No data to process for %s", symbol)
+            return 0
+
+        records = parse_option_records(raw_data)
+        stored = await asyncio.to_thread(store_iv_records, watch_id, symbol, records)
+        IV_RECORDS_STORED.labels(symbol=symbol).inc(stored)
+        return stored
+    finally:
+        IV_SYMBOL_SECONDS.labels(symbol=symbol).observe(time.perf_counter() - t0)
+
+
+async def update_all_iv_history_async():
     """
-    logger.info("→ Processing %s (id=%d)", watch.symbol, watch.id)
-
-    # 1️⃣ See how far we've already got
-    last_date = get_last_iv_date(db, watch)
-    logger.info("   Last stored date for %s: %s", watch.symbol, last_date.date())
-
-    # 2️⃣ Fetch raw option data
-    raw_data = fetch_historical_options(watch.symbol)
-    logger.info("   Fetched %d raw records", len(raw_data))
-    if not raw_data:
-        logger.warning("   No data to process for %s", watch.symbol)
-        return
-
-    # 3️⃣ Parse & collect only new records
-    new_records: List[IvHistory] = []
-    for raw in raw_data:
-        # skip any records on-or-before last_date
-        try:
-            rec_date = datetime.strptime(raw["date"], "%Y-%m-%d")
-        except Exception:
-            continue
-        if rec_date <= last_date:
-            continue
-
-        record = parse_option_record(raw)
-        if not record:
-            continue
-
-        # attach FK and symbol
-        record.watchlist_id = watch.id
-        record.symbol       = watch.symbol
-        new_records.append(record)
-
-    logger.info("   %d new records to insert", len(new_records))
-    if not new_records:
-        return
-
-    # 4️⃣ Bulk-add and commit
-    db.add_all(new_records)
-    db.commit()
-    logger.info("   ✔ inserted %d new IV records for %s", len(new_records), watch.symbol)
+    Update every active, IV-tracked symbol, a bounded number of symbols at a time.
+    """
+    def load_watches():
+        with SessionLocal() as db:
+            return (
+                db.query(Watchlist.id, Watchlist.symbol)
+                  .filter(Watchlist.track_iv.is_(True), Watchlist.is_active.is_(True))
+                  .all()
+            )
+
+    watches = await asyncio.to_thread(load_watches)
+    logger.info("Found %d symbols to update: %s", len(watches), [symbol for _, symbol in watches])
+
+    semaphore = asyncio.Semaphore(IV_INGEST_CONCURRENCY)
+
+    async def run(client: httpx.AsyncClient, watch_id: int, symbol: str):
+        async with semaphore:
+            try:
+                await update_iv_for_symbol(client, watch_id, symbol)
+            except Exception as e:
+                logger.exception("Failed updating IV for %s: %s", symbol, e)
+
+    async with httpx.AsyncClient() as client:
+        await asyncio.gather(*(run(client, watch_id, symbol) for watch_id, symbol in watches))
 
 
 def update_all_iv_history():
     """
     Main entrypoint: finds every active, IV-tracked symbol and updates its history.
     """
-    with SessionLocal() as db:
-        watches = (
-            db.query(Watchlist)
-              .filter(Watchlist.track_iv.is_(True), Watchlist.is_active.is_(True))
-              .all()
-        )
-        symbols = [w.symbol for w in watches]
-        logger.info("Found %d symbols to update: %s", len(watches), symbols)
-
-        for watch in watches:
-            try:
-                update_iv_for_symbol(db, watch)
-            except Exception as e:
-                logger.exception("Failed updating IV for %s: %s", watch.symbol, e)
+    asyncio.run(update_all_iv_history_async())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.watchlist import Watchlist
+from app.domain.iv_metrics import compute_iv_rank
+from app.services.get_iv_series import get_iv_between, get_iv_series
+from app.adapters.response_models import IvPoint, IvRank
+
+async def _watch_id(db: AsyncSession, symbol: str) -> Optional[int]:
+    stmt = select(Watchlist.id).where(Watchlist.symbol == symbol.upper())
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+async def get_iv_rank_for_symbol(db: AsyncSession, symbol: str, lookback_days: int = 252) -> Optional[IvRank]:
+    """
+    IV rank / percentile from the daily aggregates. None if the symbol has no IV data.
+    """
+    watch_id = await _watch_id(db, symbol)
+    if watch_id is None:
+        return None
+
+    series = await get_iv_series(db, watch_id, lookback_days)
+    if series.empty:
+        return None
+
+    stats = compute_iv_rank(series["iv"])
+    return IvRank(symbol=symbol.upper(), lookback_days=lookback_days, observations=len(series), **stats)
+
+async def get_iv_points_for_symbol(db: AsyncSession, symbol: str, lookback_days: int = 252) -> Optional[list[IvPoint]]:
+    """
+    Daily IV series for the symbol, oldest first. None if the symbol is not on the watchlist.
+    """
+    watch_id = await _watch_id(db, symbol)
+    if watch_id is None:
+        return None
+
+    series = await get_iv_series(db, watch_id, lookback_days)
+    return [IvPoint(date=date, iv=iv) for date, iv in series["iv"].items()]
+
+async def get_iv_history_for_symbol(db: AsyncSession, symbol: str, start: datetime, end: datetime) -> Optional[pd.Series]:
+    """
+    Daily median IV between two dates, indexed by date. None if the symbol is not on the watchlist.
+    """
+    watch_id = await _watch_id(db, symbol)
+    if watch_id is None:
+        return None
+    return await get_iv_between(db, watch_id, start, end)
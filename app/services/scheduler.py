@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from sqlalchemy import select, update
+
+from app.db.session import AsyncSessionLocal, dispose_async_engine, init_async_engine
+from app.db.upsert import insert_missing_statement
+from app.db.models.watchlist import Watchlist
+from app.db.models.job_task import JobTask
+from app.domain.market_calendar import last_market_close, next_market_close
+from app.infrastructure.alpaca_client import close_client, fetch_bars
+from app.infrastructure.metrics import JOB_TASKS, span
+from app.infrastructure.process_pool import shutdown_executor
+from app.services.hmm_service import get_regimes_frame
+from app.services.iv_history_builder import update_iv_for_symbol
+from app.services.signal_snapshot_builder import refresh_symbol_snapshot
+from app.services.trend_service import get_trend_frame
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Run inside the API process; keep it off when several API workers share a database
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+# Daily bars (and the IV end-of-day data) are final a little after the close
+SCHEDULER_CLOSE_DELAY = timedelta(minutes=float(os.getenv("SCHEDULER_CLOSE_DELAY_MINUTES", "30")))
+# History kept fresh by the bar refresh and refit jobs
+SCHEDULER_HISTORY_DAYS = int(os.getenv("SCHEDULER_HISTORY_DAYS", "730"))
+# Component counts the refit job fits the history window with, e.g. "2,3,4"
+SCHEDULER_COMPONENTS = [int(n) for n in os.getenv("SCHEDULER_COMPONENTS", "3").split(",") if n.strip()]
+SCHEDULER_MAX_ATTEMPTS = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", "3"))
+SCHEDULER_RETRY_BACKOFF = float(os.getenv("SCHEDULER_RETRY_BACKOFF_SECONDS", "30"))
+
+class Job:
+    """
+    A job run once per market session as one task per watchlist symbol.
+
+    Parameters:
+    - name: Job name, as stored in JobTask
+    - run: Coroutine function doing the work for one (watchlist id, symbol)
+    - concurrency: Tasks of this job running at the same time
+    - iv_only: Only the symbols with `track_iv` set
+    """
+
+    def __init__(self, name: str, run: Callable[[int, str], Awaitable[None]], concurrency: int, iv_only: bool = False):
+        self.name = name
+        self.run = run
+        self.concurrency = concurrency
+        self.iv_only = iv_only
+
+
+def history_window() -> Tuple[str, str]:
+    """
+    Window refreshed by the bar and refit jobs, and the one clients should query to get
+    the precomputed regimes. Its start stays on the first of a month, so from one session
+    to the next the bars only grow and the trend trackers (and, with HMM_WARM_START, the
+    fits) can warm-start.
+    """
+    today = datetime.now(timezone.utc).date()
+    start = (today - timedelta(days=SCHEDULER_HISTORY_DAYS)).replace(day=1)
+    return start.isoformat(), today.isoformat()
+
+
+async def ingest_iv(watch_id: int, symbol: str) -> None:
+    async with httpx.AsyncClient() as client:
+        await update_iv_for_symbol(client, watch_id, symbol)
+
+
+async def refresh_bars(watch_id: int, symbol: str) -> None:
+    start, end = history_window()
+    await fetch_bars(symbol, start, end)
+
+
+async def warm_refit(watch_id: int, symbol: str) -> None:
+    """
+    Fit and register the `history_window()` bars for each of `SCHEDULER_COMPONENTS`,
+    and extend the trend tracker of that window.
+
+    Only requests for exactly that window (start on `history_window()[0]`, end today)
+    and those component counts are served from this work the next morning: their bars
+    have the same fingerprint, so they only decode the registered fit. Other windows
+    still fit on first request. The registry is per process unless HMM_MODEL_CACHE_DIR
+    is shared by the API workers. (The screener's window is kept fresh by the
+    signal_snapshot job.)
+    """
+    start, end = history_window()
+    for components in SCHEDULER_COMPONENTS:
+        await get_regimes_frame(symbol, start, end, components)
+    await get_trend_frame(symbol, start, end)
+
+
+# In run order: later jobs read what the earlier ones stored
+JOBS: List[Job] = [
+    Job("iv_ingest", ingest_iv, int(os.getenv("SCHEDULER_IV_CONCURRENCY", "4")), iv_only=True),
+    Job("bar_refresh", refresh_bars, int(os.getenv("SCHEDULER_BAR_CONCURRENCY", "8"))),
+    Job("hmm_refit", warm_refit, int(os.getenv("SCHEDULER_REFIT_CONCURRENCY", "4"))),
+    Job("signal_snapshot", refresh_symbol_snapshot, int(os.getenv("SCHEDULER_SNAPSHOT_CONCURRENCY", "4"))),
+]
+
+
+def _session_key(session: date) -> datetime:
+    return datetime(session.year, session.month, session.day)
+
+
+async def _create_tasks(job: Job, session: date) -> None:
+    query = select(Watchlist.id, Watchlist.symbol).where(Watchlist.is_active.is_(True))
+    if job.iv_only:
+        query = query.where(Watchlist.track_iv.is_(True))
+    async with AsyncSessionLocal() as db:
+        targets = (await db.execute(query)).all()
+        if targets:
+            rows = [{"job": job.name, "session_date": _session_key(session), "symbol": symbol, "watchlist_id": watch_id}
+                    for watch_id, symbol in targets]
+            await db.execute(insert_missing_statement(JobTask, db.get_bind().dialect.name, ["job", "session_date", "symbol"]), rows)
+            await db.commit()
+
+
+async def _set_task(task_id: int, **values) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(JobTask).where(JobTask.id == task_id).values(**values))
+        await db.commit()
+
+
+async def run_job(job: Job, session: date, max_attempts: int = SCHEDULER_MAX_ATTEMPTS,
+                  backoff: float = SCHEDULER_RETRY_BACKOFF) -> Dict[str, int]:
+    """
+    Run the unfinished tasks of `job` for `session`, `job.concurrency` at a time.
+
+    Tasks already succeeded (e.g. before a restart) are skipped; a failing task is retried
+    with exponential backoff up to `max_attempts` attempts in total, counting earlier runs.
+
+    Returns:
+    - number of tasks per final status
+    """
+    await _create_tasks(job, session)
+    async with AsyncSessionLocal() as db:
+        tasks = (await db.execute(
+            select(JobTask.id, JobTask.watchlist_id, JobTask.symbol, JobTask.attempts)
+            .where(JobTask.job == job.name, JobTask.session_date == _session_key(session), JobTask.status != "succeeded")
+        )).all()
+
+    semaphore = asyncio.Semaphore(job.concurrency)
+
+    async def run_task(task_id: int, watch_id: int, symbol: str, attempts: int) -> str:
+        async with semaphore:
+            while attempts < max_attempts:
+                attempts += 1
+                await _set_task(task_id, status="running", attempts=attempts, started_at=datetime.utcnow())
+                try:
+                    await job.run(watch_id, symbol)
+                except Exception as e:
+                    logger.warning("%s failed for %s (attempt %d/%d): %s", job.name, symbol, attempts, max_attempts, e)
+                    await _set_task(task_id, status="failed", last_error=str(e)[:1000], finished_at=datetime.utcnow())
+                    if attempts < max_attempts:
+                        await asyncio.sleep(backoff * 2 ** (attempts - 1))
+                    continue
+                await _set_task(task_id, status="succeeded", last_error=None, finished_at=datetime.utcnow())
+                JOB_TASKS.labels(job=job.name, status="succeeded").inc()
+                return "succeeded"
+        JOB_TASKS.labels(job=job.name, status="failed").inc()
+        return "failed"
+
+    with span(f"job_{job.name}"):
+        results = await asyncio.gather(*(run_task(*task) for task in tasks))
+    counts = {status: results.count(status) for status in ("succeeded", "failed")}
+    logger.info("%s for %s: %s", job.name, session, counts)
+    return counts
+
+
+async def run_session(session: date, jobs: Optional[List[Job]] = None) -> None:
+    for job in jobs or JOBS:
+        try:
+            await run_job(job, session)
+        except Exception as e:
+            logger.exception("%s for %s stopped: %s", job.name, session, e)
+
+
+class Scheduler:
+    """
+    Runs the jobs after every market close (plus `SCHEDULER_CLOSE_DELAY`). On start it
+    first catches up on the last session, which only runs the tasks that did not succeed.
+    """
+
+    def __init__(self, jobs: Optional[List[Job]] = None):
+        self.jobs = jobs or JOBS
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            now = datetime.now(timezone.utc)
+            await run_session(last_market_close(now - SCHEDULER_CLOSE_DELAY).date(), self.jobs)
+            wake = next_market_close(datetime.now(timezone.utc) - SCHEDULER_CLOSE_DELAY) + SCHEDULER_CLOSE_DELAY
+            await asyncio.sleep(max((wake - datetime.now(timezone.utc)).total_seconds(), 0))
+
+
+scheduler = Scheduler()
+
+
+async def start_scheduler() -> None:
+    """
+    Start the in-process scheduler when enabled and a database is configured. Called from the app lifespan.
+    """
+    if SCHEDULER_ENABLED and init_async_engine() is not None:
+        await scheduler.start()
+
+
+async def _main(job_names: Optional[List[str]], once: bool) -> None:
+    if init_async_engine() is None:
+        raise RuntimeError("DATABASE_URL is not set")
+    jobs = [job for job in JOBS if not job_names or job.name in job_names]
+    try:
+        if once:
+            await run_session(last_market_close(datetime.now(timezone.utc) - SCHEDULER_CLOSE_DELAY).date(), jobs)
+        else:
+            await Scheduler(jobs)._run()
+    finally:
+        await close_client()
+        await dispose_async_engine()
+        shutdown_executor()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Run the post-close jobs (as a sidecar, or once from cron)")
+    parser.add_argument("--jobs", nargs="*", choices=[job.name for job in JOBS], help="jobs to run (default: all)")
+    parser.add_argument("--once", action="store_true", help="run the last session and exit")
+    args = parser.parse_args()
+    asyncio.run(_main(args.jobs, args.once))
@@ -0,0 +1,83 @@
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.watchlist import Watchlist
+from app.db.models.signal_snapshot import SignalSnapshot
+from app.adapters.response_models import ScreenerRow
+
+# Watchlist attributes a screen can filter on (all indexed)
+ATTRIBUTE_COLUMNS = {
+    "category": Watchlist.category,
+    "sector": Watchlist.sector,
+    "industry": Watchlist.industry,
+    "asset_class": Watchlist.asset_class,
+    "region": Watchlist.region,
+}
+
+SORT_COLUMNS = {
+    "symbol": SignalSnapshot.symbol,
+    "close": SignalSnapshot.close,
+    "regime_vol": SignalSnapshot.regime_vol,
+    "iv": SignalSnapshot.iv,
+    "iv_rank": SignalSnapshot.iv_rank,
+    "iv_percentile": SignalSnapshot.iv_percentile,
+    "as_of": SignalSnapshot.as_of,
+}
+
+ROW_COLUMNS = (
+    SignalSnapshot.symbol, Watchlist.name, Watchlist.category, Watchlist.sector, Watchlist.industry,
+    Watchlist.asset_class, Watchlist.region, SignalSnapshot.as_of, SignalSnapshot.close,
+    SignalSnapshot.trend_bias, SignalSnapshot.regime, SignalSnapshot.regime_level, SignalSnapshot.regime_vol,
+    SignalSnapshot.iv, SignalSnapshot.iv_rank, SignalSnapshot.iv_percentile, SignalSnapshot.updated_at,
+)
+
+async def screen_watchlist(
+    db: AsyncSession,
+    attributes: Optional[dict] = None,
+    trend_bias: Optional[List[str]] = None,
+    regime_level: Optional[List[str]] = None,
+    min_iv_rank: Optional[float] = None,
+    max_iv_rank: Optional[float] = None,
+    sort: str = "symbol",
+    descending: bool = False,
+    limit: int = 100,
+    offset: int = 0,
+) -> List[ScreenerRow]:
+    """
+    Active watchlist symbols whose latest snapshot matches every filter, in one query.
+
+    Parameters:
+    - attributes: Watchlist attribute name (see `ATTRIBUTE_COLUMNS`) -> accepted values
+    - trend_bias / regime_level: Accepted values; None accepts any
+    - min_iv_rank / max_iv_rank: Inclusive IV rank bounds; symbols without IV never match them
+    - sort: Key of `SORT_COLUMNS`; missing values sort last in both directions
+
+    Returns:
+    - list of ScreenerRow
+    """
+    stmt = (
+        select(*ROW_COLUMNS)
+        .join(Watchlist, Watchlist.id == SignalSnapshot.watchlist_id)
+        .where(Watchlist.is_active.is_(True))
+    )
+    for name, values in (attributes or {}).items():
+        if values:
+            stmt = stmt.where(ATTRIBUTE_COLUMNS[name].in_(values))
+    if trend_bias:
+        stmt = stmt.where(SignalSnapshot.trend_bias.in_(trend_bias))
+    if regime_level:
+        stmt = stmt.where(SignalSnapshot.regime_level.in_(regime_level))
+    if min_iv_rank is not None:
+        stmt = stmt.where(SignalSnapshot.iv_rank >= min_iv_rank)
+    if max_iv_rank is not None:
+        stmt = stmt.where(SignalSnapshot.iv_rank <= max_iv_rank)
+
+    column = SORT_COLUMNS[sort]
+    order = column.desc() if descending else column.asc()
+    # symbol breaks ties so pages are stable
+    stmt = stmt.order_by(order.nulls_last(), SignalSnapshot.symbol).limit(limit).offset(offset)
+
+    rows = (await db.execute(stmt)).mappings().all()
+    return [ScreenerRow(**row) for row in rows]
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from app.infrastructure.alpaca_client import fetch_bars
+from app.infrastructure.metrics import observe_hmm_fit
+from app.infrastructure.process_pool import run_in_pool
+from app.domain.hmm_model import RegimeTracker, compute_hmm_with_params, split_fit_stats
+from app.domain.trend_engine import TrendTracker
+from app.adapters.response_models import SignalEvent
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "60"))
+# History used to seed the indicators and fit the regime model when a symbol is first watched
+STREAM_HISTORY_DAYS = int(os.getenv("STREAM_HISTORY_DAYS", "730"))
+STREAM_COMPONENTS = int(os.getenv("STREAM_COMPONENTS", "3"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+
+
+class _SymbolSignals:
+    def __init__(self, trend: TrendTracker, regimes: RegimeTracker, close: float):
+        self.trend = trend
+        self.regimes = regimes
+        self.close = close
+
+    def event(self, symbol: str, kind: str) -> SignalEvent:
+        return SignalEvent(
+            event=kind,
+            symbol=symbol,
+            date=self.trend.times[-1],
+            close=self.close,
+            trend_bias=self.trend.bias,
+            regime=self.regimes.regime,
+        )
+
+
+class SignalHub:
+    """
+    Shares one computation per watched symbol across every subscriber.
+
+    A single background task polls new bars for the symbols that have subscribers,
+    updates the trend and regime trackers incrementally and pushes an event to each
+    subscriber queue only when the trend bias or the regime changes.
+    """
+
+    def __init__(self, poll_seconds: float = STREAM_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._signals: Dict[str, _SymbolSignals] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            # bound to the running loop, like the task itself
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def subscribe(self, symbols: List[str]) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        for symbol in symbols:
+            self._subscribers.setdefault(symbol, set()).add(queue)
+            if symbol in self._signals:
+                self._deliver(queue, self._signals[symbol].event(symbol, "snapshot"))
+        # seed newly watched symbols without waiting for the next poll
+        if self._wake is not None:
+            self._wake.set()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        for symbol in list(self._subscribers):
+            self._subscribers[symbol].discard(queue)
+            if not self._subscribers[symbol]:
+                # nobody watches it any more: the next subscriber seeds it again
+                del self._subscribers[symbol]
+                self._signals.pop(symbol, None)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: SignalEvent) -> None:
+        # A slow client loses its oldest events rather than stalling everyone else
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def _publish(self, symbol: str, event: SignalEvent) -> None:
+        for queue in self._subscribers.get(symbol, ()):
+            self._deliver(queue, event)
+
+    async def refresh(self, symbol: str) -> None:
+        """
+        Bring one symbol up to date and publish what changed.
+        """
+        now = datetime.now(timezone.utc)
+        signals = self._signals.get(symbol)
+
+        if signals is None:
+            start = (now - timedelta(days=STREAM_HISTORY_DAYS)).strftime("%Y-%m-%d")
+            df = await fetch_bars(symbol, start, now.strftime("%Y-%m-%dT%H:%M:%SZ"))
+            trend = TrendTracker()
+            trend.extend(df)
+            # events only need the last bar; the indicator state carries the rest
+            trend.trim()
+            # Fit up to the previous bar and filter the last one, so that it can be revised later
+            _, state = await run_in_pool(compute_hmm_with_params, df.iloc[:-1].copy(), n_components=STREAM_COMPONENTS)
+            observe_hmm_fit(split_fit_stats(state), kind="full")
+            regimes = RegimeTracker(state, df["close"].iloc[:-1])
+            regimes.push(df.index[-1], df["close"].iloc[-1])
+            signals = _SymbolSignals(trend, regimes, float(df["close"].iloc[-1]))
+            if symbol not in self._subscribers:
+                # unsubscribed while seeding
+                return
+            self._signals[symbol] = signals
+            self._publish(symbol, signals.event(symbol, "snapshot"))
+            return
+
+        # Re-read from the last bar so a still-forming bar is revised
+        last = signals.trend.times[-1]
+        df = await fetch_bars(symbol, last.strftime("%Y-%m-%dT%H:%M:%SZ"), now.strftime("%Y-%m-%dT%H:%M:%SZ"))
+        before = (signals.trend.bias, signals.regimes.regime)
+        for t, close in df["close"].loc[last:].items():
+            if t == last and close == signals.close:
+                continue
+            signals.trend.push(t, close)
+            signals.regimes.push(t, close)
+            signals.close = float(close)
+        signals.trend.trim()
+
+        if (signals.trend.bias, signals.regimes.regime) != before:
+            self._publish(symbol, signals.event(symbol, "change"))
+
+    async def _refresh_safe(self, symbol: str) -> None:
+        try:
+            await self.refresh(symbol)
+        except Exception as e:
+            logger.exception("Signal refresh failed for %s: %s", symbol, e)
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            await asyncio.gather(*(self._refresh_safe(symbol) for symbol in list(self._subscribers)))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+signal_hub = SignalHub()
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal, dispose_async_engine, init_async_engine
+from app.db.upsert import upsert_statement
+from app.db.models.watchlist import Watchlist
+from app.db.models.signal_snapshot import SignalSnapshot
+from app.domain.iv_metrics import compute_iv_rank
+from app.domain.signal_snapshot import regime_snapshot
+from app.infrastructure.alpaca_client import close_client, fetch_bars
+from app.infrastructure.metrics import span
+from app.infrastructure.process_pool import shutdown_executor
+from app.services.get_iv_series import get_iv_series
+from app.services.hmm_service import label_regimes_with_params
+from app.services.trend_service import trend_frame
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Seconds between refreshes when run inside the API; 0 leaves it to the standalone job
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "0"))
+SNAPSHOT_HISTORY_DAYS = int(os.getenv("SNAPSHOT_HISTORY_DAYS", "730"))
+SNAPSHOT_COMPONENTS = int(os.getenv("SNAPSHOT_COMPONENTS", "3"))
+SNAPSHOT_IV_LOOKBACK = int(os.getenv("SNAPSHOT_IV_LOOKBACK", "252"))
+# Symbols processed at the same time; the fits themselves are bounded by the process pool
+SNAPSHOT_CONCURRENCY = int(os.getenv("SNAPSHOT_CONCURRENCY", "8"))
+
+UPDATE_COLUMNS = ["symbol", "as_of", "close", "trend_bias", "regime", "regime_level", "regime_vol",
+                  "n_regimes", "iv", "iv_rank", "iv_percentile", "updated_at"]
+
+
+async def _iv_signals(db: AsyncSession, watch_id: int) -> dict:
+    series = await get_iv_series(db, watch_id, SNAPSHOT_IV_LOOKBACK)
+    if series.empty:
+        return {"iv": None, "iv_rank": None, "iv_percentile": None}
+    stats = compute_iv_rank(series["iv"])
+    return {"iv": stats["iv"], "iv_rank": stats["iv_rank"], "iv_percentile": stats["iv_percentile"]}
+
+
+async def snapshot_symbol(db: AsyncSession, watch_id: int, symbol: str, start: str, end: str) -> Optional[dict]:
+    """
+    Current signals of one symbol as a SignalSnapshot row, or None when it has no bars.
+    """
+    df = await fetch_bars(symbol, start, end)
+    if df.empty:
+        return None
+
+    trend = trend_frame(symbol, df).dropna(subset=["trend_bias"])
+    # the same registered fit the regimes endpoint decodes these bars with
+    labeled_df, params = await label_regimes_with_params(symbol, df, SNAPSHOT_COMPONENTS)
+    regime = regime_snapshot(labeled_df, params)
+
+    return {
+        "watchlist_id": watch_id,
+        "symbol": symbol,
+        "as_of": df.index[-1].tz_convert(None).to_pydatetime(),
+        "close": float(df["close"].iloc[-1]),
+        "trend_bias": trend["trend_bias"].iloc[-1] if len(trend) else None,
+        **regime,
+        **await _iv_signals(db, watch_id),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def snapshot_window() -> Tuple[str, str]:
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=SNAPSHOT_HISTORY_DAYS)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+async def store_snapshots(db: AsyncSession, rows: List[dict]) -> None:
+    await db.execute(
+        upsert_statement(SignalSnapshot, db.get_bind().dialect.name, ["watchlist_id"], UPDATE_COLUMNS),
+        rows,
+    )
+    await db.commit()
+
+
+async def refresh_symbol_snapshot(watch_id: int, symbol: str) -> None:
+    """
+    Recompute and store the snapshot of one symbol (a scheduler task).
+    """
+    start, end = snapshot_window()
+    async with AsyncSessionLocal() as db:
+        row = await snapshot_symbol(db, watch_id, symbol, start, end)
+        if row is not None:
+            await store_snapshots(db, [row])
+
+
+async def refresh_signal_snapshots() -> int:
+    """
+    Recompute the snapshot of every active watchlist symbol and upsert them in one statement.
+    A symbol that fails keeps its previous snapshot.
+    """
+    if init_async_engine() is None:
+        raise RuntimeError("DATABASE_URL is not set")
+
+    start, end = snapshot_window()
+    async with AsyncSessionLocal() as db:
+        watches = (await db.execute(
+            select(Watchlist.id, Watchlist.symbol).where(Watchlist.is_active.is_(True))
+        )).all()
+    logger.info("Refreshing signal snapshots of %d symbols", len(watches))
+
+    semaphore = asyncio.Semaphore(SNAPSHOT_CONCURRENCY)
+
+    async def run(watch_id: int, symbol: str) -> Optional[dict]:
+        async with semaphore:
+            try:
+                # one session per symbol: an AsyncSession cannot be shared by concurrent tasks
+                async with AsyncSessionLocal() as db:
+                    return await snapshot_symbol(db, watch_id, symbol, start, end)
+            except Exception as e:
+                logger.exception("Failed refreshing the snapshot of %s: %s", symbol, e)
+                return None
+
+    with span("snapshot_refresh"):
+        rows = [row for row in await asyncio.gather(*(run(*watch) for watch in watches)) if row is not None]
+        if rows:
+            async with AsyncSessionLocal() as db:
+                await store_snapshots(db, rows)
+
+    logger.info("Stored %d signal snapshots", len(rows))
+    return len(rows)
+
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+async def _refresh_loop(interval: float) -> None:
+    while True:
+        try:
+            await refresh_signal_snapshots()
+        except Exception as e:
+            logger.exception("Signal snapshot refresh failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+async def start_snapshot_refresh(interval: float = SNAPSHOT_REFRESH_SECONDS) -> None:
+    """
+    Refresh the snapshots every `interval` seconds in the background. Called from the app
+    lifespan; does nothing when the interval is 0 or no database is configured.
+    """
+    global _refresh_task
+    if _refresh_task is None and interval > 0 and init_async_engine() is not None:
+        _refresh_task = asyncio.create_task(_refresh_loop(interval))
+
+
+async def stop_snapshot_refresh() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+    _refresh_task = None
+
+
+async def _main() -> None:
+    try:
+        await refresh_signal_snapshots()
+    finally:
+        await close_client()
+        await dispose_async_engine()
+        shutdown_executor()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_main())
@@ -1,12 +1,99 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
 from app.infrastructure.alpaca_client import fetch_bars
-from app.domain.ta_indicators_model import compute_trend_bias
-from app.adapters.response_models import TrendPoint
+from app.infrastructure.bar_cache import to_utc
+from app.infrastructure.metrics import span
+from app.infrastructure.single_flight import SingleFlight
+from app.domain.ta_indicators_model import BIAS_LABELS, compute_trend_bias_matrix
+from app.domain.trend_engine import TrendTracker
+from app.adapters.response_models import TrendPoint, TrendSnapshot
+
+load_dotenv()
+
+TREND_TRACKER_CACHE_SIZE = int(os.getenv("TREND_TRACKER_CACHE_SIZE", "1024"))
+
+# Incremental trackers keyed by (symbol, timeframe, first bar); a request whose bars extend a
+# tracked series only processes the new bars instead of the full history.
+_trackers: "OrderedDict[tuple, TrendTracker]" = OrderedDict()
+
+# Identical concurrent requests share one download and one computation
+_trend_flights = SingleFlight()
+
+def trend_frame(symbol: str, df: pd.DataFrame, timeframe: str = "1D") -> pd.DataFrame:
+    """
+    `compute_trend_bias` output for `df`, computed incrementally from the tracked state.
+    """
+    key = (symbol.upper(), timeframe, df.index[0] if len(df) else None)
+    tracker = _trackers.get(key)
+    n = tracker.common_prefix(df) if tracker is not None else 0
+
+    # The tracked bars must be a prefix of `df`, except possibly for a revised last bar
+    reusable = tracker is not None and (
+        len(df) <= n or n == len(tracker) or (n == len(tracker) - 1 and df.index[n] == tracker.times[-1])
+    )
+    if not reusable:
+        tracker, n = TrendTracker(), 0
+    if len(df) > n:
+        tracker.extend(df.iloc[n:])
+
+    _trackers[key] = tracker
+    _trackers.move_to_end(key)
+    while len(_trackers) > TREND_TRACKER_CACHE_SIZE:
+        _trackers.popitem(last=False)
+
+    return tracker.frame(len(df))
+
+async def get_trend_frame(symbol: str, start: str, end: str, timeframe: str = "1D") -> pd.DataFrame:
+    """
+    Bars with their trend bias, as returned by `compute_trend_bias`.
+    Concurrent calls for the same arguments share one result, which must not be mutated.
+    """
+    async def compute() -> pd.DataFrame:
+        df = await fetch_bars(symbol, start, end, timeframe)
+        with span("trend_bias"):
+            return trend_frame(symbol, df, timeframe)
+
+    return await _trend_flights.do((symbol.upper(), to_utc(start), to_utc(end), timeframe), compute)
+
+async def get_trend_for_symbol(symbol: str, start: str, end: str, timeframe: str = "1D") -> list[TrendPoint]:
+    df = await get_trend_frame(symbol, start, end, timeframe)
+
+    with span("serialise"):
+        return [
+            TrendPoint(date=row["t"], close=row["close"], trend_bias=row["trend_bias"])
+            for row in df.dropna(subset=["trend_bias"]).to_dict(orient="records")
+        ]
+
+async def get_latest_trend_bias(symbols: List[str], start: str, end: str) -> list[TrendSnapshot]:
+    """
+    Latest trend bias for many symbols, computed in one pass over the aligned close matrix.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    if not symbols:
+        return []
+    frames = await asyncio.gather(*(fetch_bars(symbol, start, end) for symbol in symbols))
+    closes = pd.concat({symbol: df["close"] for symbol, df in zip(symbols, frames)}, axis=1).sort_index()
+
+    matrix = closes.to_numpy(dtype="float64")
+    if len(matrix) == 0:
+        # none of the symbols has bars in the window
+        return []
+    with span("trend_bias_matrix"):
+        bias = compute_trend_bias_matrix(matrix)["bias"]
 
-async def get_trend_for_symbol(symbol: str, start: str, end: str) -> list[TrendPoint]:
-    df = await fetch_bars(symbol, start, end)
-    df = compute_trend_bias(df)
+    # Each symbol's last bar, which may be earlier than the matrix end
+    has_bar = ~np.isnan(matrix)
+    last_rows = len(matrix) - 1 - np.argmax(has_bar[::-1], axis=0)
 
     return [
-        TrendPoint(date=row["t"], close=row["close"], trend_bias=row["trend_bias"])
-        for row in df.dropna(subset=["trend_bias"]).to_dict(orient="records")
+        TrendSnapshot(symbol=symbol, date=closes.index[row], close=matrix[row, j], trend_bias=BIAS_LABELS[int(bias[row, j])])
+        for j, (symbol, row) in enumerate(zip(symbols, last_rows))
+        if has_bar[:, j].any()
     ]
@@ -0,0 +1,253 @@
+"""
+Benchmarks for the indicator, HMM, serialisation and endpoint hot paths.
+
+Runs fully offline: prices are synthetic GBM paths and Alpaca is replaced by a local
+httpx transport. Usage (from the repository root):
+
+    python -m benchmarks.run                   # run and compare with the saved baseline
+    python -m benchmarks.run --save            # run and record a new baseline
+    python -m benchmarks.run --quick -k hmm    # fewer repeats, only cases matching 'hmm'
+
+A case is flagged as a regression when its median is more than `--threshold` slower
+than the baseline median; the exit status is then 1. Baselines are machine specific,
+so record one on the machine you compare on.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import httpx
+import numpy as np
+import pandas as pd
+from pydantic import TypeAdapter
+
+from app.adapters.columnar import to_arrow_ipc, to_columnar_json
+from app.adapters.response_models import RegimePoint, TrendPoint
+from app.api import caching
+from app.domain.hmm_model import compute_hmm
+from app.domain.ta_indicators_model import compute_trend_bias, compute_trend_bias_matrix
+from app.infrastructure import alpaca_client
+from app.infrastructure.bar_cache import BarStore
+from app.infrastructure.feature_cache import FeatureCache
+from app.infrastructure.model_registry import ModelRegistry
+from app.infrastructure.process_pool import shutdown_executor
+from app.infrastructure.response_cache import MemoryBackend, ResponseCache
+from app.main import app
+from app.services import hmm_service, trend_service
+from benchmarks.synthetic import alpaca_transport, gbm_bars
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "baseline.json"
+
+Case = Callable[[], None]
+
+
+def measure(fn: Case, repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Wall time of `repeat` calls of `fn` after `warmup` untimed ones, in seconds.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {
+        "median": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "min": samples[0],
+        "repeat": repeat,
+    }
+
+
+# -- cases ---------------------------------------------------------------------
+
+def trend_cases() -> Dict[str, Case]:
+    cases = {}
+    for n in (1_000, 10_000):
+        df = gbm_bars(n)[["close"]]
+        cases[f"trend_bias[n={n}]"] = lambda df=df: compute_trend_bias(df.copy())
+
+    closes = np.column_stack([gbm_bars(2_000, seed=s)["close"].to_numpy() for s in range(500)])
+    cases["trend_bias_matrix[2000x500]"] = lambda: compute_trend_bias_matrix(closes)
+    return cases
+
+
+def hmm_cases() -> Dict[str, Case]:
+    cases = {}
+    for n in (500, 2_000):
+        # Two volatility regimes so the fits have something to find
+        df = pd.concat([gbm_bars(n // 2, seed=1, sigma=0.12), gbm_bars(n - n // 2, seed=2, sigma=0.45)])
+        df.index = pd.date_range("2000-01-03", periods=n, freq="B", tz="UTC", name="t")
+        df = df[["close"]]
+        for k in (2, 3, 4):
+            cases[f"hmm_fit[n={n},k={k}]"] = lambda df=df, k=k: compute_hmm(df.copy(), n_components=k)
+    return cases
+
+
+def serialisation_cases() -> Dict[str, Case]:
+    n = 10_000
+    df = gbm_bars(n).reset_index()
+    df["regime"] = np.arange(n) % 3
+    df["trend_bias"] = np.array(["bearish", "neutral", "bullish"])[np.arange(n) % 3]
+    regime_points, trend_points = TypeAdapter(List[RegimePoint]), TypeAdapter(List[TrendPoint])
+
+    def regimes_json():
+        points = [RegimePoint(date=row["t"], close=row["close"], regime=row["regime"])
+                  for row in df[["t", "close", "regime"]].to_dict(orient="records")]
+        regime_points.dump_json(points)
+
+    def trend_json():
+        points = [TrendPoint(date=row["t"], close=row["close"], trend_bias=row["trend_bias"])
+                  for row in df[["t", "close", "trend_bias"]].to_dict(orient="records")]
+        trend_points.dump_json(points)
+
+    columns = {"date": df["t"], "close": df["close"], "regime": df["regime"]}
+    return {
+        f"serialise_regimes_json[n={n}]": regimes_json,
+        f"serialise_trend_json[n={n}]": trend_json,
+        f"serialise_columnar[n={n}]": lambda: to_columnar_json(columns),
+        f"serialise_arrow[n={n}]": lambda: to_arrow_ipc(columns),
+    }
+
+
+class EndpointBench:
+    """
+    Concurrent requests against the ASGI app, with Alpaca served by the local stand-in.
+    Every round starts from cold caches so the full path (download, bar store, compute,
+    serialise) is timed.
+    """
+
+    def __init__(self, concurrency: int, n_bars: int = 1_500):
+        self.concurrency = concurrency
+        self.symbols = [f"SYM{i}" for i in range(concurrency)]
+        self.bars = {s: gbm_bars(n_bars, seed=i, start="2018-01-02") for i, s in enumerate(self.symbols)}
+        self.start = self.bars[self.symbols[0]].index[0].strftime("%Y-%m-%d")
+        self.end = self.bars[self.symbols[0]].index[-1].strftime("%Y-%m-%d")
+        self.tmp = tempfile.TemporaryDirectory()
+        self.loop = asyncio.new_event_loop()
+        self.latencies: Dict[str, List[float]] = {}
+
+    def _reset(self) -> None:
+        alpaca_client.bar_store = BarStore(self.tmp.name + f"/{time.perf_counter_ns()}")
+        hmm_service.model_registry = ModelRegistry(cache_dir=None)
+        hmm_service.feature_cache = FeatureCache()
+        trend_service._trackers.clear()
+        caching.response_cache = ResponseCache(MemoryBackend())
+
+    async def _round(self, name: str, url: str, params: Callable[[str], dict]) -> None:
+        self._reset()
+        alpaca_client._client = httpx.AsyncClient(transport=alpaca_transport(self.bars))
+        alpaca_client._in_flight = asyncio.Semaphore(alpaca_client.MAX_IN_FLIGHT)
+
+        async def one(client: httpx.AsyncClient, symbol: str) -> None:
+            t0 = time.perf_counter()
+            resp = await client.get(url, params=params(symbol))
+            resp.raise_for_status()
+            self.latencies.setdefault(name, []).append(time.perf_counter() - t0)
+
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                await asyncio.gather(*(one(client, s) for s in self.symbols))
+        finally:
+            await alpaca_client.close_client()
+
+    def case(self, name: str, url: str, params: Callable[[str], dict]) -> Case:
+        return lambda: self.loop.run_until_complete(self._round(name, url, params))
+
+    def cases(self) -> Dict[str, Case]:
+        c = self.concurrency
+        return {
+            f"endpoint_regimes[c={c}]": self.case(
+                f"endpoint_regimes[c={c}]", "/v1/hmm/regimes",
+                lambda s: {"symbol": s, "start_date": self.start, "end_date": self.end, "components": 2},
+            ),
+            f"endpoint_trend_bias[c={c}]": self.case(
+                f"endpoint_trend_bias[c={c}]", "/v1/trend-bias/",
+                lambda s: {"symbol": s, "start": self.start, "end": self.end},
+            ),
+        }
+
+    def close(self) -> None:
+        self.loop.close()
+        self.tmp.cleanup()
+
+
+# -- runner --------------------------------------------------------------------
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """
+    Names of the cases whose median is more than `threshold` (a fraction) above the baseline.
+    """
+    return [
+        name for name, result in results.items()
+        if name in baseline and result["median"] > baseline[name]["median"] * (1 + threshold)
+    ]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-k", dest="pattern", default="", help="only run cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats, for a smoke run")
+    parser.add_argument("--save", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    repeat = 3 if args.quick else 15
+    endpoints = EndpointBench(args.concurrency)
+    groups = [
+        (trend_cases(), repeat),
+        (serialisation_cases(), repeat),
+        (hmm_cases(), max(2, repeat // 3)),
+        (endpoints.cases(), max(2, repeat // 3)),
+    ]
+
+    results = {}
+    try:
+        for cases, n in groups:
+            for name, fn in cases.items():
+                if args.pattern not in name:
+                    continue
+                fn()
+                endpoints.latencies.pop(name, None)
+                results[name] = measure(fn, n, warmup=0)
+                if name in endpoints.latencies:
+                    lat = sorted(endpoints.latencies.pop(name))
+                    results[name]["request_p50"] = lat[len(lat) // 2]
+                    results[name]["request_p95"] = lat[int(0.95 * (len(lat) - 1))]
+                print(f"{name:<36} median {results[name]['median'] * 1e3:10.2f} ms   p95 {results[name]['p95'] * 1e3:10.2f} ms", flush=True)
+    finally:
+        endpoints.close()
+        shutdown_executor()
+
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else {}
+    regressions = compare(results, baseline, args.threshold)
+    for name in regressions:
+        print(f"REGRESSION {name}: {results[name]['median'] * 1e3:.2f} ms vs baseline {baseline[name]['median'] * 1e3:.2f} ms")
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        saved = {**baseline, **results}
+        args.baseline.write_text(json.dumps({
+            "machine": platform.node(),
+            "python": platform.python_version(),
+            "results": saved,
+        }, indent=2, sort_keys=True))
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
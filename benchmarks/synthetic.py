@@ -0,0 +1,68 @@
+"""
+Offline inputs for the benchmarks: synthetic GBM bars and a local stand-in for the
+Alpaca bars endpoint.
+"""
+import re
+from typing import Dict
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from app.infrastructure.bar_cache import BAR_COLUMNS, to_utc
+
+
+def gbm_bars(n: int, seed: int = 0, start: str = "2000-01-03", freq: str = "B",
+             mu: float = 0.05, sigma: float = 0.2, periods_per_year: int = 252) -> pd.DataFrame:
+    """
+    `n` OHLCV bars following a geometric Brownian motion, in the layout of `fetch_bars`.
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / periods_per_year
+    log_ret = rng.normal((mu - 0.5 * sigma ** 2) * dt, sigma * np.sqrt(dt), n)
+    close = 100 * np.exp(np.cumsum(log_ret))
+    open_ = np.r_[100.0, close[:-1]]
+    spread = np.abs(rng.normal(0, sigma * np.sqrt(dt), n)) * close
+
+    index = pd.date_range(start, periods=n, freq=freq, tz="UTC", name="t")
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.integers(10_000, 1_000_000, n).astype("float64"),
+        "trade_count": rng.integers(100, 10_000, n).astype("float64"),
+        "vwap": (open_ + close) / 2,
+    }, index=index)[BAR_COLUMNS]
+
+
+def _bar_json(df: pd.DataFrame) -> list:
+    t = df.index.strftime("%Y-%m-%dT%H:%M:%SZ")
+    cols = {short: df[name].to_numpy() for short, name in
+            {"o": "open", "h": "high", "l": "low", "c": "close", "v": "volume", "n": "trade_count", "vw": "vwap"}.items()}
+    return [{"t": t[i], **{k: float(v[i]) for k, v in cols.items()}} for i in range(len(df))]
+
+
+def alpaca_transport(bars: Dict[str, pd.DataFrame]) -> httpx.MockTransport:
+    """
+    An httpx transport answering `GET /stocks/{symbol}/bars` from `bars`, with the same
+    start/end/limit/page_token semantics as Alpaca. Unknown symbols get an empty page.
+    """
+    def handler(request: httpx.Request) -> httpx.Response:
+        match = re.search(r"/stocks/([^/]+)/bars$", request.url.path)
+        if match is None:
+            return httpx.Response(404, json={"message": "not found"})
+
+        params = request.url.params
+        df = bars.get(match.group(1).upper())
+        if df is None:
+            return httpx.Response(200, json={"bars": [], "next_page_token": None})
+
+        window = df.loc[to_utc(params["start"]):to_utc(params["end"])]
+        offset = int(params.get("page_token", 0))
+        limit = int(params.get("limit", 1000))
+        page = window.iloc[offset:offset + limit]
+        next_token = str(offset + limit) if offset + limit < len(window) else None
+        return httpx.Response(200, json={"bars": _bar_json(page), "next_page_token": next_token})
+
+    return httpx.MockTransport(handler)
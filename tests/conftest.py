@@ -0,0 +1,61 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.api import caching
+from app.infrastructure.bar_cache import to_utc
+from app.infrastructure.feature_cache import FeatureCache
+from app.infrastructure.model_registry import ModelRegistry
+from app.infrastructure.response_cache import MemoryBackend, ResponseCache
+from app.services import hmm_service
+
+
+def make_regime_bars(*segments, seed: int = 0, start="2022-01-01", columns=("close",)) -> pd.DataFrame:
+    """
+    Synthetic daily bars whose log returns go through one regime per `segments` entry.
+
+    Parameters:
+    - segments: (mean, std, n_bars) of each regime's log returns, drawn in order from one generator
+    - seed: Seed of that generator
+    - start: First bar (UTC)
+    - columns: Bar columns to fill, all with the close (which starts near 100)
+    """
+    rng = np.random.default_rng(seed)
+    returns = np.concatenate([rng.normal(mean, std, n) for mean, std, n in segments])
+    index = pd.date_range(to_utc(start), periods=len(returns), freq="D", name="t")
+    close = 100 * np.exp(np.cumsum(returns))
+    return pd.DataFrame({col: close for col in columns}, index=index)
+
+
+@pytest.fixture
+def regime_bars():
+    """
+    `make_regime_bars`, for tests that need synthetic bars.
+    """
+    return make_regime_bars
+
+
+@pytest.fixture
+def inline_pool():
+    """
+    Stand-in for `run_in_pool` that runs the function in the test process.
+    """
+    async def inline(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    return inline
+
+
+@pytest.fixture
+def fresh_hmm_caches(monkeypatch):
+    """
+    Empty model registry, feature cache, auto component choices and response cache for one test; the shared ones are restored afterwards.
+    """
+    registry = ModelRegistry(cache_dir=None)
+    monkeypatch.setattr(hmm_service, "model_registry", registry)
+    monkeypatch.setattr(hmm_service, "feature_cache", FeatureCache())
+    monkeypatch.setattr(hmm_service, "_auto_components", OrderedDict())
+    monkeypatch.setattr(caching, "response_cache", ResponseCache(MemoryBackend()))
+    return registry
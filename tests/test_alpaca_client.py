@@ -0,0 +1,45 @@
+import asyncio
+
+import httpx
+import pandas as pd
+
+from app.infrastructure import alpaca_client
+from app.infrastructure.bar_cache import to_utc
+
+
+def test_split_windows_covers_range_without_overlap():
+    start, end = to_utc("2024-01-01"), to_utc("2024-03-01")
+    windows = alpaca_client.split_windows(start, end, "1Min")
+
+    assert len(windows) > 1
+    assert windows[0][0] == start and windows[-1][1] == end
+    assert all(prev[1] < nxt[0] for prev, nxt in zip(windows, windows[1:]))
+    assert alpaca_client.split_windows(start, end, "1Day") == [(start, end)]
+
+
+def test_download_bars_stitches_windows_and_pages_in_order(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        start = pd.Timestamp(request.url.params["start"])
+        end = pd.Timestamp(request.url.params["end"])
+        times = pd.date_range(start.ceil("h"), end, freq="h")
+        # Serve each window in two pages to exercise next_page_token
+        half = len(times) // 2
+        page = times[half:] if request.url.params.get("page_token") else times[:half]
+        token = None if request.url.params.get("page_token") else "next"
+        bars = [{"t": t.strftime("%Y-%m-%dT%H:%M:%SZ"), "c": float(i)} for i, t in enumerate(page)]
+        return httpx.Response(200, json={"bars": bars, "next_page_token": token})
+
+    async def run():
+        monkeypatch.setattr(alpaca_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr(alpaca_client, "_in_flight", asyncio.Semaphore(2))
+        monkeypatch.setattr(alpaca_client, "PAGE_LIMIT", 500)
+        try:
+            return await alpaca_client._download_bars("SPY", to_utc("2024-01-01"), to_utc("2024-03-01"), "1Min")
+        finally:
+            await alpaca_client.close_client()
+
+    df = asyncio.run(run())
+
+    expected = pd.date_range("2024-01-01", "2024-03-01", freq="h", tz="UTC")
+    assert df.index.equals(pd.DatetimeIndex(expected, name="t"))
+    assert df["close"].notna().all()
@@ -0,0 +1,43 @@
+import asyncio
+
+import httpx
+import pandas as pd
+import pytest
+
+from app.infrastructure.alphavantage_client import fetch_historical_options, parse_option_records
+
+
+def test_parse_option_records_drops_invalid_rows():
+    raw = [
+        {"contractID": "SPY240119C00470000", "expiration": "2024-01-19", "implied_volatility": "0.15", "date": "2024-01-02"},
+        {"contractID": "SPY240119P00470000", "expiration": "2024-01-19", "implied_volatility": "bad", "date": "2024-01-02"},
+        {"contractID": "SPY240119P00460000", "expiration": "2024-01-19", "implied_volatility": "0.2", "date": "01/02/2024"},
+        {"expiration": "2024-01-19", "implied_volatility": "0.2", "date": "2024-01-02"},
+    ]
+
+    df = parse_option_records(raw)
+
+    assert list(df.columns) == ["contract_id", "expiration", "iv", "date"]
+    assert df["contract_id"].tolist() == ["SPY240119C00470000"]
+    assert df["iv"].tolist() == [0.15]
+    assert df["date"].tolist() == [pd.Timestamp("2024-01-02")]
+
+
+def test_throttling_and_error_payloads_raise():
+    payloads = {
+        "SPY": {"data": [{"contractID": "SPY240119C00470000"}]},
+        "QQQ": {"Information": "Our standard API rate limit is 25 requests per day."},
+        "BAD": {"Error Message": "Invalid API call."},
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=payloads[request.url.params["symbol"]])
+
+    async def fetch(symbol):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_historical_options(client, symbol)
+
+    assert asyncio.run(fetch("SPY")) == payloads["SPY"]["data"]
+    for symbol in ("QQQ", "BAD"):
+        with pytest.raises(RuntimeError):
+            asyncio.run(fetch(symbol))
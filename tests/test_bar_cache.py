@@ -0,0 +1,87 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from app.infrastructure import alpaca_client
+from app.infrastructure.bar_cache import BarStore, merge_ranges, missing_ranges, to_utc
+
+
+def _daily_bars(start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    index = pd.date_range(start.normalize() + pd.Timedelta(hours=5), end, freq="D", tz="UTC", name="t")
+    close = np.linspace(100, 110, len(index))
+    df = pd.DataFrame({"close": close}, index=index)
+    for col in ["open", "high", "low", "volume", "trade_count", "vwap"]:
+        df[col] = close
+    return df
+
+
+def test_missing_ranges():
+    coverage = merge_ranges(np.empty((0, 2), dtype=np.int64), [(to_utc("2024-01-10"), to_utc("2024-01-20"))])
+
+    assert missing_ranges(coverage, to_utc("2024-01-12"), to_utc("2024-01-18")) == []
+    assert missing_ranges(coverage, to_utc("2024-01-01"), to_utc("2024-01-31")) == [
+        (to_utc("2024-01-01"), to_utc("2024-01-10")),
+        (to_utc("2024-01-20"), to_utc("2024-01-31")),
+    ]
+    assert missing_ranges(coverage, to_utc("2024-02-01"), to_utc("2024-02-01")) == [
+        (to_utc("2024-02-01"), to_utc("2024-02-01")),
+    ]
+
+
+def test_fetch_bars_downloads_only_missing_ranges(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_download(symbol, start, end, timeframe):
+        calls.append((start, end))
+        return _daily_bars(start, end)
+
+    monkeypatch.setattr(alpaca_client, "bar_store", BarStore(str(tmp_path)))
+    monkeypatch.setattr(alpaca_client, "_download_bars", fake_download)
+
+    first = asyncio.run(alpaca_client.fetch_bars("SPY", "2024-01-01", "2024-02-01"))
+    again = asyncio.run(alpaca_client.fetch_bars("SPY", "2024-01-05", "2024-01-25"))
+    wider = asyncio.run(alpaca_client.fetch_bars("SPY", "2023-12-01", "2024-02-01"))
+
+    assert calls == [
+        (to_utc("2024-01-01"), to_utc("2024-02-01")),
+        (to_utc("2023-12-01"), to_utc("2024-01-01")),
+    ]
+    assert list(first.columns) == ["open", "high", "low", "close", "volume", "trade_count", "vwap"]
+    assert again.index.min() >= to_utc("2024-01-05") and again.index.max() <= to_utc("2024-01-25")
+    assert wider.index.is_monotonic_increasing and not wider.index.duplicated().any()
+
+    # A fresh store reads the persisted file instead of going upstream
+    monkeypatch.setattr(alpaca_client, "bar_store", BarStore(str(tmp_path)))
+    reloaded = asyncio.run(alpaca_client.fetch_bars("SPY", "2023-12-01", "2024-02-01"))
+    assert len(calls) == 2
+    pd.testing.assert_frame_equal(reloaded, wider, check_freq=False)
+
+
+def test_unsettled_tail_is_not_rewritten_and_memory_is_bounded(tmp_path, monkeypatch):
+    async def fake_download(symbol, start, end, timeframe):
+        return _daily_bars(start, end)
+
+    store = BarStore(str(tmp_path), max_entries=2)
+    saves = []
+    real_save = store.save
+
+    def counting_save(symbol, *args):
+        saves.append(symbol)
+        real_save(symbol, *args)
+
+    monkeypatch.setattr(store, "save", counting_save)
+    monkeypatch.setattr(alpaca_client, "bar_store", store)
+    monkeypatch.setattr(alpaca_client, "_download_bars", fake_download)
+    monkeypatch.setattr(alpaca_client, "settled_until", lambda: to_utc("2024-01-20"))
+
+    for _ in range(3):
+        df = asyncio.run(alpaca_client.fetch_bars("SPY", "2024-01-01", "2024-02-01"))
+    # only the first call extends the settled coverage; the unsettled tail stays in memory
+    assert saves == ["SPY"] and df.index.max() == to_utc("2024-01-31 05:00")
+    assert store.load("SPY", "1D")[1].tolist() == [[to_utc("2024-01-01").value, to_utc("2024-01-20").value]]
+
+    for symbol in ("QQQ", "IWM"):
+        asyncio.run(alpaca_client.fetch_bars(symbol, "2024-01-01", "2024-01-10"))
+    assert len(store._frames) == 2 and ("SPY", "1D") not in store._frames
+    assert len(store._locks) == 0
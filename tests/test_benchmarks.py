@@ -0,0 +1,32 @@
+import asyncio
+
+import httpx
+
+from app.infrastructure import alpaca_client
+from app.infrastructure.bar_cache import BarStore
+from benchmarks.run import compare
+from benchmarks.synthetic import alpaca_transport, gbm_bars
+
+
+def test_alpaca_stand_in_pages_like_upstream(tmp_path, monkeypatch):
+    bars = gbm_bars(2_500)
+    monkeypatch.setattr(alpaca_client, "bar_store", BarStore(str(tmp_path)))
+    monkeypatch.setattr(alpaca_client, "PAGE_LIMIT", 1_000)
+
+    async def scenario():
+        alpaca_client._client = httpx.AsyncClient(transport=alpaca_transport({"SPY": bars}))
+        alpaca_client._in_flight = asyncio.Semaphore(4)
+        try:
+            return await alpaca_client.fetch_bars("SPY", "1999-01-01", "2030-01-01")
+        finally:
+            await alpaca_client.close_client()
+
+    df = asyncio.run(scenario())
+    assert len(df) == 2_500
+    assert (df["close"].to_numpy() == bars["close"].to_numpy()).all()
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    baseline = {"a": {"median": 1.0}, "b": {"median": 1.0}}
+    results = {"a": {"median": 1.2}, "b": {"median": 1.3}, "new": {"median": 9.0}}
+    assert compare(results, baseline, threshold=0.25) == ["b"]
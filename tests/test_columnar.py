@@ -0,0 +1,39 @@
+import json
+
+import pandas as pd
+import pytest
+
+from app.adapters.columnar import to_arrow_ipc, to_columnar_json
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "t": pd.date_range("2024-01-02 05:00", periods=3, freq="D", tz="UTC"),
+        "close": [100.0, 101.5, 99.25],
+        "regime": [0, 1, 1],
+    })
+
+
+def test_columnar_json_arrays():
+    df = _frame()
+
+    payload = json.loads(to_columnar_json({"date": df["t"], "close": df["close"], "regime": df["regime"]}))
+
+    assert payload == {
+        "date": ["2024-01-02T05:00:00Z", "2024-01-03T05:00:00Z", "2024-01-04T05:00:00Z"],
+        "close": [100.0, 101.5, 99.25],
+        "regime": [0, 1, 1],
+    }
+
+
+def test_arrow_ipc_roundtrip():
+    pa = pytest.importorskip("pyarrow")
+    df = _frame().assign(label=["bullish", "bearish", "bullish"])
+
+    body = to_arrow_ipc({"date": df["t"], "close": df["close"], "label": df["label"]})
+    table = pa.ipc.open_stream(body).read_all()
+
+    assert table.column_names == ["date", "close", "label"]
+    assert table.column("close").to_pylist() == [100.0, 101.5, 99.25]
+    assert table.column("label").to_pylist() == ["bullish", "bearish", "bullish"]
+    assert table.column("date").to_pylist()[0] == pd.Timestamp("2024-01-02 05:00", tz="UTC")
@@ -0,0 +1,7 @@
+from app.db.session import async_database_url
+
+
+def test_async_database_url_uses_async_drivers():
+    assert async_database_url("postgresql://u:p@db:5432/quant").startswith("postgresql+asyncpg://u:p@db:5432/quant?")
+    assert "prepared_statement_cache_size=" in async_database_url("postgresql+psycopg2://u:p@db/quant")
+    assert async_database_url("sqlite:///local.db") == "sqlite+aiosqlite:///local.db"
@@ -1,12 +1,15 @@
+import asyncio
+
 import pandas as pd
 import numpy as np
-from app.domain.hmm_model import compute_hmm
+from app.domain.hmm_model import RegimeTracker, compute_hmm, compute_hmm_with_params, forward_filter, update_hmm
+from app.services import hmm_service
 
 def test_hmm_regime_detection():
     # Create dummy price data with an upward trend and noise
     data = {
         "t": pd.date_range(start="2023-01-01", periods=100, freq="D"),
-        "close": pd.Series(100 + (pd.Series(range(100)) * 0.2) + np.random.normal(0, 1, 100))
+        "close": pd.Series(100 + (pd.Series(range(100)) * 0.2) + np.random.default_rng(0).normal(0, 1, 100))
     }
     df = pd.DataFrame(data).set_index("t")
 
@@ -15,3 +18,79 @@ def test_hmm_regime_detection():
     assert not result.empty
     assert {"t", "close", "regime"}.issubset(result.columns)
     assert result["regime"].nunique() <= 3
+
+def test_hmm_cached_params_reproduce_labels(regime_bars):
+    df = regime_bars((0.0005, 0.01, 150), (-0.001, 0.03, 150), seed=7, start="2023-01-01")
+
+    fitted, params = compute_hmm_with_params(df.copy(), n_components=2)
+    decoded = compute_hmm(df.copy(), n_components=2, params=params)
+
+    pd.testing.assert_frame_equal(fitted, decoded)
+
+def test_hmm_update_extends_previous_labels(regime_bars):
+    df = regime_bars((0.0005, 0.01, 150), (-0.001, 0.03, 155), seed=11, start="2023-01-01")
+
+    previous, state = compute_hmm_with_params(df.iloc[:300].copy(), n_components=2)
+    updated, new_state = update_hmm(df.copy(), state, n_iter=5)
+
+    assert len(updated) == len(previous) + 5
+    assert (updated["regime"].values[:len(previous)] == previous["regime"].values).all()
+    assert int(new_state["n_bars"]) == 305
+    assert np.isclose(new_state["filtered"].sum(), 1.0)
+
+def test_warm_update_never_registers_a_singular_fit(monkeypatch, inline_pool, fresh_hmm_caches, regime_bars):
+    # one new bar on a 400-bar window: the warm-started EM used to collapse a state
+    monkeypatch.setattr(hmm_service, "run_in_pool", inline_pool)
+    monkeypatch.setattr(hmm_service, "HMM_WARM_START", True)
+    for seed in range(4):
+        df = regime_bars((0.0005, 0.01, 200), (-0.001, 0.03, 201), seed=seed, start="2022-01-01")
+        asyncio.run(hmm_service.label_regimes(f"W{seed}", df.iloc[:400], 3))
+        labeled = asyncio.run(hmm_service.label_regimes(f"W{seed}", df, 3))
+        assert len(labeled) == 401 - 20
+
+    for state in fresh_hmm_caches._entries.values():
+        assert (np.linalg.eigvalsh(state["covars"]) > 0).all()
+        # what an exact cache hit does with it
+        compute_hmm_with_params(df, 3, params=state)
+
+def test_regime_tracker_matches_batch_forward_filter(regime_bars):
+    df = regime_bars((0.0005, 0.01, 150), (-0.001, 0.03, 160), seed=5, start="2023-01-01")
+    _, state = compute_hmm_with_params(df.iloc[:300].copy(), n_components=2)
+
+    tracker = RegimeTracker(state, df["close"].iloc[:300])
+    tracker.push(df.index[300], df["close"].iloc[300] * 1.1)  # live bar, revised below
+    online = [tracker.push(t, c) for t, c in df["close"].iloc[300:].items()]
+
+    features = np.column_stack([
+        np.log(df["close"] / df["close"].shift(1)),
+        np.log(df["close"] / df["close"].shift(1)).rolling(20).std(),
+    ])[300:]
+    expected = forward_filter(state, features, prior=state["filtered"]).argmax(axis=1)
+    assert online == expected.tolist()
+
+
+def test_hmm_fit_is_deterministic_canonical_and_has_posteriors(regime_bars):
+    df = regime_bars((0.0005, 0.01, 150), (-0.001, 0.03, 150), seed=3, start="2023-01-01")
+
+    first, state = compute_hmm_with_params(df, n_components=2, restarts=3)
+    second = compute_hmm(df, n_components=2, restarts=3)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert np.all(np.diff(state["covars"][:, 0, 0]) > 0)
+    probs = first[["p_0", "p_1"]].values
+    assert np.allclose(probs.sum(axis=1), 1.0)
+    assert probs.argmax(axis=1)[-1] == first["regime"].values[-1]
+
+    updated, _ = update_hmm(pd.concat([df, df.iloc[-3:].set_axis(df.index[-3:] + pd.Timedelta(days=3))]), state, n_iter=5)
+    assert {"p_0", "p_1"}.issubset(updated.columns) and not updated[["p_0", "p_1"]].isna().any().any()
+
+
+def test_labels_do_not_depend_on_what_a_worker_has_cached(monkeypatch, inline_pool, fresh_hmm_caches, regime_bars):
+    monkeypatch.setattr(hmm_service, "run_in_pool", inline_pool)
+    df = regime_bars((0.0005, 0.01, 150), (-0.001, 0.03, 151), seed=2, start="2023-01-01")
+
+    asyncio.run(hmm_service.label_regimes("SPY", df.iloc[:300], 2))
+    seen_shorter = asyncio.run(hmm_service.label_regimes("SPY", df, 2))
+    cold = compute_hmm(df, n_components=2, restarts=hmm_service.HMM_RESTARTS)
+
+    pd.testing.assert_frame_equal(seen_shorter, cold)
@@ -0,0 +1,30 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import hmm_service
+
+
+def test_batch_regimes_streams_one_line_per_symbol(monkeypatch, regime_bars):
+    async def fake_fetch_bars(symbol, start, end, timeframe="1D"):
+        if symbol == "BAD":
+            raise ValueError("no bars")
+        return regime_bars((0.0005, 0.01, 150), (-0.001, 0.03, 150), seed=len(symbol))
+
+    monkeypatch.setattr(hmm_service, "fetch_bars", fake_fetch_bars)
+
+    with TestClient(app) as client:
+        resp = client.post("/v1/hmm/regimes/batch", json={
+            "symbols": ["SPY", "QQQ", "spy", "BAD"],
+            "start_date": "2022-01-01",
+            "end_date": "2022-12-31",
+            "components": 2,
+        })
+
+    assert resp.status_code == 200
+    items = {item["symbol"]: item for item in map(json.loads, resp.text.splitlines())}
+    assert set(items) == {"SPY", "QQQ", "BAD"}
+    assert items["BAD"]["error"] == "no bars" and items["BAD"]["regimes"] is None
+    assert len(items["SPY"]["regimes"]) == 280
+    assert {p["regime"] for p in items["QQQ"]["regimes"]} <= {0, 1}
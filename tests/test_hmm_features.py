@@ -0,0 +1,77 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.domain.hmm_features import align_daily, build_features
+from app.services import hmm_service
+from benchmarks.synthetic import gbm_bars
+
+
+def test_basic_features_match_the_original_inputs_without_mutating():
+    df = gbm_bars(200)
+    before = df.copy()
+
+    features = build_features(df)
+
+    pd.testing.assert_frame_equal(df, before)
+    assert features.values.dtype == np.float64 and features.values.flags["C_CONTIGUOUS"]
+    log_ret = np.log(df["close"] / df["close"].shift(1))
+    expected = pd.DataFrame({"log_ret": log_ret, "vol": log_ret.rolling(20).std()}).dropna()
+    assert np.array_equal(features.values, expected.to_numpy())
+    assert features.index.equals(expected.index)
+
+
+def test_other_feature_sets():
+    df = gbm_bars(200)
+    multi = build_features(df, "multi_vol")
+    volume = build_features(df, "volume")
+
+    assert multi.names == ("log_ret", "vol_5", "vol_20", "vol_60") and len(multi) == 200 - 60
+    assert volume.names == ("log_ret", "vol", "rel_volume") and len(volume) == 200 - 20
+    with pytest.raises(ValueError):
+        build_features(df, "iv")
+    with pytest.raises(ValueError):
+        build_features(df, "nope")
+
+
+def test_daily_iv_is_carried_forward_by_trading_date():
+    # Bars stamped at New York midnight; IV only known on some dates
+    index = pd.DatetimeIndex(["2024-03-04 05:00", "2024-03-05 05:00", "2024-03-06 05:00", "2024-03-07 05:00"], tz="UTC")
+    iv = pd.Series([0.2, 0.3], index=pd.to_datetime(["2024-03-01", "2024-03-06"]))
+
+    assert align_daily(index, iv).tolist() == [0.2, 0.2, 0.3, 0.3]
+
+
+def test_component_sweep_reuses_one_feature_matrix(monkeypatch, inline_pool, fresh_hmm_caches):
+    builds = []
+    real_build = hmm_service.build_features
+
+    def counting_build(*args, **kwargs):
+        builds.append(args[1:])
+        return real_build(*args, **kwargs)
+
+    monkeypatch.setattr(hmm_service, "build_features", counting_build)
+    monkeypatch.setattr(hmm_service, "run_in_pool", inline_pool)
+
+    df = gbm_bars(300)
+    for components in (2, 3):
+        labeled = asyncio.run(hmm_service.label_regimes("SPY", df, components, feature_set="multi_vol"))
+        assert len(labeled) == 300 - 60
+
+    assert builds == [("multi_vol",)]
+    assert list(df.columns) == ["open", "high", "low", "close", "volume", "trade_count", "vwap"]
+
+
+def test_revised_volume_is_not_served_stale_features(fresh_hmm_caches):
+    df = gbm_bars(200)
+    revised = df.assign(volume=df["volume"].where(df.index != df.index[-1], df["volume"].iloc[-1] * 3))
+
+    basic, basic_revised = (asyncio.run(hmm_service.hmm_features("SPY", d)) for d in (df, revised))
+    volume, volume_revised = (asyncio.run(hmm_service.hmm_features("SPY", d, "volume")) for d in (df, revised))
+
+    # only the volume set reads volume
+    assert basic[1] == basic_revised[1]
+    assert volume[1] != volume_revised[1]
+    assert volume_revised[0].values[-1, -1] != volume[0].values[-1, -1]
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models.watchlist import Watchlist
+from app.db.models.iv_history import IvHistory
+from app.db.models.iv_daily import IvDaily
+from app.infrastructure.alphavantage_client import parse_option_records
+from app.services import iv_history_builder
+from app.services.iv_history_builder import store_iv_records
+
+
+def _records(ivs: dict) -> pd.DataFrame:
+    return parse_option_records([
+        {"contractID": contract, "expiration": "2025-03-21", "implied_volatility": str(iv), "date": day}
+        for (contract, day), iv in ivs.items()
+    ])
+
+
+def test_reingesting_updates_contracts_and_daily_aggregates_in_place(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'iv.db'}")
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(iv_history_builder, "SessionLocal", sessions)
+    with sessions() as db:
+        db.add(Watchlist(id=1, symbol="SPY", category="etf"))
+        db.commit()
+
+    first = {("C1", "2025-01-02"): 0.20, ("C2", "2025-01-02"): 0.30, ("C3", "2025-01-02"): 0.70,
+             ("C1", "2025-01-03"): 0.25}
+    assert store_iv_records(1, "SPY", _records(first)) == 4
+    # the same contracts again, revised, plus one new contract and a duplicate within the batch
+    second = pd.concat([
+        _records({("C1", "2025-01-02"): 0.22, ("C2", "2025-01-02"): 0.40, ("C4", "2025-01-02"): 0.50}),
+        _records({("C2", "2025-01-02"): 0.32}),
+    ])
+    assert store_iv_records(1, "SPY", second) == 3
+
+    with sessions() as db:
+        history = {(r.contract_id, r.date): r.iv for r in db.execute(select(IvHistory)).scalars()}
+        daily = {r.date: r for r in db.execute(select(IvDaily)).scalars()}
+
+    jan2, jan3 = datetime(2025, 1, 2), datetime(2025, 1, 3)
+    assert history == {("C1", jan2): 0.22, ("C2", jan2): 0.32, ("C3", jan2): 0.70, ("C4", jan2): 0.50,
+                       ("C1", jan3): 0.25}
+    assert set(daily) == {jan2, jan3}
+    assert daily[jan2].contracts == 4 and daily[jan2].median_iv == pytest.approx((0.32 + 0.50) / 2)
+    assert daily[jan2].mean_iv == pytest.approx((0.22 + 0.32 + 0.70 + 0.50) / 4)
+    assert daily[jan3].contracts == 1 and daily[jan3].median_iv == pytest.approx(0.25)
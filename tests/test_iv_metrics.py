@@ -0,0 +1,21 @@
+import pandas as pd
+import pytest
+
+from app.domain.iv_metrics import compute_iv_rank
+
+
+def test_iv_rank_and_percentile():
+    iv = pd.Series([0.20, 0.10, 0.30, 0.25, 0.15], index=pd.date_range("2024-01-01", periods=5))
+
+    stats = compute_iv_rank(iv)
+
+    assert stats["iv"] == 0.15
+    assert stats["iv_rank"] == pytest.approx(25.0)
+    assert stats["iv_percentile"] == pytest.approx(25.0)
+    assert stats["date"] == pd.Timestamp("2024-01-05")
+
+
+def test_iv_rank_flat_series():
+    stats = compute_iv_rank(pd.Series([0.2, 0.2], index=pd.date_range("2024-01-01", periods=2)))
+
+    assert stats["iv_rank"] == 0.0 and stats["iv_percentile"] == 0.0
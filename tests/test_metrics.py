@@ -0,0 +1,69 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.metrics import ServerTimingMiddleware
+from app.domain.hmm_model import FIT_STAT_NAMES, compute_hmm_with_params, split_fit_stats
+from app.infrastructure import alpaca_client
+from app.infrastructure.bar_cache import BarStore
+from app.infrastructure.metrics import span
+from app.main import app
+from benchmarks.synthetic import alpaca_transport, gbm_bars
+
+
+def test_server_timing_header_reports_request_spans():
+    demo = FastAPI()
+    demo.add_middleware(ServerTimingMiddleware, enabled=True)
+
+    @demo.get("/work")
+    async def work():
+        with span("fetch_bars"):
+            await asyncio.sleep(0.01)
+        with span("serialise"):
+            pass
+        with span("serialise"):
+            pass
+        return {}
+
+    resp = TestClient(demo).get("/work")
+    timings = dict(part.split(";dur=") for part in resp.headers["server-timing"].split(", "))
+    assert set(timings) == {"fetch_bars", "serialise"}
+    assert float(timings["fetch_bars"]) >= 10
+
+
+def test_alpaca_retries_are_counted_and_metrics_exposed(tmp_path, monkeypatch):
+    upstream = alpaca_transport({"SPY": gbm_bars(300)})
+    failures = {"left": 2}
+
+    def flaky(request):
+        if failures["left"]:
+            failures["left"] -= 1
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return upstream.handler(request)
+
+    monkeypatch.setattr(alpaca_client, "bar_store", BarStore(str(tmp_path)))
+
+    async def scenario():
+        alpaca_client._client = httpx.AsyncClient(transport=httpx.MockTransport(flaky))
+        alpaca_client._in_flight = asyncio.Semaphore(2)
+        try:
+            return await alpaca_client.fetch_bars("SPY", "1999-01-01", "2030-01-01")
+        finally:
+            await alpaca_client.close_client()
+
+    assert len(asyncio.run(scenario())) == 300
+
+    body = TestClient(app).get("/metrics").text
+    assert 'quant_sight_alpaca_retries_total{status="429"}' in body
+    assert 'quant_sight_span_seconds_count{span="fetch_bars"}' in body
+
+
+def test_fit_stats_travel_with_the_state():
+    df = gbm_bars(400)[["close"]]
+    _, state = compute_hmm_with_params(df, n_components=2)
+
+    stats = split_fit_stats(state)
+    assert set(stats) == set(FIT_STAT_NAMES) and not set(FIT_STAT_NAMES) & set(state)
+    assert stats["fit_iterations"] >= 1 and stats["fit_seconds"] > 0
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from app.infrastructure.model_registry import ModelRegistry, data_fingerprint, model_key
+
+
+def _params(seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    return {"startprob": rng.random(2), "transmat": rng.random((2, 2)), "means": rng.random((2, 2)), "covars": rng.random((2, 2, 2))}
+
+
+def test_fingerprint_changes_with_data():
+    index = pd.date_range("2024-01-01", periods=5, freq="D", tz="UTC", name="t")
+    df = pd.DataFrame({"close": [1.0, 2.0, 3.0, 4.0, 5.0]}, index=index)
+
+    assert data_fingerprint(df) == data_fingerprint(df.copy())
+    assert data_fingerprint(df) != data_fingerprint(df.iloc[:-1])
+    assert data_fingerprint(df) != data_fingerprint(df.assign(close=df["close"] + 1))
+
+
+def test_registry_evicts_least_recently_used():
+    registry = ModelRegistry(max_entries=2, cache_dir=None)
+    registry.put("a", _params(1))
+    registry.put("b", _params(2))
+    registry.get("a")
+    registry.put("c", _params(3))
+
+    assert registry.get("b") is None
+    assert registry.get("a") is not None and registry.get("c") is not None
+
+
+def test_registry_disk_tier_survives_restart(tmp_path):
+    key = model_key("SPY", 2, "abc")
+    ModelRegistry(max_entries=1, cache_dir=str(tmp_path)).put(key, _params(1))
+
+    loaded = ModelRegistry(max_entries=1, cache_dir=str(tmp_path)).get(key)
+
+    for name, value in _params(1).items():
+        np.testing.assert_array_equal(loaded[name], value)
+
+
+def test_registry_latest_entry_per_window(tmp_path):
+    registry = ModelRegistry(max_entries=4, cache_dir=str(tmp_path))
+    registry.put("k1", _params(1), window="w")
+    registry.put("k2", _params(2), window="w")
+
+    key, params = ModelRegistry(max_entries=4, cache_dir=str(tmp_path)).latest("w")
+
+    assert key == "k2"
+    np.testing.assert_array_equal(params["means"], _params(2)["means"])
+    assert registry.latest("other") is None
+
+
+def test_registry_forgets_windows_of_evicted_entries(tmp_path):
+    registry = ModelRegistry(max_entries=2, cache_dir=None)
+    for i in range(5):
+        registry.put(f"k{i}", _params(i), window=f"w{i}")
+
+    assert set(registry._latest) == {"w3", "w4"}
+    assert registry.latest("w0") is None and registry.latest("w4")[0] == "k4"
+
+    # the disk tier still knows the latest fit of every window
+    registry = ModelRegistry(max_entries=1, cache_dir=str(tmp_path))
+    registry.put("k1", _params(1), window="w1")
+    registry.put("k2", _params(2), window="w2")
+    assert registry._latest == {"w2": "k2"}
+    assert registry.latest("w1")[0] == "k1"
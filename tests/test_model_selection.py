@@ -0,0 +1,103 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.domain.hmm_model import fit_restart
+from app.domain.model_selection import best_components, n_parameters, score_fits
+from app.services import hmm_service
+
+
+def test_scores_keep_the_best_restart_and_rank_by_criterion():
+    assert n_parameters(2, 2) == 1 + 2 + 4 + 6
+    assert n_parameters(3, 1) == 2 + 6 + 3 + 3
+
+    params = {"means": np.zeros((2, 1))}
+    fits = {
+        2: [{"params": params, "log_likelihood": 90.0, "converged": True, "iterations": 5},
+            {"params": params, "log_likelihood": 100.0, "converged": True, "iterations": 7}],
+        3: [{"params": params, "log_likelihood": 104.0, "converged": False, "iterations": 1000}, None],
+        4: [None, None],
+    }
+    scores = score_fits(fits, n_obs=500, n_features=2)
+
+    assert [s["components"] for s in scores] == [2, 3, 4]
+    assert scores[0]["log_likelihood"] == 100.0 and scores[0]["bic"] == 13 * np.log(500) - 200
+    assert scores[1]["failed_restarts"] == 1 and scores[2]["bic"] is None
+    # the small likelihood gain does not pay for 3 states under BIC, it does for the raw likelihood
+    assert best_components(scores, "bic")["components"] == 2
+    assert best_components(scores, "log_likelihood")["components"] == 3
+
+
+CALM_THEN_WILD = ((0.001, 0.005, 200), (-0.002, 0.03, 200))
+
+
+def test_fit_restart_is_deterministic_per_seed(regime_bars):
+    values = hmm_service.build_features(regime_bars(*CALM_THEN_WILD, seed=5)).values
+    a, b = fit_restart(values, 2, seed=3), fit_restart(values, 2, seed=3)
+    assert a["log_likelihood"] == b["log_likelihood"]
+    np.testing.assert_array_equal(a["params"]["means"], b["params"]["means"])
+
+
+def test_sweep_endpoint_and_auto_components(monkeypatch, inline_pool, fresh_hmm_caches, regime_bars):
+    async def fake_fetch_bars(symbol, start, end, timeframe="1D"):
+        return regime_bars(*CALM_THEN_WILD, seed=5)
+
+    monkeypatch.setattr(hmm_service, "fetch_bars", fake_fetch_bars)
+    monkeypatch.setattr(hmm_service, "run_in_pool", inline_pool)
+
+    with TestClient(app) as client:
+        resp = client.get("/v1/hmm/regimes/sweep", params={
+            "symbol": "SWP", "start_date": "2022-01-01", "end_date": "2023-02-04",
+            "candidates": [3, 2], "restarts": 2,
+        })
+        auto = client.get("/v1/hmm/regimes", params={
+            "symbol": "SWP", "start_date": "2022-01-01", "end_date": "2023-02-04", "components": "auto",
+        })
+        bad = client.get("/v1/hmm/regimes", params={
+            "symbol": "SWP", "start_date": "2022-01-01", "end_date": "2023-02-04", "components": "7",
+        })
+
+    assert resp.status_code == 200
+    sweep = resp.json()
+    assert [s["components"] for s in sweep["scores"]] == [2, 3]
+    assert all(s["restarts"] == 2 for s in sweep["scores"])
+    best = min(sweep["scores"], key=lambda s: s["bic"])
+    assert sweep["best_components"] == best["components"]
+    assert {p["regime"] for p in sweep["regimes"]} <= set(range(sweep["best_components"]))
+
+    assert auto.status_code == 200 and len(auto.json()) == sweep["observations"]
+    assert bad.status_code == 422
+
+
+def test_auto_components_sweeps_once_per_set_of_bars(monkeypatch, inline_pool, fresh_hmm_caches, regime_bars):
+    async def fake_fetch_bars(symbol, start, end, timeframe="1D"):
+        return regime_bars(*CALM_THEN_WILD, seed=5)
+
+    sweeps = []
+    sweep_components = hmm_service.sweep_components
+
+    async def counting_sweep(*args, **kwargs):
+        sweeps.append(args[0])
+        return await sweep_components(*args, **kwargs)
+
+    fits = []
+
+    async def counting_pool(fn, *args, **kwargs):
+        fits.append(fn)
+        return await inline_pool(fn, *args, **kwargs)
+
+    monkeypatch.setattr(hmm_service, "fetch_bars", fake_fetch_bars)
+    monkeypatch.setattr(hmm_service, "sweep_components", counting_sweep)
+    monkeypatch.setattr(hmm_service, "run_in_pool", counting_pool)
+    monkeypatch.setattr(hmm_service, "HMM_SWEEP_RESTARTS", hmm_service.HMM_RESTARTS)
+
+    first = asyncio.run(hmm_service.get_regimes_frame("AUT", "2022-01-01", "2023-02-04", "auto"))
+    n_fits = len(fits)
+    second = asyncio.run(hmm_service.get_regimes_frame("AUT", "2022-01-01", "2023-02-04", "auto"))
+
+    assert sweeps == ["AUT"]
+    assert len(fits) == n_fits
+    pd.testing.assert_frame_equal(first, second)
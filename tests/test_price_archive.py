@@ -0,0 +1,91 @@
+import asyncio
+import mmap
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.infrastructure.bar_cache import BAR_COLUMNS
+from app.infrastructure.price_archive import PriceArchive, archived_apply
+from app.domain.hmm_model import compute_hmm
+from app.domain.ta_indicators_model import compute_trend_bias
+from app.services import archive_service
+
+
+def _mapped(values: np.ndarray) -> bool:
+    while values.base is not None and not isinstance(values.base, mmap.mmap):
+        values = values.base
+    return isinstance(values.base, mmap.mmap)
+
+
+def test_append_only_and_zero_copy_slices(tmp_path, regime_bars):
+    archive = PriceArchive(str(tmp_path))
+    bars = regime_bars((0, 0.01, 400), seed=3, start="2020-01-01", columns=BAR_COLUMNS)
+
+    assert archive.append("spy", "1D", bars.iloc[:250]) == 250
+    # overlapping bars are skipped, only the newer ones are added
+    assert archive.append("SPY", "1D", bars.iloc[200:]) == 150
+    assert archive.append("SPY", "1D", bars) == 0
+    assert archive.length("SPY", "1D") == 400
+
+    window = archive.read("SPY", "1D", "2020-03-01", "2020-12-31")
+    pd.testing.assert_frame_equal(window, bars.loc["2020-03-01":"2020-12-31"], check_freq=False)
+    assert _mapped(window["close"].to_numpy())
+    with pytest.raises(ValueError):
+        window["close"].to_numpy()[0] = 0.0
+
+    # the domain functions read the mapped slice as is
+    expected = compute_trend_bias(bars.loc["2020-03-01":"2020-12-31"].copy())
+    pd.testing.assert_frame_equal(compute_trend_bias(window), expected, check_freq=False)
+    labeled = archived_apply(compute_hmm, "SPY", "1D", "2020-03-01", None, 2, root=str(tmp_path))
+    assert len(labeled) == len(bars.loc["2020-03-01":]) - 20
+
+    assert archive.read("QQQ", "1D").empty
+
+
+def test_torn_append_is_repaired_and_unsorted_bars_are_rejected(tmp_path, regime_bars):
+    archive = PriceArchive(str(tmp_path))
+    bars = regime_bars((0, 0.01, 20), seed=3, columns=BAR_COLUMNS)
+    archive.append("SPY", "1D", bars.iloc[:10])
+
+    # an append that died halfway through a value and a timestamp
+    folder = tmp_path / "1D" / "SPY"
+    for name in ["close.f8", "t.i8"]:
+        with open(folder / name, "ab") as f:
+            f.write(b"\x01\x02\x03")
+    assert archive.length("SPY", "1D") == 10
+
+    assert archive.append("SPY", "1D", bars.iloc[10:]) == 10
+    pd.testing.assert_frame_equal(archive.read("SPY", "1D"), bars, check_freq=False)
+
+    with pytest.raises(ValueError):
+        archive.append("QQQ", "1D", bars.iloc[::-1])
+    with pytest.raises(ValueError):
+        archive.append("QQQ", "1D", pd.concat([bars.iloc[:5], bars.iloc[4:6]]))
+    assert archive.length("QQQ", "1D") == 0
+
+
+def test_sync_archive_appends_only_settled_bars(tmp_path, monkeypatch, regime_bars):
+    archive = PriceArchive(str(tmp_path))
+    bars = regime_bars((0, 0.01, 60), seed=3, start="2024-01-01", columns=BAR_COLUMNS)
+    calls = []
+
+    async def fake_fetch_bars(symbol, start, end, timeframe="1D"):
+        calls.append((pd.Timestamp(start), timeframe))
+        return bars.loc[start:end]
+
+    monkeypatch.setattr(archive_service, "price_archive", archive)
+    monkeypatch.setattr(archive_service, "fetch_bars", fake_fetch_bars)
+    monkeypatch.setattr(archive_service, "settled_until", lambda: pd.Timestamp("2024-02-01", tz="UTC"))
+
+    assert asyncio.run(archive_service.sync_archive("SPY", "2024-01-01")) == 32
+    monkeypatch.setattr(archive_service, "settled_until", lambda: pd.Timestamp("2024-03-15", tz="UTC"))
+    assert asyncio.run(archive_service.sync_archive("SPY", "2024-01-01")) == 28
+
+    # the second run resumes from the last archived bar
+    assert calls[-1][0] == pd.Timestamp("2024-02-01", tz="UTC")
+    pd.testing.assert_frame_equal(archive.read("SPY", "1D"), bars, check_freq=False)
+
+    # intraday timeframes are archived as their 1-minute base series
+    asyncio.run(archive_service.sync_archive("SPY", "2024-01-01", timeframe="5Min"))
+    assert calls[-1][1] == "1Min" and archive.length("SPY", "1Min") == 60
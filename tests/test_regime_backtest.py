@@ -0,0 +1,57 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.domain.hmm_model import canonical_order
+from app.domain.regime_backtest import backtest_features, fit_window, walk_forward_windows
+from app.main import app
+from app.services import backtest_service
+
+
+# calm and volatile stretches of 100 bars, alternating
+ALTERNATING = [(0, 0.008, 100), (0, 0.03, 100)] * 2 + [(0, 0.008, 100)]
+
+
+def test_walk_forward_windows():
+    assert walk_forward_windows(10, 4, 3) == [(0, 4, 7), (3, 7, 10)]
+    assert walk_forward_windows(10, 4, 4, expanding=True) == [(0, 4, 8), (0, 8, 10)]
+    assert walk_forward_windows(4, 4, 2) == []
+
+
+def test_canonical_order_ranks_states_by_return_variance():
+    covars = np.array([np.diag([v, 1.0]) for v in [0.5, 0.1, 0.9]])
+    assert canonical_order({"covars": covars}).tolist() == [1, 0, 2]
+
+
+def test_out_of_sample_labels_do_not_look_ahead(regime_bars):
+    features = backtest_features(regime_bars(*ALTERNATING, seed=3)).to_numpy()
+    window = (0, 250, 280)
+    labels = fit_window(features, window, n_components=2)
+    # Appending later rows (or dropping them) cannot change a test label
+    assert np.array_equal(fit_window(features[:280], window, n_components=2), labels)
+    assert np.array_equal(fit_window(features[:270], (0, 250, 270), n_components=2), labels[:20])
+
+
+def test_backtest_endpoint(monkeypatch, regime_bars):
+    async def fake_fetch_bars(symbol, start, end, timeframe="1D"):
+        return regime_bars(*ALTERNATING, seed=3, start="2021-01-01")
+
+    monkeypatch.setattr(backtest_service, "fetch_bars", fake_fetch_bars)
+
+    with TestClient(app) as client:
+        resp = client.get("/v1/hmm/regimes/backtest", params=[
+            ("symbol", "spy"), ("start_date", "2021-01-01"), ("end_date", "2022-06-01"),
+            ("components", 2), ("components", 3), ("train_size", 200), ("test_size", 50),
+        ])
+        too_short = client.get("/v1/hmm/regimes/backtest", params={
+            "symbol": "SPY", "start_date": "2021-01-01", "end_date": "2022-06-01", "train_size": 1000,
+        })
+
+    assert resp.status_code == 200
+    two, three = resp.json()
+    assert (two["components"], three["components"]) == (2, 3)
+    assert two["windows"] == 6 and len(two["regimes"]) == 500 - 20 - 200
+    assert [s["regime"] for s in three["stats"]] == [0, 1, 2]
+    assert sum(s["bars"] for s in two["stats"]) == len(two["regimes"])
+    # Calm regime first: its realised volatility is the lowest
+    assert two["stats"][0]["volatility"] < two["stats"][1]["volatility"]
+    assert too_short.status_code == 400
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.api import caching
+from app.domain.resample import base_timeframe, parse_timeframe, resample_bars
+from app.infrastructure import alpaca_client
+from app.infrastructure.bar_cache import BAR_COLUMNS, BarStore
+
+
+def _bars(index: pd.DatetimeIndex) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(index)))
+    return pd.DataFrame({
+        "open": close + rng.normal(0, 0.05, len(index)),
+        "high": close + 0.2,
+        "low": close - 0.2,
+        "close": close,
+        "volume": rng.integers(1, 1000, len(index)).astype("float64"),
+        "trade_count": rng.integers(1, 50, len(index)).astype("float64"),
+        "vwap": close,
+    }, index=index)[BAR_COLUMNS]
+
+
+def test_parse_timeframe():
+    assert parse_timeframe("5Min") == parse_timeframe("5T") == (5, "Min")
+    assert base_timeframe("1H") == "1Min" and base_timeframe("1Week") == "1D"
+    with pytest.raises(ValueError):
+        parse_timeframe("0Min")
+    with pytest.raises(ValueError):
+        parse_timeframe("1Fortnight")
+
+
+def test_intraday_resample_matches_pandas():
+    # A session with a gap, so some buckets are partial and some are missing
+    index = pd.date_range("2024-03-04 14:30", periods=390, freq="min", tz="UTC", name="t")
+    df = _bars(index.delete(range(100, 130)))
+
+    out = resample_bars(df, "15Min")
+
+    grouped = df.resample("15min")
+    expected = pd.DataFrame({
+        "open": grouped["open"].first(),
+        "high": grouped["high"].max(),
+        "low": grouped["low"].min(),
+        "close": grouped["close"].last(),
+        "volume": grouped["volume"].sum(),
+        "trade_count": grouped["trade_count"].sum(),
+        "vwap": (df["vwap"] * df["volume"]).resample("15min").sum() / grouped["volume"].sum(),
+    }).dropna(subset=["open"])
+    pd.testing.assert_frame_equal(out, expected, check_freq=False)
+
+
+def test_weekly_buckets_follow_new_york_dates():
+    # Daily bars stamped at New York midnight (04:00/05:00 UTC), across the DST change
+    days = pd.bdate_range("2024-03-04", "2024-03-22")
+    index = pd.DatetimeIndex([d.tz_localize("America/New_York").tz_convert("UTC") for d in days], name="t")
+    df = _bars(index)
+
+    weekly = resample_bars(df, "1Week")
+
+    assert len(weekly) == 3
+    assert list(weekly.index) == list(index[[0, 5, 10]])
+    assert weekly["close"].tolist() == df["close"].iloc[[4, 9, 14]].tolist()
+    assert weekly["volume"].tolist() == [df["volume"].iloc[i:i + 5].sum() for i in (0, 5, 10)]
+
+
+def test_one_base_download_serves_every_intraday_timeframe(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_download(symbol, start, end, timeframe):
+        calls.append(timeframe)
+        return _bars(pd.date_range(start, end, freq="min", name="t"))
+
+    monkeypatch.setattr(alpaca_client, "bar_store", BarStore(str(tmp_path)))
+    monkeypatch.setattr(alpaca_client, "_download_bars", fake_download)
+
+    async def scenario():
+        return [
+            await alpaca_client.fetch_bars("SPY", "2024-03-04T14:30:00Z", "2024-03-04T20:59:00Z", timeframe)
+            for timeframe in ["1Min", "5Min", "1Hour"]
+        ]
+
+    one, five, hour = asyncio.run(scenario())
+    assert calls == ["1Min"]
+    assert (len(one), len(five), len(hour)) == (390, 78, 7)
+    assert five["volume"].sum() == one["volume"].sum()
+
+
+def test_intraday_responses_expire_at_the_next_bar():
+    now = datetime(2024, 7, 10, 15, 7, 30, tzinfo=timezone.utc)
+    assert caching.response_expiry("2024-07-10", now, timedelta(minutes=5)) == datetime(2024, 7, 10, 15, 10, tzinfo=timezone.utc)
+    assert caching.response_expiry("2024-07-01", now, timedelta(minutes=5)) == now + caching.RESPONSE_CACHE_MAX_TTL
@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.api import caching
+from app.api.v1 import trend_router
+from app.adapters.columnar import COLUMNAR_JSON
+from app.adapters.response_models import TrendPoint
+from app.infrastructure.response_cache import MemoryBackend, ResponseCache
+from app.main import app
+
+
+def test_response_expiry_follows_market_close():
+    # Wednesday 2024-07-10 15:00 New York (19:00 UTC)
+    now = datetime(2024, 7, 10, 19, 0, tzinfo=timezone.utc)
+
+    assert caching.response_expiry("2024-07-10", now) == datetime(2024, 7, 10, 20, 20, tzinfo=timezone.utc)
+    assert caching.response_expiry("2024-07-01", now) == now + caching.RESPONSE_CACHE_MAX_TTL
+
+    # Friday after the close rolls over the weekend to Monday
+    friday = datetime(2024, 7, 12, 21, 0, tzinfo=timezone.utc)
+    assert caching.response_expiry("2024-07-12", friday) == datetime(2024, 7, 15, 20, 20, tzinfo=timezone.utc)
+
+
+def test_trend_bias_is_cached_and_revalidated(monkeypatch):
+    calls = []
+
+    async def fake_trend(symbol, start, end, timeframe="1D"):
+        calls.append(symbol)
+        return [TrendPoint(date="2024-01-02T05:00:00Z", close=100.0, trend_bias="bullish")]
+
+    monkeypatch.setattr(trend_router, "get_trend_for_symbol", fake_trend)
+    monkeypatch.setattr(caching, "response_cache", ResponseCache(MemoryBackend()))
+
+    with TestClient(app) as client:
+        params = {"symbol": "spy", "start": "2024-01-01", "end": "2024-02-01"}
+        first = client.get("/v1/trend-bias/", params=params)
+        second = client.get("/v1/trend-bias/", params={**params, "symbol": "SPY"})
+        revalidated = client.get("/v1/trend-bias/", params=params, headers={"If-None-Match": first.headers["etag"]})
+        since = client.get("/v1/trend-bias/", params=params, headers={"If-Modified-Since": first.headers["last-modified"]})
+
+    assert first.status_code == 200 and first.json()[0]["trend_bias"] == "bullish"
+    assert second.content == first.content
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert since.status_code == 304
+    assert calls == ["spy"]
+
+
+def test_trend_bias_columnar_format(monkeypatch):
+    async def fake_frame(symbol, start, end, timeframe="1D"):
+        return pd.DataFrame({
+            "t": pd.date_range("2024-01-02 05:00", periods=2, freq="D", tz="UTC"),
+            "close": [100.0, 101.0],
+            "trend_bias": ["neutral", "bullish"],
+        })
+
+    monkeypatch.setattr(trend_router, "get_trend_frame", fake_frame)
+    monkeypatch.setattr(caching, "response_cache", ResponseCache(MemoryBackend()))
+
+    params = {"symbol": "SPY", "start": "2024-01-01", "end": "2024-02-01"}
+    with TestClient(app) as client:
+        by_query = client.get("/v1/trend-bias/", params={**params, "format": "columnar"})
+        by_accept = client.get("/v1/trend-bias/", params=params, headers={"Accept": COLUMNAR_JSON})
+
+    assert by_query.headers["content-type"] == COLUMNAR_JSON
+    assert by_query.json() == {"date": ["2024-01-02T05:00:00Z", "2024-01-03T05:00:00Z"], "close": [100.0, 101.0], "trend_bias": ["neutral", "bullish"]}
+    assert by_accept.content == by_query.content
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.models.watchlist import Watchlist
+from app.db.models.job_task import JobTask
+from app.domain.market_calendar import MARKET_TZ, last_market_close
+from app.services import scheduler as scheduler_module
+from app.services.scheduler import Job, run_job
+
+
+def test_last_market_close_skips_weekends_and_the_open_session():
+    friday_close = datetime(2025, 7, 18, 16, tzinfo=MARKET_TZ)
+    assert last_market_close(datetime(2025, 7, 20, 12, tzinfo=timezone.utc)) == friday_close
+    assert last_market_close(datetime(2025, 7, 21, 15, tzinfo=MARKET_TZ)) == friday_close
+    assert last_market_close(friday_close) == friday_close
+
+
+def test_run_job_persists_state_and_retries_only_failed_symbols(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    monkeypatch.setattr(scheduler_module, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+    calls = []
+    broken = {"BBB"}
+
+    async def work(watch_id, symbol):
+        calls.append(symbol)
+        # AAA fails once then recovers, BBB fails until it is fixed
+        if symbol in broken or (symbol == "AAA" and calls.count("AAA") == 1):
+            raise RuntimeError(f"{symbol} unavailable")
+
+    job = Job("test_job", work, concurrency=2)
+    session = date(2025, 7, 18)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with scheduler_module.AsyncSessionLocal() as db:
+            db.add_all([
+                Watchlist(id=1, symbol="AAA", category="equity"),
+                Watchlist(id=2, symbol="BBB", category="equity"),
+                Watchlist(id=3, symbol="CCC", category="equity"),
+                Watchlist(id=4, symbol="DDD", category="equity", is_active=False),
+            ])
+            await db.commit()
+
+        first = await run_job(job, session, max_attempts=2, backoff=0)
+        # a restart the same session: nothing left that may still be attempted
+        second = await run_job(job, session, max_attempts=2, backoff=0)
+        broken.clear()
+        third = await run_job(job, session, max_attempts=3, backoff=0)
+
+        async with scheduler_module.AsyncSessionLocal() as db:
+            tasks = {t.symbol: t for t in (await db.execute(select(JobTask))).scalars()}
+        await engine.dispose()
+        return first, second, third, tasks
+
+    first, second, third, tasks = asyncio.run(scenario())
+
+    assert first == {"succeeded": 2, "failed": 1}
+    assert second == {"succeeded": 0, "failed": 1}
+    assert third == {"succeeded": 1, "failed": 0}
+    assert sorted(calls) == ["AAA", "AAA", "BBB", "BBB", "BBB", "CCC"]
+    assert set(tasks) == {"AAA", "BBB", "CCC"}
+    assert all(t.status == "succeeded" for t in tasks.values())
+    assert (tasks["AAA"].attempts, tasks["BBB"].attempts, tasks["CCC"].attempts) == (2, 3, 1)
+    assert tasks["BBB"].last_error is None and tasks["BBB"].session_date == datetime(2025, 7, 18)
+
+
+def test_warm_refit_registers_each_configured_component_count(monkeypatch):
+    calls = []
+
+    async def fake_regimes(symbol, start, end, components):
+        calls.append((symbol, start, end, components))
+
+    async def fake_trend(symbol, start, end):
+        calls.append((symbol, start, end, "trend"))
+
+    monkeypatch.setattr(scheduler_module, "get_regimes_frame", fake_regimes)
+    monkeypatch.setattr(scheduler_module, "get_trend_frame", fake_trend)
+    monkeypatch.setattr(scheduler_module, "SCHEDULER_COMPONENTS", [2, 3])
+
+    asyncio.run(scheduler_module.warm_refit(1, "SPY"))
+
+    start, end = scheduler_module.history_window()
+    assert start.endswith("-01")
+    assert calls == [("SPY", start, end, 2), ("SPY", start, end, 3), ("SPY", start, end, "trend")]
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.models.watchlist import Watchlist
+from app.db.models.iv_daily import IvDaily
+from app.db.models.signal_snapshot import SignalSnapshot
+from app.domain.hmm_model import compute_hmm_with_params
+from app.domain.signal_snapshot import regime_level, regime_snapshot
+from app.services import hmm_service
+from app.services import signal_snapshot_builder as builder
+from app.services.screener_service import screen_watchlist
+
+
+CALM, WILD = (0.001, 0.005, 200), (-0.002, 0.04, 200)
+
+
+def test_regime_snapshot_ranks_the_current_regime_by_volatility(regime_bars):
+    wild_last = regime_bars(CALM, WILD, seed=1, start="2024-01-01")
+    assert regime_snapshot(*compute_hmm_with_params(wild_last, 2))["regime_level"] == "high_vol"
+    calm = regime_snapshot(*compute_hmm_with_params(regime_bars(WILD, CALM, seed=1, start="2024-01-01"), 2))
+    assert calm["regime"] == 0 and calm["regime_level"] == "low_vol" and calm["regime_vol"] < 0.2
+    assert [regime_level(r, 3) for r in range(3)] == ["low_vol", "mid_vol", "high_vol"]
+
+
+def test_refresh_then_screen(tmp_path, monkeypatch, inline_pool, fresh_hmm_caches, regime_bars):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'screener.db'}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    bars = {
+        "AAA": regime_bars(CALM, WILD, seed=1, start="2024-01-01"),
+        "BBB": regime_bars(WILD, CALM, seed=2, start="2024-01-01"),
+        "CCC": regime_bars(CALM, WILD, seed=3, start="2024-01-01"),
+    }
+
+    async def fake_fetch_bars(symbol, start, end, timeframe="1D"):
+        return bars[symbol]
+
+    monkeypatch.setattr(builder, "AsyncSessionLocal", sessions)
+    monkeypatch.setattr(builder, "init_async_engine", lambda: engine)
+    monkeypatch.setattr(builder, "fetch_bars", fake_fetch_bars)
+    monkeypatch.setattr(hmm_service, "run_in_pool", inline_pool)
+    monkeypatch.setattr(builder, "SNAPSHOT_COMPONENTS", 2)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with sessions() as db:
+            db.add_all([
+                Watchlist(id=1, symbol="AAA", category="equity", sector="tech", provider="alpaca"),
+                Watchlist(id=2, symbol="BBB", category="equity", sector="tech", provider="alpaca"),
+                Watchlist(id=3, symbol="CCC", category="equity", sector="energy", provider="alpaca"),
+                Watchlist(id=4, symbol="DDD", category="equity", sector="tech", provider="alpaca", is_active=False),
+            ])
+            db.add_all([
+                IvDaily(watchlist_id=1, symbol="AAA", date=datetime(2025, 1, d), median_iv=iv, mean_iv=iv, contracts=1)
+                for d, iv in [(1, 0.2), (2, 0.4), (3, 0.35)]
+            ])
+            await db.commit()
+
+        assert await builder.refresh_signal_snapshots() == 3
+        # a second run updates the rows in place
+        assert await builder.refresh_signal_snapshots() == 3
+
+        async with sessions() as db:
+            everything = await screen_watchlist(db)
+            tech_high_vol = await screen_watchlist(db, attributes={"sector": ["tech"]}, regime_level=["high_vol"])
+            by_iv = await screen_watchlist(db, sort="iv_rank", descending=True)
+            rich_iv = await screen_watchlist(db, min_iv_rank=50)
+            stored = await db.get(SignalSnapshot, 1)
+        await engine.dispose()
+        return everything, tech_high_vol, by_iv, rich_iv, stored
+
+    everything, tech_high_vol, by_iv, rich_iv, stored = asyncio.run(scenario())
+
+    assert [row.symbol for row in everything] == ["AAA", "BBB", "CCC"]
+    assert [row.symbol for row in tech_high_vol] == ["AAA"]
+    # symbols without IV sort last either way
+    assert [row.symbol for row in by_iv] == ["AAA", "BBB", "CCC"]
+    assert [row.symbol for row in rich_iv] == ["AAA"] and abs(rich_iv[0].iv_rank - 75.0) < 1e-9
+    assert stored.as_of == bars["AAA"].index[-1].tz_convert(None).to_pydatetime()
+    assert stored.trend_bias in {"bullish", "neutral", "bearish"}
+    # the screener agrees with the regimes endpoint on the same bars
+    labeled = asyncio.run(hmm_service.label_regimes("AAA", bars["AAA"], 2))
+    assert stored.regime == labeled["regime"].iloc[-1] and len(fresh_hmm_caches._entries) == 3
@@ -0,0 +1,57 @@
+import asyncio
+
+import pandas as pd
+
+from app.infrastructure.bar_cache import to_utc
+from app.services import signal_hub as hub_module
+from app.services.signal_hub import SignalHub
+
+
+def test_hub_publishes_snapshot_then_only_changes(monkeypatch, inline_pool, regime_bars):
+    available = {"n": 250}
+    bars = regime_bars((0.001, 0.01, 150), (-0.002, 0.03, 150), seed=7,
+                       start=pd.Timestamp.now(tz="UTC").normalize() - pd.Timedelta(days=400))
+
+    async def fake_fetch_bars(symbol, start, end, timeframe="1D"):
+        return bars.iloc[:available["n"]].loc[to_utc(start):to_utc(end)]
+
+    monkeypatch.setattr(hub_module, "fetch_bars", fake_fetch_bars)
+    monkeypatch.setattr(hub_module, "run_in_pool", inline_pool)
+    monkeypatch.setattr(hub_module, "STREAM_COMPONENTS", 2)
+
+    async def scenario():
+        hub = SignalHub()
+        queue = hub.subscribe(["SPY"])
+
+        await hub.refresh("SPY")
+        snapshot = queue.get_nowait()
+        assert snapshot.event == "snapshot" and snapshot.symbol == "SPY"
+        assert snapshot.trend_bias in {"bullish", "neutral", "bearish"} and snapshot.regime in {0, 1}
+
+        # Nothing new upstream: no event
+        await hub.refresh("SPY")
+        assert queue.empty()
+
+        # Stream the remaining bars one at a time; every event must be a real change
+        last = (snapshot.trend_bias, snapshot.regime)
+        for n in range(251, 301):
+            available["n"] = n
+            await hub.refresh("SPY")
+            while not queue.empty():
+                event = queue.get_nowait()
+                assert event.event == "change" and (event.trend_bias, event.regime) != last
+                last = (event.trend_bias, event.regime)
+
+        tracker = hub._signals["SPY"].trend
+        # only the last bar is kept in memory
+        assert len(tracker) == 1 and tracker.times[-1] == bars.index[-1]
+        assert last == (tracker.bias, hub._signals["SPY"].regimes.regime)
+
+        # Late subscribers get the current state straight away
+        late = hub.subscribe(["SPY"])
+        assert late.get_nowait().event == "snapshot"
+        hub.unsubscribe(queue)
+        hub.unsubscribe(late)
+        assert "SPY" not in hub._subscribers and "SPY" not in hub._signals
+
+    asyncio.run(scenario())
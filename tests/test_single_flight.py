@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.infrastructure.single_flight import SingleFlight
+from app.services import trend_service
+
+
+def test_concurrent_calls_share_one_computation():
+    calls = []
+
+    async def work(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    async def scenario():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("k", work, 21) for _ in range(5)), flights.do("other", work, 1))
+        assert results == [42] * 5 + [2]
+        assert len(flights) == 0
+        # Once finished, the key computes afresh
+        assert await flights.do("k", work, 21) == 42
+
+    asyncio.run(scenario())
+    assert calls == [21, 1, 21]
+
+
+def test_errors_are_shared_and_cancelled_callers_do_not_cancel_the_work():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        flights = SingleFlight()
+        results = await asyncio.gather(flights.do("f", failing), flights.do("f", failing), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+        leaver = asyncio.create_task(flights.do("s", slow))
+        stayer = asyncio.create_task(flights.do("s", slow))
+        await asyncio.sleep(0)
+        leaver.cancel()
+        assert await stayer == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await leaver
+
+    asyncio.run(scenario())
+
+
+def test_identical_trend_requests_fetch_once(monkeypatch):
+    calls = []
+    index = pd.date_range("2024-01-01", periods=120, freq="D", tz="UTC", name="t")
+    bars = pd.DataFrame({"close": np.linspace(100, 130, 120)}, index=index)
+
+    async def fake_fetch_bars(symbol, start, end, timeframe="1D"):
+        calls.append(symbol)
+        await asyncio.sleep(0.01)
+        return bars
+
+    monkeypatch.setattr(trend_service, "fetch_bars", fake_fetch_bars)
+
+    async def scenario():
+        return await asyncio.gather(*(trend_service.get_trend_frame(s, "2024-01-01", "2024-04-30") for s in ["SPY", "spy", "SPY"]))
+
+    frames = asyncio.run(scenario())
+    assert calls == ["SPY"]
+    assert frames[0] is frames[1] is frames[2]
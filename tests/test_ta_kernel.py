@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from app.domain.ta_indicators_model import BIAS_LABELS, compute_trend_bias, compute_trend_bias_matrix
+
+
+def test_matrix_kernel_matches_per_symbol_pipeline():
+    rng = np.random.default_rng(1)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (400, 6)), axis=0))
+    closes[:120, 2] = np.nan  # symbol with a shorter history
+
+    result = compute_trend_bias_matrix(closes)
+
+    assert result["bias"].dtype == np.int8
+    for j in range(closes.shape[1]):
+        first = int(np.argmax(~np.isnan(closes[:, j])))
+        df = pd.DataFrame({"close": closes[first:, j]}, index=pd.date_range("2022-01-01", periods=400 - first, name="t"))
+        expected = compute_trend_bias(df)
+
+        labels = [BIAS_LABELS[code] for code in result["bias"][first:, j]]
+        assert labels == expected["trend_bias"].tolist()
+        np.testing.assert_allclose(result["ema_short"][first:, j], expected["ema_21"], rtol=1e-12)
+        np.testing.assert_allclose(result["rsi"][first:, j], expected["rsi"], rtol=1e-9)
+        assert np.isnan(result["ema_long"][:first, j]).all()
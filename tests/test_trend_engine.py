@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.domain.ta_indicators_model import compute_trend_bias
+from app.domain.trend_engine import TrendTracker
+from app.services import trend_service
+from app.services.trend_service import trend_frame
+
+
+def _with_flat_stretch(df: pd.DataFrame) -> pd.DataFrame:
+    # a flat stretch exercises the rolling-mean edge cases
+    df.iloc[200:230, 0] = df["close"].iloc[200]
+    return df
+
+
+def test_tracker_matches_batch_exactly(regime_bars):
+    df = _with_flat_stretch(regime_bars((0, 0.01, 600)))
+    batch = compute_trend_bias(df.copy())
+
+    tracker = TrendTracker()
+    tracker.extend(df)
+    online = tracker.frame()
+
+    for col in ["ema_21", "ema_50", "rsi"]:
+        assert np.array_equal(online[col].to_numpy(), batch[col].to_numpy(), equal_nan=True)
+    assert (online["trend_bias"] == batch["trend_bias"]).all()
+
+
+def test_tracker_revises_last_bar(regime_bars):
+    df = _with_flat_stretch(regime_bars((0, 0.01, 600)))
+    revised = df.copy()
+    revised.iloc[-1, 0] *= 1.05
+
+    tracker = TrendTracker()
+    tracker.extend(df)
+    tracker.push(revised.index[-1], revised["close"].iloc[-1])
+
+    expected = compute_trend_bias(revised.copy())
+    assert len(tracker) == len(df)
+    assert np.array_equal(tracker.frame()["rsi"].to_numpy(), expected["rsi"].to_numpy(), equal_nan=True)
+
+
+def test_trend_frame_extends_and_slices_tracked_series(regime_bars):
+    df = _with_flat_stretch(regime_bars((0, 0.01, 600), seed=3))
+
+    head = trend_frame("TEST", df.iloc[:400])
+    full = trend_frame("TEST", df)
+    shorter = trend_frame("TEST", df.iloc[:100])
+
+    expected = compute_trend_bias(df.copy())
+    assert (full["trend_bias"] == expected["trend_bias"]).all()
+    assert (head["trend_bias"] == expected["trend_bias"].iloc[:400]).all()
+    assert len(shorter) == 100
+
+
+def test_latest_trend_bias_without_symbols_or_bars(monkeypatch, regime_bars):
+    async def no_bars(symbol, start, end, timeframe="1D"):
+        return regime_bars((0, 0.01, 0))
+
+    monkeypatch.setattr(trend_service, "fetch_bars", no_bars)
+
+    with TestClient(app) as client:
+        no_symbols = client.get("/v1/trend-bias/latest", params={"symbols": ",", "start": "2024-01-01", "end": "2024-02-01"})
+        empty = client.get("/v1/trend-bias/latest", params={"symbols": "AAA,BBB", "start": "2024-01-01", "end": "2024-02-01"})
+
+    assert (no_symbols.status_code, no_symbols.json()) == (200, [])
+    assert (empty.status_code, empty.json()) == (200, [])